@@ -0,0 +1,192 @@
+"""Benchmarks the video player on synthetic catalogs.
+
+Run from the python/ directory:
+
+    python3 -m benchmarks.run_benchmarks --sizes 10000 100000 --output bench.json
+
+For every catalog size this generates a catalog, then times the library
+load, the player start-up, the memory held by the library and each player
+command over a workload, and writes all results as JSON.
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from src.synthetic_catalog import tag_name
+from src.synthetic_catalog import write_catalog
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+PLAYLIST_SIZE = 1000
+
+
+def _random_id(rng, size):
+    return f"video_{rng.randrange(size):08d}"
+
+
+def _prepare(player, rng, size):
+    """Sets up the playlists the workload commands run against."""
+    player.create_playlist("bench")
+    player.add_many_to_playlist(
+        "bench", [_random_id(rng, size) for _ in range(PLAYLIST_SIZE)])
+    for num in range(100):
+        player.create_playlist(f"playlist_{num:03d}")
+
+
+# Each workload command is a (name, function) pair. The function runs the
+# command once on a player, with a random generator and the catalog size.
+WORKLOAD = [
+    ("number_of_videos", lambda player, rng, size: player.number_of_videos()),
+    ("play_video",
+     lambda player, rng, size: player.play_video(_random_id(rng, size))),
+    ("play_random_video",
+     lambda player, rng, size: player.play_random_video()),
+    ("pause_video", lambda player, rng, size: player.pause_video()),
+    ("continue_video", lambda player, rng, size: player.continue_video()),
+    ("show_playing", lambda player, rng, size: player.show_playing()),
+    ("stop_video", lambda player, rng, size: player.stop_video()),
+    ("flag_video",
+     lambda player, rng, size: player.flag_video(_random_id(rng, size))),
+    ("allow_video",
+     lambda player, rng, size: player.allow_video(_random_id(rng, size))),
+    ("create_playlist",
+     lambda player, rng, size: player.create_playlist(f"p{rng.random()}")),
+    ("add_to_playlist",
+     lambda player, rng, size: player.add_to_playlist(
+         "bench", _random_id(rng, size))),
+    ("remove_from_playlist",
+     lambda player, rng, size: player.remove_from_playlist(
+         "bench", _random_id(rng, size))),
+    ("show_playlist",
+     lambda player, rng, size: player.show_playlist("bench")),
+    ("show_all_playlists",
+     lambda player, rng, size: player.show_all_playlists()),
+    ("search_videos",
+     lambda player, rng, size: player.search_videos("cats")),
+    ("search_videos_tag",
+     lambda player, rng, size: player.search_videos_tag(
+         tag_name(rng.randint(1, 50)))),
+    ("show_all_videos", lambda player, rng, size: player.show_all_videos()),
+]
+
+
+def _time_calls(function, repeat):
+    """Returns the per-call timings of function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summarize(timings):
+    return {
+        "calls": len(timings),
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "mean_seconds": statistics.fmean(timings),
+    }
+
+
+def _library_memory(path):
+    """Returns the bytes held by a VideoLibrary loaded from path."""
+    gc.collect()
+    tracemalloc.start()
+    library = VideoLibrary(path)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del library
+    return memory
+
+
+def benchmark_size(path, size, repeat, measure_memory=True, seed=0):
+    """Benchmarks loading and every workload command on one catalog.
+
+    Args:
+        path: The catalog file.
+        size: The number of videos in the catalog.
+        repeat: How many times each command is timed. Commands whose cost
+            grows with the catalog, such as listing every video, are timed
+            fewer times on large catalogs.
+        measure_memory: Whether to measure the library footprint, which
+            loads the catalog once more under tracemalloc.
+        seed: The seed of the random ids used by the workload.
+    """
+    result = {"size": size}
+    start = time.perf_counter()
+    library = VideoLibrary(path)
+    result["load_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    player = VideoPlayer(video_library=library)
+    result["player_init_seconds"] = time.perf_counter() - start
+
+    if measure_memory:
+        result["library_memory_bytes"] = _library_memory(path)
+
+    rng = random.Random(seed)
+    commands = {}
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), \
+            mock.patch("builtins.input", lambda *args: "no"):
+        _prepare(player, rng, size)
+        for name, command in WORKLOAD:
+            calls = repeat if size * repeat <= 10 ** 7 else max(1, 10 ** 7 // size)
+            commands[name] = _summarize(_time_calls(
+                lambda: command(player, rng, size), calls))
+    result["commands"] = commands
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000],
+                        help="catalog sizes to benchmark (up to 10M)")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="timed calls per command")
+    parser.add_argument("--num-tags", type=int, default=1000,
+                        help="distinct tags in the synthetic catalogs")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the library memory measurement")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            path = Path(tmp_dir) / f"catalog_{size}.txt"
+            write_catalog(path, size, num_tags=args.num_tags)
+            result = benchmark_size(path, size, args.repeat,
+                                    measure_memory=not args.no_memory)
+            results["results"].append(result)
+            print(f"{size} videos: loaded in {result['load_seconds']:.3f}s, "
+                  f"slowest command "
+                  f"{max(result['commands'].items(), key=lambda item: item[1]['median_seconds'])[0]}")
+            path.unlink()
+
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
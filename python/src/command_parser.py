@@ -1,120 +1,393 @@
 """A command parser class."""
 
+from contextlib import nullcontext
 import textwrap
+import time
 from typing import Sequence
 
+from .profiling import CommandProfiler
+
 
 class CommandException(Exception):
     """A class used to represent a wrong command exception."""
     pass
 
 
+# Maps the playlist set algebra commands to their PlaylistRegistry operation.
+_PLAYLIST_OPERATIONS = {
+    "UNION_PLAYLISTS": "union",
+    "INTERSECT_PLAYLISTS": "intersection",
+    "SUBTRACT_PLAYLISTS": "difference",
+}
+
+# The commands the parser knows, by which commands are counted and profiled.
+_COMMANDS = {
+    "NUMBER_OF_VIDEOS", "SHOW_ALL_VIDEOS", "PLAY", "PLAY_RANDOM", "STOP",
+    "PAUSE", "CONTINUE", "SHOW_PLAYING", "SHOW_RECENTLY_PLAYED",
+    "WATCH_STATS", "PLAY_PLAYLIST", "NEXT", "PREVIOUS", "SHOW_QUEUE",
+    "CREATE_PLAYLIST", "ADD_TO_PLAYLIST", "REMOVE_FROM_PLAYLIST",
+    "ADD_MANY_TO_PLAYLIST", "REMOVE_MANY_FROM_PLAYLIST", "CLEAR_PLAYLIST",
+    "DELETE_PLAYLIST", "SHOW_PLAYLIST", "SHOW_ALL_PLAYLISTS",
+    "SEARCH_VIDEOS", "SEARCH_VIDEOS_WITH_TAG", "RELATED", "FLAG_VIDEO",
+    "ALLOW_VIDEO", "FLAG_MANY_VIDEOS", "ALLOW_MANY_VIDEOS", "FLAG_HISTORY",
+    "FLAG_LOG", "PROFILE", "STATS", "HELP", "BEGIN", "COMMIT", "ROLLBACK",
+    *_PLAYLIST_OPERATIONS,
+}
+
+# The commands that cannot be part of a batch, since they do not act on the
+# player, control the batch itself, or wait for user input, which would hold
+# the state lock of the batch until the user answers.
+_UNBATCHABLE = {"PROFILE", "STATS", "HELP", "BEGIN", "COMMIT", "ROLLBACK",
+                "SEARCH_VIDEOS", "SEARCH_VIDEOS_WITH_TAG"}
+
+# Seconds per unit of the durations given to FLAG_LOG.
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_duration(text):
+    """Returns the seconds of a duration such as "90", "30m" or "1h"."""
+    unit = text[-1:].lower()
+    number = text[:-1] if unit in _DURATION_UNITS else text
+    if not number.isnumeric():
+        raise CommandException(
+            f"Invalid duration: {text}. Please enter a number of seconds, "
+            f"optionally followed by s, m, h or d.")
+    return int(number) * _DURATION_UNITS.get(unit, 1)
+
+
+def _split_batch(command):
+    """Splits a command on ";" into the commands of a batch."""
+    if not any(";" in word for word in command):
+        return [list(command)]
+    commands = [part.split() for part in " ".join(command).split(";")]
+    return [command for command in commands if command] or [[]]
+
+
+class _CallRecorder:
+    """Stands in for the player to record the calls a command makes."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
+
+
 class CommandParser:
-    """A class used to parse and execute a user Command."""
+    """A class used to parse and execute a user Command.
+
+    Several commands run as one batch when separated by ";" on a line, or
+    when entered between BEGIN and COMMIT. The commands of a batch are all
+    validated before any of them runs, and run as one transaction of the
+    player: if one of them fails, the playlist and flag changes of the
+    others are undone.
+    """
+
+    def __init__(self, video_player, profiler=None):
+        """The CommandParser class is initialized.
 
-    def __init__(self, video_player):
+        Args:
+            video_player: The VideoPlayer commands are executed on.
+            profiler: The CommandProfiler wrapping command execution.
+                Defaults to one with profiling turned off.
+        """
         self._player = video_player
+        self._profiler = profiler if profiler is not None else CommandProfiler()
+        # The validated commands and player calls entered since BEGIN, or
+        # None outside of BEGIN and COMMIT.
+        self._batch = None
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
            Raises CommandException if a command cannot be parsed.
         """
+        metrics = self._player.metrics
+        # Unknown commands share one label so user typos cannot grow the
+        # number of metrics or profiles without bound.
+        name = command[0].upper() if command else "UNKNOWN"
+        if name not in _COMMANDS:
+            name = "UNKNOWN"
+        commands = _split_batch(command)
+        if len(commands) > 1 or (self._batch is not None
+                                 and name not in _UNBATCHABLE):
+            name = "BATCH"
+        # PROFILE commands are not profiled: PROFILE DUMP writes out the
+        # profiles, which cannot be done while one of them is running.
+        profiling = (self._profiler.profile(name) if name != "PROFILE"
+                     else nullcontext())
+        start = time.perf_counter_ns()
+        try:
+            with profiling:
+                if self._dispatch(commands) is False:
+                    name = "UNKNOWN"
+        except CommandException:
+            metrics.increment("yt_command_errors_total", (("command", name),))
+            raise
+        finally:
+            metrics.record_call("yt_commands", (("command", name),),
+                                time.perf_counter_ns() - start)
+
+    def _dispatch(self, commands):
+        """Runs a batch, controls BEGIN and COMMIT, or executes a command.
+           Returns False if the command is unknown.
+        """
+        if len(commands) > 1:
+            self._run_batch([self._validate(command) for command in commands])
+            return
+
+        command = commands[0]
+        word = command[0].upper() if command else ""
+        if word in ("BEGIN", "COMMIT", "ROLLBACK") and len(command) > 1:
+            raise CommandException(
+                f"Please enter {word} command without arguments.")
+
+        if word == "BEGIN":
+            if self._batch is not None:
+                print("Cannot begin batch: A batch is already started")
+            else:
+                self._batch = []
+                print("Started batch, enter COMMIT to run it or ROLLBACK to "
+                      "discard it")
+
+        elif word == "COMMIT":
+            if self._batch is None:
+                print("Cannot commit batch: No batch is started")
+            else:
+                batch, self._batch = self._batch, None
+                self._run_batch(batch)
+
+        elif word == "ROLLBACK":
+            if self._batch is None:
+                print("Cannot roll back batch: No batch is started")
+            else:
+                print(f"Discarded batch of {len(self._batch)} commands")
+                self._batch = None
+
+        elif self._batch is not None:
+            self._batch.append(self._validate(command))
+
+        else:
+            return self._execute(command)
+
+    def _validate(self, command):
+        """Checks a command of a batch without running it.
+
+        Returns:
+            A (command, calls) pair of the command and the player calls it
+            makes.
+        """
+        word = command[0].upper() if command else ""
+        if word in _UNBATCHABLE:
+            raise CommandException(f"{word} command cannot be part of a batch.")
+        recorder = _CallRecorder()
+        if self._execute(command, recorder) is False:
+            raise CommandException(f"Unknown command in batch: {command[0]}")
+        return command, recorder.calls
+
+    def _run_batch(self, batch):
+        """Runs validated commands as one transaction of the player."""
+        calls = []
+        commands = []
+        for command, command_calls in batch:
+            calls.extend(command_calls)
+            commands.extend([command] * len(command_calls))
+        failed = self._player.run_batch(calls)
+        if failed is None:
+            print(f"Committed batch of {len(batch)} commands")
+        else:
+            print(f"Rolled back batch: {' '.join(commands[failed])} failed")
+
+    def _execute(self, command: Sequence[str], player=None):
+        """Dispatches a command to the player. Returns False if the command
+           is unknown.
+        """
+        if player is None:
+            player = self._player
         if not command:
             raise CommandException(
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
         if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
+            player.number_of_videos()
 
         elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
+            if len(command) not in (1, 3):
+                raise CommandException(
+                    "Please enter SHOW_ALL_VIDEOS command optionally followed "
+                    "by the first and last title to show.")
+            player.show_all_videos(*command[1:])
 
         elif command[0].upper() == "PLAY":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
+            player.play_video(command[1])
 
         elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
+            player.play_random_video()
 
         elif command[0].upper() == "STOP":
-            self._player.stop_video()
+            player.stop_video()
 
         elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
+            player.pause_video()
 
         elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
+            player.continue_video()
 
         elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
+            player.show_playing()
+
+        elif command[0].upper() == "SHOW_RECENTLY_PLAYED":
+            if len(command) == 1:
+                player.show_recently_played()
+            elif len(command) == 2 and command[1].isnumeric():
+                player.show_recently_played(int(command[1]))
+            else:
+                raise CommandException(
+                    "Please enter SHOW_RECENTLY_PLAYED command followed by an "
+                    "optional number of videos.")
+
+        elif command[0].upper() == "WATCH_STATS":
+            if len(command) == 1:
+                player.show_watch_stats()
+            elif len(command) == 2 and command[1].isnumeric():
+                player.show_watch_stats(int(command[1]))
+            else:
+                raise CommandException(
+                    "Please enter WATCH_STATS command followed by an optional "
+                    "number of top videos and tags.")
+
+        elif command[0].upper() == "PLAY_PLAYLIST":
+            if len(command) != 2:
+                raise CommandException(
+                    "Please enter PLAY_PLAYLIST command followed by a "
+                    "playlist name.")
+            player.play_playlist(command[1])
+
+        elif command[0].upper() == "NEXT":
+            player.next_video()
+
+        elif command[0].upper() == "PREVIOUS":
+            player.previous_video()
+
+        elif command[0].upper() == "SHOW_QUEUE":
+            if len(command) == 1:
+                player.show_queue()
+            elif len(command) == 2 and command[1].isnumeric():
+                player.show_queue(int(command[1]))
+            else:
+                raise CommandException(
+                    "Please enter SHOW_QUEUE command followed by an optional "
+                    "number of videos.")
 
         elif command[0].upper() == "CREATE_PLAYLIST":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter CREATE_PLAYLIST command followed by a "
                     "playlist name.")
-            self._player.create_playlist(command[1])
+            player.create_playlist(command[1])
 
         elif command[0].upper() == "ADD_TO_PLAYLIST":
             if len(command) != 3:
                 raise CommandException(
                     "Please enter ADD_TO_PLAYLIST command followed by a "
                     "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
+            player.add_to_playlist(command[1], command[2])
 
         elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
             if len(command) != 3:
                 raise CommandException(
                     "Please enter REMOVE_FROM_PLAYLIST command followed by a "
                     "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
+            player.remove_from_playlist(command[1], command[2])
+
+        elif command[0].upper() == "ADD_MANY_TO_PLAYLIST":
+            if len(command) < 3:
+                raise CommandException(
+                    "Please enter ADD_MANY_TO_PLAYLIST command followed by a "
+                    "playlist name and the video_ids to add.")
+            player.add_many_to_playlist(command[1], command[2:])
+
+        elif command[0].upper() == "REMOVE_MANY_FROM_PLAYLIST":
+            if len(command) < 3:
+                raise CommandException(
+                    "Please enter REMOVE_MANY_FROM_PLAYLIST command followed by "
+                    "a playlist name and the video_ids to remove.")
+            player.remove_many_from_playlist(command[1], command[2:])
 
         elif command[0].upper() == "CLEAR_PLAYLIST":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter CLEAR_PLAYLIST command followed by a "
                     "playlist name.")
-            self._player.clear_playlist(command[1])
+            player.clear_playlist(command[1])
 
         elif command[0].upper() == "DELETE_PLAYLIST":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter DELETE_PLAYLIST command followed by a "
                     "playlist name.")
-            self._player.delete_playlist(command[1])
+            player.delete_playlist(command[1])
 
         elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
+            if len(command) == 2:
+                player.show_playlist(command[1])
+            elif len(command) == 3 and command[2].isnumeric():
+                player.show_playlist(command[1], int(command[2]))
+            else:
                 raise CommandException(
                     "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
+                    "playlist name and an optional page number.")
+
+        elif command[0].upper() in _PLAYLIST_OPERATIONS:
+            if len(command) < 4:
+                raise CommandException(
+                    f"Please enter {command[0].upper()} command followed by a "
+                    f"new playlist name and at least two playlist names.")
+            player.combine_playlists(
+                _PLAYLIST_OPERATIONS[command[0].upper()], command[1],
+                command[2:])
 
         elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
+            if len(command) > 2:
+                raise CommandException(
+                    "Please enter SHOW_ALL_PLAYLISTS command followed by an "
+                    "optional playlist name prefix.")
+            player.show_all_playlists(*command[1:])
 
         elif command[0].upper() == "SEARCH_VIDEOS":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter SEARCH_VIDEOS command followed by a "
                     "search term.")
-            self._player.search_videos(command[1])
+            player.search_videos(command[1])
 
         elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
             if len(command) != 2:
                 raise CommandException(
                     "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
                     "video tag.")
-            self._player.search_videos_tag(command[1])
+            player.search_videos_tag(command[1])
+
+        elif command[0].upper() == "RELATED":
+            if len(command) == 2:
+                player.show_related_videos(command[1])
+            elif len(command) == 3 and command[2].isnumeric():
+                player.show_related_videos(command[1], int(command[2]))
+            else:
+                raise CommandException(
+                    "Please enter RELATED command followed by a video_id and "
+                    "an optional number of videos.")
 
         elif command[0].upper() == "FLAG_VIDEO":
             if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
+                player.flag_video(command[1], command[2])
             elif len(command) == 2:
-                self._player.flag_video(command[1])
+                player.flag_video(command[1])
             else:
                 raise CommandException(
                     "Please enter FLAG_VIDEO command followed by a "
@@ -125,7 +398,44 @@ class CommandParser:
                 raise CommandException(
                     "Please enter ALLOW_VIDEO command followed by a "
                     "video_id.")
-            self._player.allow_video(command[1])
+            player.allow_video(command[1])
+
+        elif command[0].upper() == "FLAG_MANY_VIDEOS":
+            if len(command) < 3:
+                raise CommandException(
+                    "Please enter FLAG_MANY_VIDEOS command followed by a "
+                    "flag reason and the video_ids to flag.")
+            player.flag_many_videos(command[2:], command[1])
+
+        elif command[0].upper() == "ALLOW_MANY_VIDEOS":
+            if len(command) < 2:
+                raise CommandException(
+                    "Please enter ALLOW_MANY_VIDEOS command followed by the "
+                    "video_ids to allow.")
+            player.allow_many_videos(command[1:])
+
+        elif command[0].upper() == "FLAG_HISTORY":
+            if len(command) != 2:
+                raise CommandException(
+                    "Please enter FLAG_HISTORY command followed by a "
+                    "video_id.")
+            player.show_flag_history(command[1])
+
+        elif command[0].upper() == "FLAG_LOG":
+            if len(command) == 1:
+                player.show_flag_log()
+            elif len(command) == 2:
+                player.show_flag_log(_parse_duration(command[1]))
+            else:
+                raise CommandException(
+                    "Please enter FLAG_LOG command followed by an optional "
+                    "duration such as 90s, 30m, 1h or 7d.")
+
+        elif command[0].upper() == "PROFILE":
+            self._profile(command[1:])
+
+        elif command[0].upper() == "STATS":
+            print(player.metrics.export())
 
         elif command[0].upper() == "HELP":
             self._get_help()
@@ -133,30 +443,77 @@ class CommandParser:
             print(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+            return False
+
+    def _profile(self, args):
+        """Turns profiling on or off, or writes out the collected profiles."""
+        action = args[0].upper() if args else ""
+        if action == "ON" and len(args) <= 2:
+            mode = args[1].lower() if len(args) == 2 else "cprofile"
+            if mode not in CommandProfiler.MODES:
+                raise CommandException(
+                    f"Please enter a profiling mode out of: "
+                    f"{', '.join(CommandProfiler.MODES)}.")
+            self._profiler.enable(mode)
+            print(f"Profiling commands with {mode}")
+        elif action == "OFF" and len(args) == 1:
+            self._profiler.disable()
+            print("Stopped profiling commands")
+        elif action == "DUMP" and len(args) == 2:
+            for path in self._profiler.dump(args[1]):
+                print(f"Wrote profile: {path}")
+        else:
+            raise CommandException(
+                "Please enter PROFILE command followed by ON [cprofile|sample], "
+                "OFF or DUMP <directory>.")
 
     def _get_help(self):
         """Displays all available commands to the user."""
         help_text = textwrap.dedent("""
         Available commands:
             NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
+            SHOW_ALL_VIDEOS [<from_title> <to_title>] - Lists all videos from the library, or those with titles from from_title up to (not including) to_title.
             PLAY <video_id> - Plays specified video.
             PLAY_RANDOM - Plays a random video from the library.
             STOP - Stop the current video.
             PAUSE - Pause the current video.
             CONTINUE - Resume the current paused video.
             SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
+            SHOW_RECENTLY_PLAYED [<count>] - Displays the videos last played in this session, most recent first.
+            WATCH_STATS [<count>] - Displays the play counts and watch time of the session, with the most played videos and tags.
+            PLAY_PLAYLIST <playlist_name> - Plays the videos of the playlist in order, starting with the first one.
+            NEXT - Plays the next video of the playlist being played.
+            PREVIOUS - Plays the previous video of the playlist being played.
+            SHOW_QUEUE [<count>] - Displays the position in the playlist being played and its next videos.
             CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
             ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
             REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
+            ADD_MANY_TO_PLAYLIST <playlist_name> <video_id|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Adds all the requested videos to the playlist at once.
+            REMOVE_MANY_FROM_PLAYLIST <playlist_name> <video_id|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Removes all the specified videos from the playlist at once.
             CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
             DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
+            SHOW_PLAYLIST <playlist_name> [<page>] - List all the videos in this playlist, or only one page of them.
+            SHOW_ALL_PLAYLISTS [<prefix>] - Display all the available playlists, or those whose names start with prefix.
+            UNION_PLAYLISTS <new_playlist_name> <playlist_name|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Creates a playlist with the videos in any of the given playlists.
+            INTERSECT_PLAYLISTS <new_playlist_name> <playlist_name|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Creates a playlist with the videos in all of the given playlists.
+            SUBTRACT_PLAYLISTS <new_playlist_name> <playlist_name|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Creates a playlist with the videos in the first playlist but in none of the others.
             SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
             SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
+            RELATED <video_id> [<count>] - Display the videos sharing the most tags with the video, rarer tags weighing more.
             FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
             ALLOW_VIDEO <video_id> - Removes a flag from a video.
+            FLAG_MANY_VIDEOS <flag_reason> <video_id|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Flags all the requested videos at once.
+            ALLOW_MANY_VIDEOS <video_id|tag:<tag_name>|search:<search_term>|title:<pattern>>... - Removes the flags of all the requested videos at once.
+            FLAG_HISTORY <video_id> - Displays every flag and allow event of a video.
+            FLAG_LOG [<duration>] - Displays the flag and allow events, or those of the last duration (e.g. 90s, 30m, 1h, 7d).
+            STATS - Displays command counts, latencies and library gauges in the Prometheus text format.
+            PROFILE ON [cprofile|sample] - Starts profiling each command, with cProfile (default) or a stack sampler.
+            PROFILE OFF - Stops profiling commands.
+            PROFILE DUMP <directory> - Writes the per-command profiles (.prof) and sampled folded stacks (.folded).
+            BEGIN - Starts a batch: the next commands are checked and held until COMMIT.
+            COMMIT - Runs the commands held since BEGIN as one batch, undoing their playlist and flag changes if one of them fails.
+            ROLLBACK - Discards the commands held since BEGIN.
+            <command>; <command>... - Runs the commands of the line as one batch, like BEGIN and COMMIT.
             HELP - Displays help.
             EXIT - Terminates the program execution.
         """)
@@ -0,0 +1,45 @@
+"""A deferred value class."""
+
+import threading
+
+
+class Deferred:
+    """A class used to build a value in a background thread.
+
+    The value starts building as soon as the Deferred is created, and get()
+    only blocks callers that need it before it is ready.
+    """
+
+    def __init__(self, build, *args):
+        """Starts building the value.
+
+        Args:
+            build: The function returning the value.
+            *args: The arguments build is called with.
+        """
+        self._value = None
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(build, args), daemon=True)
+        self._thread.start()
+
+    def ready(self):
+        """Returns whether the value is built, or failed to build."""
+        return not self._thread.is_alive()
+
+    def get(self):
+        """Returns the value, waiting for it to be built.
+
+        Raises:
+            Exception: Whatever the build function raised.
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def _run(self, build, args):
+        try:
+            self._value = build(*args)
+        except BaseException as e:
+            self._error = e
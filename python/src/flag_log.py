@@ -0,0 +1,101 @@
+"""A flag audit log class."""
+
+from bisect import bisect_left
+from collections import namedtuple
+import time
+
+
+# One flag or allow event. action is "flag" or "allow", and flag_reason is
+# None for allow events.
+FlagEvent = namedtuple("FlagEvent", "timestamp video_id action flag_reason")
+
+
+class FlagLog:
+    """An append-only log of flag and allow events, ordered by time.
+
+    Timestamps never decrease along the log, so events within a time range
+    are found by binary search. The positions of the events of each video
+    are indexed as well, so the history of a video is read without a scan.
+    """
+
+    def __init__(self, events=(), clock=time.time):
+        """The FlagLog class is initialized.
+
+        Args:
+            events: Initial events, as FlagEvent objects or equivalent
+                sequences, in log order.
+            clock: The function returning the current time, in seconds since
+                the epoch.
+        """
+        self._clock = clock
+        self._events = []
+        self._timestamps = []
+        self._by_video = {}
+        for event in events:
+            self.append(*event)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def now(self):
+        """Returns the timestamp the next event should be recorded with."""
+        now = self._clock()
+        if self._timestamps and now < self._timestamps[-1]:
+            # The clock went back; keep the log ordered.
+            return self._timestamps[-1]
+        return now
+
+    def append(self, timestamp, video_id, action, flag_reason=None):
+        """Records an event.
+
+        Args:
+            timestamp: The event time, in seconds since the epoch. It is
+                raised to the last recorded time if it is earlier.
+            video_id: The flagged or allowed video.
+            action: "flag" or "allow".
+            flag_reason: The flag reason of a flag event.
+        """
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            timestamp = self._timestamps[-1]
+        self._by_video.setdefault(video_id, []).append(len(self._events))
+        self._events.append(FlagEvent(timestamp, video_id, action, flag_reason))
+        self._timestamps.append(timestamp)
+
+    def truncate(self, length):
+        """Drops the events recorded after the first length ones."""
+        while len(self._events) > length:
+            event = self._events.pop()
+            self._timestamps.pop()
+            positions = self._by_video[event.video_id]
+            positions.pop()
+            if not positions:
+                del self._by_video[event.video_id]
+
+    def tail(self, length):
+        """Returns the events recorded after the first length ones."""
+        return self._events[length:]
+
+    def events(self, start=None, end=None):
+        """Returns the events recorded within [start, end), in time order.
+
+        Args:
+            start: The inclusive lower bound on the timestamp, None for no
+                lower bound.
+            end: The exclusive upper bound on the timestamp, None for no
+                upper bound.
+        """
+        first = 0 if start is None else bisect_left(self._timestamps, start)
+        last = (len(self._events) if end is None
+                else bisect_left(self._timestamps, end, first))
+        return self._events[first:last]
+
+    def recent(self, seconds):
+        """Returns the events of the last seconds, in time order."""
+        return self.events(self._clock() - seconds)
+
+    def history(self, video_id):
+        """Returns the events of a video, in time order."""
+        return [self._events[i] for i in self._by_video.get(video_id, ())]
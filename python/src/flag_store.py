@@ -0,0 +1,52 @@
+"""A flag store class."""
+
+
+class FlagStore:
+    """A class used to hold the flagged videos and their flag reasons.
+
+    Only flagged videos are stored, so its size grows with the number of
+    flags rather than with the catalog.
+    """
+
+    def __init__(self, flags=()):
+        """The FlagStore class is initialized.
+
+        Args:
+            flags: Initial (video_id, flag_reason) pairs.
+        """
+        self._reasons = dict(flags)
+
+    def __contains__(self, video_id):
+        return video_id in self._reasons
+
+    def __iter__(self):
+        """Iterates over the flagged video_ids, in flagging order."""
+        return iter(self._reasons)
+
+    def __len__(self):
+        return len(self._reasons)
+
+    def get(self, video_id):
+        """Returns the flag reason of a video, None if it is not flagged."""
+        return self._reasons.get(video_id)
+
+    def items(self):
+        """Returns the (video_id, flag_reason) pairs of the flagged videos."""
+        return self._reasons.items()
+
+    def flag(self, video_id, flag_reason):
+        """Flags a video, replacing any previous flag reason."""
+        self._reasons[video_id] = flag_reason
+
+    def allow(self, video_id):
+        """Removes the flag of a video, if it is flagged."""
+        self._reasons.pop(video_id, None)
+
+    def flag_all(self, video_ids, flag_reason):
+        """Flags several videos with the same reason."""
+        self._reasons.update(dict.fromkeys(video_ids, flag_reason))
+
+    def allow_all(self, video_ids):
+        """Removes the flags of several videos, skipping unflagged ones."""
+        for video_id in video_ids:
+            self._reasons.pop(video_id, None)
@@ -0,0 +1,202 @@
+"""A parallel catalog ingestion pipeline."""
+
+from .video import Video
+from collections import namedtuple
+from pathlib import Path
+import csv
+import io
+import os
+
+
+# A catalog row that was skipped, with its 1-based line number and, once
+# merged into a library, the path of its catalog file.
+CatalogError = namedtuple("CatalogError", "line_number message path",
+                          defaults=(None,))
+
+
+def expand_paths(paths):
+    """Returns the catalog files named by paths, in order.
+
+    Args:
+        paths: A path or a list of paths. A directory stands for the .txt
+            files in it and a pattern such as "catalog/*.txt" for the files
+            matching it, both in sorted order.
+
+    Raises:
+        FileNotFoundError: If a directory or pattern matches no file.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(Path(path).glob("*.txt"))
+        elif any(char in str(path) for char in "*?["):
+            import glob
+            matches = sorted(map(Path, glob.glob(str(path))))
+        else:
+            expanded.append(Path(path))
+            continue
+        if not matches:
+            raise FileNotFoundError(f"No catalog files match {path}")
+        expanded.extend(matches)
+    return expanded
+
+
+def parse_rows(lines, first_line=1):
+    """Parses "title | video_id | tags" lines, reporting malformed ones.
+
+    Blank lines are skipped silently.
+
+    Args:
+        lines: An iterable of catalog lines.
+        first_line: The line number of the first line.
+
+    Returns:
+        A (rows, errors) tuple. rows holds a (line_number, title, video_id,
+        tags) tuple per valid row, errors a CatalogError per malformed one.
+    """
+    rows = []
+    errors = []
+    # Quotes are plain characters, so that each line is exactly one row and
+    # a title starting with '"' cannot swallow the lines after it.
+    reader = csv.reader(lines, delimiter="|", quoting=csv.QUOTE_NONE)
+    while True:
+        try:
+            fields = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            errors.append(CatalogError(first_line + reader.line_num - 1,
+                                       f"Malformed row: {e}"))
+            continue
+        line_number = first_line + reader.line_num - 1
+        fields = [field.strip() for field in fields]
+        if not any(fields):
+            continue
+        if len(fields) != 3:
+            errors.append(CatalogError(
+                line_number,
+                f"Expected 3 fields separated by '|', found {len(fields)}"))
+            continue
+        title, video_id, tags = fields
+        if not title:
+            errors.append(CatalogError(line_number, "Missing title"))
+        elif not video_id:
+            errors.append(CatalogError(line_number, "Missing video_id"))
+        else:
+            rows.append((line_number, title, video_id,
+                         [tag.strip() for tag in tags.split(",")] if tags else []))
+    return rows, errors
+
+
+def read_chunks(path, chunk_bytes):
+    """Yields (first_line, data) chunks of whole lines of a file.
+
+    Args:
+        path: The file to read.
+        chunk_bytes: The approximate size of a chunk, in bytes.
+    """
+    first_line = 1
+    rest = b""
+    with open(path, "rb") as catalog_file:
+        while True:
+            block = catalog_file.read(chunk_bytes)
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind(b"\n") + 1
+            if not cut:
+                rest = block
+                continue
+            chunk, rest = block[:cut], block[cut:]
+            yield first_line, chunk
+            first_line += chunk.count(b"\n")
+    if rest:
+        yield first_line, rest
+
+
+def _read_sources(paths, chunk_bytes):
+    """Yields (source, first_line, data) chunks of several files."""
+    for source, path in enumerate(paths):
+        for first_line, data in read_chunks(path, chunk_bytes):
+            yield source, first_line, data
+
+
+def _parse_chunk(chunk):
+    source, first_line, data = chunk
+    text = data.decode("utf-8", errors="replace")
+    # Only "\n" ends a line, as read_chunks counts lines; str.splitlines
+    # would also split on characters such as U+2028 inside a title.
+    return source, parse_rows(io.StringIO(text, newline="\n"), first_line)
+
+
+def load_catalogs(paths, num_workers=None, chunk_bytes=1 << 22):
+    """Loads catalog files, parsing their chunks in worker processes.
+
+    The chunks of all the files share one pool, so small files load
+    concurrently and large ones are split across the workers. Rows with a
+    video_id seen on an earlier line of the same file are skipped and
+    reported, as are malformed rows; the rest of the catalog still loads.
+
+    Args:
+        paths: The catalog files.
+        num_workers: The number of parsing processes. Defaults to the number
+            of CPUs. Files of a single chunk in all are parsed in this
+            process.
+        chunk_bytes: The approximate size of the chunks handed to workers.
+
+    Returns:
+        A (videos, line_numbers, errors) tuple per file. videos holds the
+        Video objects in file order, line_numbers their lines, and errors
+        the CatalogError objects by line number.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    if sum(map(os.path.getsize, paths)) <= chunk_bytes:
+        num_workers = 1
+
+    results = [([], [], []) for _ in paths]
+    first_lines = [{} for _ in paths]
+    pool = None
+    if num_workers > 1:
+        # Imported here since most catalogs fit in one chunk.
+        import multiprocessing
+        pool = multiprocessing.Pool(num_workers)
+    try:
+        chunks = _read_sources(paths, chunk_bytes)
+        parsed = (pool.imap(_parse_chunk, chunks) if pool is not None
+                  else map(_parse_chunk, chunks))
+        # Chunks come back in file order, so duplicates are found in one
+        # pass while the workers parse the following chunks.
+        for source, (rows, chunk_errors) in parsed:
+            videos, line_numbers, errors = results[source]
+            seen = first_lines[source]
+            errors.extend(chunk_errors)
+            for line_number, title, video_id, tags in rows:
+                first_line = seen.setdefault(video_id, line_number)
+                if first_line != line_number:
+                    errors.append(CatalogError(
+                        line_number,
+                        f"Duplicate video_id {video_id}, first seen on line "
+                        f"{first_line}"))
+                    continue
+                videos.append(Video(title, video_id, tags))
+                line_numbers.append(line_number)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    for _, _, errors in results:
+        errors.sort()
+    return results
+
+
+def load_catalog(path, num_workers=None, chunk_bytes=1 << 22):
+    """Loads a catalog file, like load_catalogs does.
+
+    Returns:
+        A (videos, errors) tuple, with the Video objects in file order and
+        the CatalogError objects by line number.
+    """
+    videos, _, errors = load_catalogs([path], num_workers, chunk_bytes)[0]
+    return videos, errors
@@ -0,0 +1,179 @@
+"""A state journal class."""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class StateJournal:
+    """An append-only write-ahead journal of playlist and flag mutations.
+
+    Every mutation is appended to the journal file as one JSON line tagged
+    with a sequence number. Once `compact_every` records have piled up, the
+    caller writes the full state as a snapshot and the journal is truncated,
+    so recovery reads one snapshot plus a bounded tail of records.
+
+    Records that only ever grow, such as an audit log, are handed to each
+    compaction as the ones added since the previous one. They are appended
+    to an archive file rather than rewritten into every snapshot.
+    """
+
+    SNAPSHOT_FILE = "snapshot.json"
+    JOURNAL_FILE = "journal.log"
+    ARCHIVE_FILE = "archive.log"
+
+    def __init__(self, directory, compact_every=1000, sync=False):
+        """The StateJournal class is initialized.
+
+        Args:
+            directory: The directory holding the snapshot and journal files.
+                It is created if it does not exist.
+            compact_every: How many journal records to keep before the state
+                should be compacted into a new snapshot.
+            sync: Whether to fsync the journal after every record. By default
+                records are only flushed to the operating system.
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._compact_every = compact_every
+        self._sync = sync
+        self._seq = 0
+        self._pending = 0
+        self._archive_size = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Reads the snapshot and the journal records written after it.
+
+        A torn record at the end of the journal (e.g. from a crash halfway
+        through a write) is ignored and cut off the file.
+
+        Returns:
+            A (state, records) tuple. The state is the snapshot dict, or None
+            if no snapshot exists. The records are (op, args) tuples in the
+            order they were appended.
+        """
+        state = None
+        snapshot_seq = 0
+        snapshot_path = self._directory / self.SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            snapshot_seq = snapshot["seq"]
+            state = snapshot["state"]
+            self._archive_size = snapshot.get("archive_size", 0)
+        # Archive lines past the size recorded in the snapshot are left by a
+        # crash before the snapshot was replaced; the journal still holds
+        # their records.
+        archive_path = self._directory / self.ARCHIVE_FILE
+        if (archive_path.exists()
+                and archive_path.stat().st_size > self._archive_size):
+            os.truncate(archive_path, self._archive_size)
+
+        records = []
+        for record in self._read_lines(self.JOURNAL_FILE):
+            # Records already folded into the snapshot are left over when a
+            # crash happens between the snapshot being written and the
+            # journal being truncated.
+            if record["seq"] > snapshot_seq:
+                records.append((record["op"], record["args"]))
+
+        self._seq = snapshot_seq + len(records)
+        self._pending = len(records)
+        return state, records
+
+    def archived(self):
+        """Returns the records archived by compactions, in the order they
+        were archived. Call it after `load`."""
+        return self._read_lines(self.ARCHIVE_FILE)
+
+    def _read_lines(self, name):
+        """Reads the JSON lines of a file, cutting off a torn last line.
+
+        Returns:
+            The decoded lines, an empty list if the file does not exist.
+        """
+        path = self._directory / name
+        if not path.exists():
+            return []
+        lines = []
+        valid_size = 0
+        with open(path, "rb") as lines_file:
+            for line in lines_file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    lines.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_size += len(line)
+        # Cut off the torn line so new lines start on a fresh one.
+        if valid_size < path.stat().st_size:
+            os.truncate(path, valid_size)
+        return lines
+
+    def append(self, op, *args):
+        """Appends a single mutation record to the journal.
+
+        Args:
+            op: The name of the mutation.
+            args: The JSON serializable arguments of the mutation.
+        """
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._directory / self.JOURNAL_FILE, "a")
+            self._seq += 1
+            self._pending += 1
+            self._file.write(
+                json.dumps({"seq": self._seq, "op": op, "args": args}) + "\n")
+            self._file.flush()
+            if self._sync:
+                os.fsync(self._file.fileno())
+
+    def needs_compaction(self):
+        """Returns whether the journal has grown past `compact_every`."""
+        return self._pending >= self._compact_every
+
+    def compact(self, state, archive=()):
+        """Writes the state as a new snapshot and truncates the journal.
+
+        Args:
+            state: A JSON serializable dict with the full current state.
+            archive: The JSON serializable records to append to the archive
+                file. They are part of the snapshot from then on.
+        """
+        with self._lock:
+            # The archive is written before the snapshot that counts it.
+            data = "".join(json.dumps(record) + "\n"
+                           for record in archive).encode()
+            if data:
+                with open(self._directory / self.ARCHIVE_FILE,
+                          "ab") as archive_file:
+                    archive_file.write(data)
+                    archive_file.flush()
+                    os.fsync(archive_file.fileno())
+            archive_size = self._archive_size + len(data)
+
+            snapshot_path = self._directory / self.SNAPSHOT_FILE
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as tmp_file:
+                json.dump({"seq": self._seq, "archive_size": archive_size,
+                           "state": state}, tmp_file)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_path, snapshot_path)
+            self._archive_size = archive_size
+
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self._directory / self.JOURNAL_FILE, "w")
+            self._pending = 0
+
+    def close(self):
+        """Flushes and closes the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
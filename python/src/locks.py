@@ -0,0 +1,80 @@
+"""A read-write lock class."""
+
+from contextlib import contextmanager
+import threading
+
+
+class ReadWriteLock:
+    """A class used to represent a read-mostly lock.
+
+    Any number of readers may hold the lock at once, or a single writer.
+    Waiting writers block new readers so they are not starved. A thread
+    holding the lock may acquire it again: nested reads and writes are
+    allowed, as are reads nested in a write, but upgrading a read to a
+    write raises RuntimeError since two upgrading readers would deadlock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Holds the lock for reading while in the with block."""
+        local = self._local
+        if self._writer == threading.get_ident():
+            yield
+            return
+
+        if getattr(local, "reads", 0):
+            local.reads += 1
+            try:
+                yield
+            finally:
+                local.reads -= 1
+            return
+
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        local.reads = 1
+        try:
+            yield
+        finally:
+            local.reads = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Holds the lock for writing while in the with block."""
+        me = threading.get_ident()
+        if self._writer == me:
+            yield
+            return
+
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+    def holds_read(self):
+        """Returns whether the calling thread holds the lock for reading."""
+        return bool(getattr(self._local, "reads", 0))
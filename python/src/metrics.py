@@ -0,0 +1,171 @@
+"""A metrics registry class."""
+
+from contextlib import contextmanager
+import threading
+import time
+
+
+class Histogram:
+    """A class used to represent a latency histogram.
+
+    Latencies are counted in power-of-two nanosecond buckets, so recording
+    one is a bit_length() call and memory stays fixed however many are
+    recorded. Quantiles are interpolated within their bucket.
+    """
+
+    NUM_BUCKETS = 48
+
+    def __init__(self):
+        self.buckets = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+
+    def observe(self, ns):
+        """Records one latency, in nanoseconds."""
+        self.buckets[min(ns.bit_length(), self.NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def quantile(self, q):
+        """Returns the estimated q-quantile of the latencies, in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                # Bucket index holds the latencies in [2**(index-1), 2**index).
+                low = 2 ** (index - 1) if index else 0
+                fraction = (rank - seen) / bucket_count
+                return (low + (2 ** index - low) * fraction) / 1e9
+            seen += bucket_count
+        return 2 ** (self.NUM_BUCKETS - 1) / 1e9
+
+
+class Metrics:
+    """A class used to collect counters, latency histograms and gauges.
+
+    Metrics are keyed by name and a tuple of (label, value) pairs. They are
+    exported in the Prometheus text format, with latencies as summaries
+    holding the p50, p95 and p99 quantiles.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def increment(self, name, labels=(), amount=1):
+        """Adds amount to a counter.
+
+        Args:
+            name: The metric name.
+            labels: A tuple of (label, value) pairs.
+            amount: The amount to add.
+        """
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, ns):
+        """Records a latency in a histogram.
+
+        Args:
+            name: The metric name.
+            labels: A tuple of (label, value) pairs.
+            ns: The latency, in nanoseconds.
+        """
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(ns)
+
+    @contextmanager
+    def time(self, name, labels=()):
+        """Counts and times the with block as a call.
+
+        The call is counted in name + "_total" and its latency recorded in
+        name + "_latency_seconds".
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record_call(name, labels, time.perf_counter_ns() - start)
+
+    def record_call(self, name, labels, ns):
+        """Counts a call and records its latency, as time() does.
+
+        Args:
+            name: The metric name prefix.
+            labels: A tuple of (label, value) pairs.
+            ns: The latency of the call, in nanoseconds.
+        """
+        self.increment(name + "_total", labels)
+        self.observe(name + "_latency_seconds", labels, ns)
+
+    def gauge(self, name, function):
+        """Registers a gauge, whose value is read when exporting.
+
+        Args:
+            name: The metric name.
+            function: A function returning the current value.
+        """
+        self._gauges[name] = function
+
+    def get_counter(self, name, labels=()):
+        """Returns the value of a counter, 0 if it was never incremented."""
+        with self._lock:
+            return self._counters.get((name, labels), 0)
+
+    def get_histogram(self, name, labels=()):
+        """Returns a histogram, None if nothing was recorded in it."""
+        with self._lock:
+            return self._histograms.get((name, labels))
+
+    def export(self):
+        """Returns all metrics in the Prometheus text format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(),
+                                key=lambda item: item[0])
+            summaries = [(key, [histogram.quantile(q) for q in self.QUANTILES],
+                          histogram.total_ns / 1e9, histogram.count)
+                         for key, histogram in histograms]
+
+        lines = []
+        typed = set()
+
+        def add_type(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            add_type(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), quantiles, total, count in summaries:
+            add_type(name, "summary")
+            for q, value in zip(self.QUANTILES, quantiles):
+                lines.append(f"{name}{_format_labels(labels + (('quantile', q),))} "
+                             f"{value:.9f}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.9f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for name, function in sorted(self._gauges.items()):
+            add_type(name, "gauge")
+            lines.append(f"{name} {function()}")
+
+        return "\n".join(lines)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
@@ -0,0 +1,114 @@
+"""A play queue class."""
+
+
+class PlayQueue:
+    """A class used to play a list of videos in order.
+
+    The entries around the current position are resolved in the background,
+    so moving to the next or previous video finds it already looked up and
+    validated.
+    """
+
+    def __init__(self, name, video_ids, resolve, executor, prefetch=3):
+        """The PlayQueue class is initialized.
+
+        Args:
+            name: The name of what is queued, e.g. the playlist name.
+            video_ids: The video_ids to play, in order.
+            resolve: A function returning the Video object of a video_id, or
+                None if it cannot be played.
+            executor: The concurrent.futures executor resolving entries.
+            prefetch: How many entries ahead of and behind the current one
+                are resolved in advance.
+        """
+        self._name = name
+        self._video_ids = list(video_ids)
+        self._resolve = resolve
+        self._executor = executor
+        self._prefetch = prefetch
+        self._position = -1
+        self._futures = {}
+        self._fetch_around(self._position)
+
+    @property
+    def name(self):
+        """Returns the name of what is queued."""
+        return self._name
+
+    @property
+    def position(self):
+        """Returns the index of the current entry, -1 before the first one."""
+        return self._position
+
+    def __len__(self):
+        return len(self._video_ids)
+
+    def next(self):
+        """Moves to the next playable entry and returns its Video object.
+
+        Returns:
+            None, without moving, if no entry after the current one can be
+            played.
+        """
+        return self._move(1)
+
+    def previous(self):
+        """Moves to the previous playable entry and returns its Video object.
+
+        Returns:
+            None, without moving, if no entry before the current one can be
+            played.
+        """
+        return self._move(-1)
+
+    def upcoming(self, limit):
+        """Returns the Video objects of the next playable entries.
+
+        Args:
+            limit: The maximum number of videos to return.
+        """
+        videos = []
+        index = self._position + 1
+        while index < len(self._video_ids) and len(videos) < limit:
+            video = self._result(index)
+            if video is not None:
+                videos.append(video)
+            index += 1
+        return videos
+
+    def close(self):
+        """Cancels the lookups that have not started yet."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+
+    def _move(self, step):
+        index = self._position + step
+        while 0 <= index < len(self._video_ids):
+            video = self._result(index)
+            if video is not None:
+                self._position = index
+                self._fetch_around(index)
+                return video
+            index += step
+        return None
+
+    def _result(self, index):
+        future = self._futures.get(index)
+        if future is None or future.cancelled():
+            future = self._futures[index] = self._executor.submit(
+                self._resolve, self._video_ids[index])
+        return future.result()
+
+    def _fetch_around(self, position):
+        """Resolves the entries within prefetch of position in the background
+        and forgets those further away, so memory stays bounded."""
+        low = max(position - self._prefetch, 0)
+        high = min(position + self._prefetch + 1, len(self._video_ids))
+        for index in list(self._futures):
+            if not low <= index < high:
+                self._futures.pop(index).cancel()
+        for index in range(low, high):
+            if index not in self._futures:
+                self._futures[index] = self._executor.submit(
+                    self._resolve, self._video_ids[index])
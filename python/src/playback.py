@@ -0,0 +1,111 @@
+"""A playback session class."""
+
+from collections import deque
+from collections import namedtuple
+import time
+
+
+# One playback event. action is "play", "pause", "continue" or "stop".
+PlaybackEvent = namedtuple("PlaybackEvent", "timestamp action video")
+
+STOPPED = "stopped"
+PLAYING = "playing"
+PAUSED = "paused"
+
+# Maps a (state, action) pair to the state the action leads to. Pairs that
+# are missing are not allowed.
+_TRANSITIONS = {
+    (STOPPED, "play"): PLAYING,
+    (PLAYING, "play"): PLAYING,
+    (PAUSED, "play"): PLAYING,
+    (PLAYING, "pause"): PAUSED,
+    (PAUSED, "continue"): PLAYING,
+    (PLAYING, "stop"): STOPPED,
+    (PAUSED, "stop"): STOPPED,
+}
+
+
+class PlaybackSession:
+    """A class used to represent the playback state of a session.
+
+    Playback is a state machine over STOPPED, PLAYING and PAUSED, where each
+    transition is one table lookup. The last events of the session are kept
+    in a ring buffer, so its history costs fixed memory however long it
+    runs.
+    """
+
+    def __init__(self, history_size=100, clock=time.time, listener=None):
+        """The PlaybackSession class is initialized.
+
+        Args:
+            history_size: How many of the last playback events are kept.
+            clock: The function returning the current time, in seconds since
+                the epoch.
+            listener: An optional function called with every new event.
+        """
+        self._clock = clock
+        self._listener = listener
+        self._state = STOPPED
+        self._video = None
+        self._events = deque(maxlen=history_size)
+
+    @property
+    def state(self):
+        """Returns STOPPED, PLAYING or PAUSED."""
+        return self._state
+
+    @property
+    def video(self):
+        """Returns the video playing or paused, None if stopped."""
+        return self._video
+
+    def can(self, action):
+        """Returns whether action is allowed in the current state."""
+        return (self._state, action) in _TRANSITIONS
+
+    def play(self, video):
+        """Starts playing a video, replacing the current one."""
+        self._transition("play", video)
+
+    def pause(self):
+        """Pauses the current video."""
+        self._transition("pause", self._video)
+
+    def resume(self):
+        """Continues the paused video."""
+        self._transition("continue", self._video)
+
+    def stop(self):
+        """Stops the current video."""
+        self._transition("stop", self._video)
+        self._video = None
+
+    def events(self):
+        """Returns the kept playback events, oldest first."""
+        return list(self._events)
+
+    def recently_played(self, limit=None):
+        """Returns the distinct videos last played, most recent first.
+
+        Args:
+            limit: The maximum number of videos to return, None for all the
+                videos in the kept history.
+        """
+        videos = {}
+        for event in reversed(self._events):
+            if limit is not None and len(videos) >= limit:
+                break
+            if event.action == "play":
+                videos.setdefault(event.video.video_id, event.video)
+        return list(videos.values())
+
+    def _transition(self, action, video):
+        state = _TRANSITIONS.get((self._state, action))
+        if state is None:
+            raise ValueError(f"Cannot {action} while {self._state}")
+        self._state = state
+        self._video = video
+        event = PlaybackEvent(self._clock(), action, video)
+        self._events.append(event)
+        if self._listener is not None:
+            self._listener(event)
@@ -0,0 +1,150 @@
+"""A command profiler class."""
+
+from contextlib import contextmanager
+from pathlib import Path
+import cProfile
+import os
+import sys
+import threading
+
+
+class CommandProfiler:
+    """A class used to profile command execution, per command.
+
+    Profiling is off until enabled, and then works in one of two modes:
+    "cprofile" runs each command under cProfile, accumulating one profile
+    per command name; "sample" periodically samples the stacks of the
+    threads running commands, which costs less and gives flame-graph ready
+    folded stacks. Only one command is profiled at a time in cprofile mode,
+    since a thread can only run one deterministic profiler.
+    """
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self, mode=None, interval=0.001):
+        """The CommandProfiler class is initialized.
+
+        Args:
+            mode: One of MODES to start profiling right away, or None.
+            interval: The sampling interval of the sample mode, in seconds.
+        """
+        self._interval = interval
+        self._mode = None
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._profiles = {}
+        self._stacks = {}
+        self._active = {}
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        if mode:
+            self.enable(mode)
+
+    @property
+    def mode(self):
+        """Returns the current profiling mode, None if profiling is off."""
+        return self._mode
+
+    def enable(self, mode="cprofile"):
+        """Turns profiling on. Raises ValueError for an unknown mode."""
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.disable()
+        self._mode = mode
+        if mode == "sample":
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+    def disable(self):
+        """Turns profiling off, keeping what was collected so far."""
+        self._mode = None
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+
+    @contextmanager
+    def profile(self, name):
+        """Profiles the with block as a run of the command name."""
+        mode = self._mode
+        if mode == "cprofile":
+            with self._cprofile_lock:
+                profile = self._profiles.setdefault(name, cProfile.Profile())
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+        elif mode == "sample":
+            thread_id = threading.get_ident()
+            self._active[thread_id] = name
+            try:
+                yield
+            finally:
+                del self._active[thread_id]
+        else:
+            yield
+
+    def folded_stacks(self, name):
+        """Returns the sampled stacks of a command in the folded format.
+
+        Each line holds the frames from the outermost one, joined by ";",
+        followed by the number of samples, as read by flamegraph.pl and
+        speedscope.
+        """
+        with self._lock:
+            stacks = sorted(self._stacks.get(name, {}).items())
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def dump(self, directory):
+        """Writes the collected profiles into a directory.
+
+        cProfile profiles are written as <command>.prof pstats files, and
+        sampled stacks as <command>.folded files.
+
+        Returns:
+            The list of written paths.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with self._cprofile_lock:
+            for name, profile in sorted(self._profiles.items()):
+                path = directory / f"{_file_name(name)}.prof"
+                profile.dump_stats(path)
+                paths.append(path)
+        with self._lock:
+            names = sorted(self._stacks)
+        for name in names:
+            path = directory / f"{_file_name(name)}.folded"
+            path.write_text(self.folded_stacks(name))
+            paths.append(path)
+        return paths
+
+    def _sample(self):
+        """Records the stacks of the threads running commands until stopped."""
+        while not self._stop_sampling.wait(self._interval):
+            frames = sys._current_frames()
+            for thread_id, name in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} "
+                                 f"({os.path.basename(code.co_filename)}:"
+                                 f"{code.co_firstlineno})")
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                with self._lock:
+                    counts = self._stacks.setdefault(name, {})
+                    counts[folded] = counts.get(folded, 0) + 1
+
+
+def _file_name(name):
+    """Returns a profile name with the characters unsafe in file names
+    replaced by "_"."""
+    return "".join(char if char.isalnum() or char in "_-" else "_"
+                   for char in name)
@@ -0,0 +1,144 @@
+"""A tag based video recommender.
+
+A neighbor table can be built offline from a catalog file, run from the
+python/ directory:
+
+    python3 -m src.recommender src/videos.txt related.json --count 10
+"""
+
+from heapq import nsmallest
+from itertools import islice
+import math
+
+from .tags import TAGS
+from .video_library import VideoLibrary
+
+
+class TagRecommender:
+    """A class used to find the videos related to a video by their tags.
+
+    Candidates are gathered from the posting lists of the tags of a video,
+    and scored by the sum of the inverse document frequencies of the tags
+    they share with it, so rare tags weigh more than common ones. Tags with
+    long posting lists only add to the scores of the candidates found
+    through rarer tags, which bounds the work per query.
+    """
+
+    def __init__(self, video_library, table=None, max_postings=10000):
+        """The TagRecommender class is initialized.
+
+        Args:
+            video_library: The library whose videos are recommended. It
+                must offer get_tag_postings().
+            table: An optional precomputed neighbor table, as returned by
+                precompute(), used before scoring online.
+            max_postings: The length above which the posting list of a tag
+                is not scanned for candidates.
+        """
+        self._library = video_library
+        self._table = table or {}
+        self._max_postings = max_postings
+
+    def related(self, video_id, count=5, exclude=()):
+        """Returns the videos sharing the most weighted tags with a video.
+
+        Args:
+            video_id: The video to find related videos of.
+            count: The maximum number of videos to return.
+            exclude: video_ids that must not be returned, e.g. the flagged
+                ones.
+
+        Returns:
+            A list of (video_id, score) pairs, best first. Videos sharing no
+            tag are never returned.
+        """
+        neighbors = self._table.get(video_id)
+        if neighbors is not None:
+            # The table may have been built from an older catalog.
+            neighbors = [(other, score) for other, score in neighbors
+                         if other not in exclude
+                         and self._library.get_video(other) is not None]
+            # A table row holding too few videos once the excluded and
+            # missing ones are dropped is no better than scoring online.
+            if len(neighbors) >= count:
+                return neighbors[:count]
+
+        scores = self._scores(video_id)
+        return nsmallest(count,
+                         ((other, score) for other, score in scores.items()
+                          if other not in exclude),
+                         key=lambda item: (-item[1], item[0]))
+
+    def precompute(self, count=10, video_ids=None):
+        """Returns a table of the related videos of every video.
+
+        Args:
+            count: How many related videos to keep per video.
+            video_ids: The videos to compute the table for. Defaults to the
+                whole library.
+
+        Returns:
+            A dict from video_id to a list of (video_id, score) pairs.
+        """
+        if video_ids is None:
+            video_ids = (video.video_id
+                         for video in self._library.get_all_videos())
+        return {video_id: nsmallest(count, self._scores(video_id).items(),
+                                    key=lambda item: (-item[1], item[0]))
+                for video_id in video_ids}
+
+    def _scores(self, video_id):
+        """Returns the IDF-weighted tag overlap of each candidate."""
+        video = self._library.get_video(video_id)
+        if video is None:
+            return {}
+        num_videos = len(self._library)
+        postings = {tag: self._library.get_tag_postings(tag)
+                    for tag in dict.fromkeys(video.tags)}
+
+        scores = {}
+        for tag in sorted(postings, key=lambda tag: len(postings[tag])):
+            posting = postings[tag]
+            weight = math.log(num_videos / len(posting))
+            if len(posting) <= self._max_postings or not scores:
+                for other in islice(posting, self._max_postings):
+                    scores[other] = scores.get(other, 0.0) + weight
+            else:
+                tag_id = TAGS.get_id(tag)
+                for other in scores:
+                    if tag_id in self._library.get_video(other).tag_ids:
+                        scores[other] += weight
+        scores.pop(video_id, None)
+        return scores
+
+
+def write_table(table, path):
+    """Writes a neighbor table as JSON."""
+    import json
+    with open(path, "w") as table_file:
+        json.dump(table, table_file)
+
+
+def read_table(path):
+    """Reads a neighbor table written by write_table."""
+    import json
+    with open(path) as table_file:
+        return {video_id: [tuple(neighbor) for neighbor in neighbors]
+                for video_id, neighbors in json.load(table_file).items()}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Builds the related videos table of a catalog.")
+    parser.add_argument("catalog", help="the catalog file")
+    parser.add_argument("output", help="the JSON table to write")
+    parser.add_argument("--count", type=int, default=10,
+                        help="related videos kept per video")
+    args = parser.parse_args()
+    recommender = TagRecommender(VideoLibrary(args.catalog))
+    write_table(recommender.precompute(args.count), args.output)
+
+
+if __name__ == "__main__":
+    main()
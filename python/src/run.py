@@ -1,21 +1,66 @@
 """A youtube terminal simulator."""
-from .video_player import VideoPlayer
-from .command_parser import CommandException
-from .command_parser import CommandParser
+import os
+
+from .deferred import Deferred
+
+
+def _start_session():
+    """Loads the catalog and builds the player and the command parser.
+
+    The modules are imported here rather than at the top, so the prompt is
+    shown without waiting for them.
+
+    Returns:
+        A (video_player, parser, profiler, load_errors) tuple.
+    """
+    from .command_parser import CommandParser
+    from .profiling import CommandProfiler
+    from .video_library import VideoLibrary
+    from .video_player import VideoPlayer
+
+    # The catalog is read from the files, directories or patterns listed in
+    # YT_CATALOG if it is set, and the rows that could not be loaded are
+    # listed rather than stopping the program.
+    catalog = os.environ.get("YT_CATALOG")
+    video_library = VideoLibrary(catalog.split(os.pathsep) if catalog else None)
+    # Playlists and flags are persisted across runs when YT_STATE_DIR is set,
+    # and RELATED is served from the table in YT_RELATED_TABLE if it is set.
+    related_table = os.environ.get("YT_RELATED_TABLE")
+    if related_table:
+        from .recommender import read_table
+        related_table = read_table(related_table)
+    video_player = VideoPlayer(
+        state_dir=os.environ.get("YT_STATE_DIR"),
+        video_library=video_library,
+        related_table=related_table or None)
+    # Commands are profiled from the start when YT_PROFILE is set to one of
+    # the CommandProfiler modes, and the profiles written out on exit.
+    profiler = CommandProfiler(os.environ.get("YT_PROFILE"))
+    parser = CommandParser(video_player, profiler)
+    return video_player, parser, profiler, video_library.load_errors
 
 
 if __name__ == "__main__":
+    # The session is built in the background while the prompt waits for the
+    # first command, which is the only one that may have to wait for it.
+    session = Deferred(_start_session)
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
-    while True:
-        command = input("YT> ")
-        if command.upper() == "EXIT":
-            break
+    command = input("YT> ")
+    video_player, parser, profiler, load_errors = session.get()
+    for error in load_errors:
+        print(f"Skipped {error.path} line {error.line_number}: "
+              f"{error.message}")
+    from .command_parser import CommandException
+    while command.upper() != "EXIT":
         try:
             parser.execute_command(command.split())
         except CommandException as e:
             print(e)
+        command = input("YT> ")
+    video_player.close()
+    if profiler.mode is not None:
+        profiler.disable()
+        profiler.dump(os.environ.get("YT_PROFILE_DIR", "profiles"))
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
@@ -0,0 +1,164 @@
+"""A sharded video library class."""
+
+from .video import Video
+from .video_library import VideoLibrary
+from array import array
+import multiprocessing
+import os
+import threading
+
+
+def read_slice(path, index, count):
+    """Yields the lines of one of count byte ranges of a catalog file.
+
+    A line belongs to the slice its first byte falls in, so the slices of a
+    file hold every line exactly once.
+
+    Args:
+        path: The catalog file.
+        index: The 0-based index of the slice.
+        count: The number of slices the file is split in.
+    """
+    size = os.path.getsize(path)
+    start = size * index // count
+    end = size * (index + 1) // count
+    with open(path, "rb") as video_file:
+        if start > 0:
+            # Skip the line started in the previous slice. If the previous
+            # byte is a newline, this only consumes that newline.
+            video_file.seek(start - 1)
+            video_file.readline()
+        while video_file.tell() < end:
+            line = video_file.readline()
+            if not line:
+                break
+            yield line.decode("utf-8", errors="replace")
+
+
+def _serve_shard(connection, start, rows):
+    """Answers search requests over one shard until asked to stop.
+
+    Args:
+        connection: The pipe requests come in and results go out through.
+        start: The position of the first video of the shard in the title
+            order of the whole library.
+        rows: The (title, video_id, tags) of the videos of the shard, in
+            title order.
+    """
+    library = VideoLibrary(
+        videos=[Video(title, video_id, tags) for title, video_id, tags in rows])
+    positions = {video_id: start + i
+                 for i, (_, video_id, _) in enumerate(rows)}
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, arg = request
+        connection.send(array("I", [positions[video.video_id] for video
+                                    in getattr(library, method)(arg)]))
+    connection.close()
+
+
+class ShardedVideoLibrary(VideoLibrary):
+    """A class used to represent a Video Library searched by worker processes.
+
+    Lookups are served from the full library in this process, while title
+    and tag searches are split across one worker process per shard. Each
+    shard holds a contiguous range of the videos in title order, so the
+    workers answer with positions in that order, and the results of the
+    shards are concatenated rather than merged. The shards hold the catalog
+    as it was loaded: videos added or removed later are not searched.
+    """
+
+    def __init__(self, path=None, num_shards=None):
+        """The ShardedVideoLibrary class is initialized.
+
+        Args:
+            path: The catalog file to load, or a list of them, as taken by
+                VideoLibrary. Defaults to the videos.txt file next to this
+                module.
+            num_shards: The number of worker processes. Defaults to the
+                number of CPUs.
+        """
+        super().__init__(path)
+        num_shards = num_shards or os.cpu_count() or 1
+
+        self._ordered = self.get_sorted_videos()
+        # Each pipe has its own lock, held from sending a request to reading
+        # its answer, so concurrent searches are pipelined over the shards.
+        self._locks = []
+        self._connections = []
+        self._workers = []
+        for index in range(num_shards):
+            start = len(self._ordered) * index // num_shards
+            end = len(self._ordered) * (index + 1) // num_shards
+            rows = [(video.title, video.video_id, video.tags)
+                    for video in self._ordered[start:end]]
+            parent_end, child_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve_shard, args=(child_end, start, rows),
+                daemon=True)
+            worker.start()
+            child_end.close()
+            self._locks.append(threading.Lock())
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the worker processes."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for connection in self._connections:
+                connection.send(None)
+                connection.close()
+            for worker in self._workers:
+                worker.join()
+            self._connections = []
+            self._workers = []
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def search_videos(self, search_term):
+        """Returns the videos whose titles contain the search_term, by title.
+
+        Args:
+            search_term: The query to be used in search, ignoring case.
+        """
+        return self._fan_out("search_videos", search_term)
+
+    def search_videos_tag(self, video_tag):
+        """Returns the videos whose tags contain the video_tag, by title.
+
+        Args:
+            video_tag: The video tag to be used in search.
+        """
+        return self._fan_out("search_videos_tag", video_tag)
+
+    def _fan_out(self, method, arg):
+        """Runs a search on every shard and joins the results in order."""
+        # The locks are taken in shard order, so two searches cannot wait
+        # on each other, and each one is released once its shard answered.
+        shards = list(zip(self._locks, self._connections))
+        held = []
+        try:
+            for lock, connection in shards:
+                lock.acquire()
+                held.append(lock)
+                connection.send((method, arg))
+            videos = []
+            for lock, connection in shards:
+                positions = connection.recv()
+                held.pop(0).release()
+                videos.extend(map(self._ordered.__getitem__, positions))
+            return videos
+        finally:
+            for lock in held:
+                lock.release()
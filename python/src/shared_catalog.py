@@ -0,0 +1,317 @@
+"""A shared memory video catalog."""
+
+from .tags import normalize_tag
+from .video import Video
+from bisect import bisect_left
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+import mmap
+import random
+import struct
+
+
+# Layout of a catalog buffer, all integers little-endian u32:
+#   header:   magic, video count, number of tags, then the offsets of the
+#             records, title order, tag table and postings sections
+#   records:  one (id, title, tags) triple of (offset, length) string
+#             references per video, sorted by video_id bytes
+#   titles:   record indexes sorted by display string, i.e. by title
+#   tags:     one (tag offset, tag length, postings offset, postings count)
+#             entry per tag, sorted by tag bytes
+#   postings: record indexes per tag, in title order
+#   strings:  the UTF-8 encoded ids, titles and comma-joined tags
+_MAGIC = b"YTC1"
+_HEADER = struct.Struct("<4s7I")
+_RECORD = struct.Struct("<6I")
+_TAG = struct.Struct("<4I")
+_INDEX = struct.Struct("<I")
+
+# Names of the segments created by SharedCatalog in this process.
+_created = set()
+
+
+def build_catalog(videos):
+    """Lays out videos as a catalog buffer.
+
+    Args:
+        videos: An iterable of Video objects.
+
+    Returns:
+        The catalog as a bytearray.
+    """
+    videos = sorted(videos, key=lambda video: video.video_id.encode())
+    by_title = sorted(range(len(videos)), key=lambda i: videos[i].display)
+    postings = {}
+    for i in by_title:
+        for tag in videos[i].tags:
+            postings.setdefault(tag.encode(), []).append(i)
+    tags = sorted(postings)
+
+    records_off = _HEADER.size
+    titles_off = records_off + _RECORD.size * len(videos)
+    tags_off = titles_off + _INDEX.size * len(videos)
+    postings_off = tags_off + _TAG.size * len(tags)
+    strings_off = postings_off + _INDEX.size * sum(map(len, postings.values()))
+
+    strings = bytearray()
+
+    def add_string(data):
+        offset = strings_off + len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    records = bytearray()
+    for video in videos:
+        records += _RECORD.pack(
+            *add_string(video.video_id.encode()),
+            *add_string(video.title.encode()),
+            *add_string(",".join(video.tags).encode()))
+
+    tag_table = bytearray()
+    posting_lists = bytearray()
+    for tag in tags:
+        tag_table += _TAG.pack(
+            *add_string(tag),
+            postings_off + len(posting_lists), len(postings[tag]))
+        for i in postings[tag]:
+            posting_lists += _INDEX.pack(i)
+
+    if strings_off + len(strings) >= 2 ** 32:
+        raise ValueError("Catalog is too large for 32-bit offsets")
+
+    header = _HEADER.pack(_MAGIC, len(videos), len(tags), records_off,
+                          titles_off, tags_off, postings_off, strings_off)
+    titles = b"".join(_INDEX.pack(i) for i in by_title)
+    return bytearray(header + records + titles + tag_table + posting_lists
+                     + strings)
+
+
+class SharedCatalog:
+    """A class used to publish a catalog in a shared memory segment.
+
+    The process creating the catalog owns the segment and must unlink it
+    once every worker is done with it.
+    """
+
+    def __init__(self, videos, name=None):
+        """Lays the videos out in a new shared memory segment.
+
+        Args:
+            videos: An iterable of Video objects, e.g. from
+                VideoLibrary.get_all_videos().
+            name: Optional name of the segment. A unique name is generated
+                if omitted.
+        """
+        data = build_catalog(videos)
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=True, size=len(data))
+        self._shm.buf[:len(data)] = data
+        _created.add(self._shm.name)
+
+    @property
+    def name(self):
+        """Returns the name workers attach to the segment with."""
+        return self._shm.name
+
+    def close(self):
+        """Closes and unlinks the segment."""
+        _created.discard(self._shm.name)
+        self._shm.close()
+        self._shm.unlink()
+
+
+def write_catalog_file(videos, path):
+    """Writes videos as a catalog file to be mmapped by SharedVideoLibrary.
+
+    Args:
+        videos: An iterable of Video objects.
+        path: The catalog file to write.
+    """
+    with open(path, "wb") as catalog_file:
+        catalog_file.write(build_catalog(videos))
+
+
+class SharedVideoLibrary:
+    """A class used to read a catalog laid out by build_catalog in place.
+
+    It offers the read-only VideoLibrary interface over a shared memory
+    segment or a mmapped catalog file, so every process reads the same
+    pages instead of holding its own copy of the catalog. Video objects are
+    only created for the videos a call returns.
+    """
+
+    def __init__(self, name=None, path=None):
+        """Attaches to a shared memory segment or mmaps a catalog file.
+
+        Args:
+            name: The name of a segment created by SharedCatalog.
+            path: A file written by write_catalog_file.
+        """
+        self._shm = None
+        self._mmap = None
+        if name is not None:
+            self._shm = _attach(name)
+            self._buf = self._shm.buf
+        else:
+            with open(path, "rb") as catalog_file:
+                self._mmap = mmap.mmap(
+                    catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buf = memoryview(self._mmap)
+
+        (magic, self._count, self._num_tags, self._records_off,
+         self._titles_off, self._tags_off, _, _) = _HEADER.unpack_from(
+             self._buf)
+        if magic != _MAGIC:
+            raise ValueError("Not a video catalog")
+
+    def close(self):
+        """Detaches from the catalog without destroying it."""
+        self._buf.release()
+        if self._shm is not None:
+            self._shm.close()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __len__(self):
+        return self._count
+
+    def get_all_videos(self):
+        """Returns all available video information from the video library."""
+        return [self._video(i) for i in range(self._count)]
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The Video object for the requested video_id. None if the video
+            does not exist.
+        """
+        target = video_id.encode()
+        i = bisect_left(_Column(self._count, self._id_bytes), target)
+        if i < self._count and self._id_bytes(i) == target:
+            return self._video(i)
+        return None
+
+    def get_random_video(self):
+        """Returns a random video, None if the library is empty."""
+        if not self._count:
+            return None
+        return self._video(random.randrange(self._count))
+
+    def get_sorted_videos(self, minimum=None, maximum=None):
+        """Returns the videos ordered by title, optionally within a range.
+
+        Args:
+            minimum: The inclusive lower bound on the title. None for no
+                lower bound.
+            maximum: The exclusive upper bound on the title. None for no
+                upper bound.
+        """
+        displays = _Column(self._count, self._display_at)
+        start = 0 if minimum is None else bisect_left(displays, minimum)
+        stop = self._count if maximum is None else bisect_left(displays, maximum)
+        return [self._video(self._title_index(pos))
+                for pos in range(start, stop)]
+
+    def get_videos_with_prefix(self, prefix):
+        """Returns the videos whose titles start with prefix, by title."""
+        return self.get_sorted_videos(prefix, prefix + chr(0x10FFFF))
+
+    def search_videos(self, search_term):
+        """Returns the videos whose titles contain the search_term, by title.
+
+        Args:
+            search_term: The query to be used in search, ignoring case.
+        """
+        search_term = search_term.lower()
+        matches = []
+        for pos in range(self._count):
+            i = self._title_index(pos)
+            if search_term in self._string(i, 1).lower():
+                matches.append(self._video(i))
+        return matches
+
+    def search_videos_tag(self, video_tag):
+        """Returns the videos whose tags contain the video_tag, by title.
+
+        Args:
+            video_tag: The video tag to be used in search.
+        """
+        return [self._video(i) for i in self._postings(video_tag)]
+
+    def get_tag_postings(self, video_tag):
+        """Returns the video_ids of the videos with a tag, by title."""
+        return [self._string(i, 0) for i in self._postings(video_tag)]
+
+    def _postings(self, video_tag):
+        """Returns the record indexes of the videos with a tag, by title."""
+        target = normalize_tag(video_tag).encode()
+        pos = bisect_left(_Column(self._num_tags, self._tag_bytes), target)
+        if pos == self._num_tags or self._tag_bytes(pos) != target:
+            return []
+        _, _, postings_off, num_postings = _TAG.unpack_from(
+            self._buf, self._tags_off + pos * _TAG.size)
+        return [i for (i,) in _INDEX.iter_unpack(self._buf[
+            postings_off:postings_off + num_postings * _INDEX.size])]
+
+    def _record(self, i):
+        return _RECORD.unpack_from(self._buf, self._records_off + i * _RECORD.size)
+
+    def _string(self, i, field):
+        """Decodes field 0 (id), 1 (title) or 2 (tags) of record i."""
+        record = self._record(i)
+        offset, length = record[2 * field], record[2 * field + 1]
+        return bytes(self._buf[offset:offset + length]).decode()
+
+    def _id_bytes(self, i):
+        offset, length = self._record(i)[:2]
+        return bytes(self._buf[offset:offset + length])
+
+    def _tag_bytes(self, pos):
+        offset, length, _, _ = _TAG.unpack_from(
+            self._buf, self._tags_off + pos * _TAG.size)
+        return bytes(self._buf[offset:offset + length])
+
+    def _title_index(self, pos):
+        return _INDEX.unpack_from(self._buf, self._titles_off + pos * _INDEX.size)[0]
+
+    def _display_at(self, pos):
+        return self._video(self._title_index(pos)).display
+
+    def _video(self, i):
+        tags = self._string(i, 2)
+        return Video(self._string(i, 1), self._string(i, 0),
+                     tags.split(",") if tags else [])
+
+
+class _Column:
+    """A read-only sequence computing its items on access, for bisect."""
+
+    def __init__(self, length, getter):
+        self._length = length
+        self._getter = getter
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        return self._getter(i)
+
+
+def _attach(name):
+    """Attaches to an existing segment without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching registers the segment with the resource
+    # tracker, which unlinks it when the attaching process exits. Processes
+    # forked from the owner share its tracker, so the registration is only
+    # dropped when neither this process nor its parent created the segment.
+    shm = shared_memory.SharedMemory(name=name)
+    if shm.name not in _created:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,145 @@
+"""A sorted index class."""
+
+from bisect import bisect_left, bisect_right
+
+
+# Sorts after every character, so prefix + _MAX_CHAR bounds all keys
+# starting with prefix.
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class SortedIndex:
+    """A class used to keep values ordered by key across inserts and deletes.
+
+    Values are held in a list of sorted chunks of at most 2 * load entries,
+    each with the keys stored alongside. Bisecting the chunk maxima and then
+    a single chunk keeps inserts and deletes at O(log n) comparisons plus an
+    O(load) list shift, and ordered iteration from any key at O(log n + k).
+    """
+
+    def __init__(self, values=(), key=None, load=500, presorted=False):
+        """The SortedIndex class is initialized.
+
+        Args:
+            values: The initial values.
+            key: A function returning the sort key of a value. Defaults to
+                the value itself.
+            load: The target number of entries per chunk.
+            presorted: Whether values are already in key order, e.g. merged
+                from other indexes, so they need not be sorted again.
+        """
+        self._key = key if key is not None else _identity
+        self._load = load
+        self._keys = []
+        self._values = []
+        self._maxes = []
+
+        pairs = [(self._key(value), value) for value in values]
+        if not presorted:
+            pairs.sort(key=_first)
+        for start in range(0, len(pairs), load):
+            chunk = pairs[start:start + load]
+            self._keys.append([key for key, _ in chunk])
+            self._values.append([value for _, value in chunk])
+            self._maxes.append(chunk[-1][0])
+        self._len = len(pairs)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for values in self._values:
+            yield from values
+
+    def add(self, value):
+        """Inserts a value at its sorted position."""
+        key = self._key(value)
+        if not self._maxes:
+            self._keys.append([key])
+            self._values.append([value])
+            self._maxes.append(key)
+        else:
+            pos = min(bisect_right(self._maxes, key), len(self._maxes) - 1)
+            keys = self._keys[pos]
+            idx = bisect_right(keys, key)
+            keys.insert(idx, key)
+            self._values[pos].insert(idx, value)
+            self._maxes[pos] = keys[-1]
+            if len(keys) > 2 * self._load:
+                self._split(pos)
+        self._len += 1
+
+    def remove(self, value):
+        """Removes a value. Raises ValueError if it is not in the index."""
+        key = self._key(value)
+        pos = bisect_left(self._maxes, key)
+        # Values with equal keys may be spread over neighbouring chunks.
+        while pos < len(self._maxes):
+            keys = self._keys[pos]
+            idx = bisect_left(keys, key)
+            while idx < len(keys) and keys[idx] == key:
+                if self._values[pos][idx] == value:
+                    self._delete(pos, idx)
+                    return
+                idx += 1
+            if idx < len(keys):
+                break
+            pos += 1
+        raise ValueError(f"{value!r} is not in the index")
+
+    def irange(self, minimum=None, maximum=None):
+        """Yields the values with minimum <= key < maximum, in key order.
+
+        Args:
+            minimum: The inclusive lower bound. None for no lower bound.
+            maximum: The exclusive upper bound. None for no upper bound.
+        """
+        pos = idx = 0
+        if minimum is not None:
+            pos = bisect_left(self._maxes, minimum)
+            if pos == len(self._maxes):
+                return
+            idx = bisect_left(self._keys[pos], minimum)
+
+        while pos < len(self._maxes):
+            if maximum is not None and self._maxes[pos] >= maximum:
+                stop = bisect_left(self._keys[pos], maximum)
+                yield from self._values[pos][idx:stop]
+                return
+            yield from self._values[pos][idx:]
+            pos += 1
+            idx = 0
+
+    def prefix(self, prefix):
+        """Yields the values whose string key starts with prefix, in order."""
+        return self.irange(prefix, prefix + _MAX_CHAR)
+
+    def _split(self, pos):
+        """Splits an overfull chunk in two halves."""
+        keys = self._keys[pos]
+        values = self._values[pos]
+        half = len(keys) // 2
+        self._keys[pos:pos + 1] = [keys[:half], keys[half:]]
+        self._values[pos:pos + 1] = [values[:half], values[half:]]
+        self._maxes[pos:pos + 1] = [keys[half - 1], keys[-1]]
+
+    def _delete(self, pos, idx):
+        """Deletes an entry, dropping its chunk if it becomes empty."""
+        keys = self._keys[pos]
+        del keys[idx]
+        del self._values[pos][idx]
+        if keys:
+            self._maxes[pos] = keys[-1]
+        else:
+            del self._keys[pos]
+            del self._values[pos]
+            del self._maxes[pos]
+        self._len -= 1
+
+
+def _identity(value):
+    return value
+
+
+def _first(pair):
+    return pair[0]
@@ -0,0 +1,60 @@
+"""A synthetic video catalog generator."""
+
+from itertools import accumulate
+import random
+
+
+_WORDS = (
+    "amazing", "funny", "dogs", "cats", "life", "at", "google", "video",
+    "about", "nothing", "another", "cooking", "travel", "guide", "music",
+    "live", "session", "review", "unboxing", "tutorial", "python", "how",
+    "to", "make", "best", "of", "the", "week", "day", "in", "my", "first",
+    "time", "trying", "epic", "fails", "compilation", "relaxing", "rain",
+    "sounds", "morning", "routine", "street", "food", "tour", "city",
+    "mountain", "hike", "ocean", "sunset", "gaming", "speedrun", "news",
+    "update", "science", "explained", "history", "art", "minutes",
+)
+
+
+def tag_name(rank):
+    """Returns the name of the tag with a given popularity rank."""
+    return f"#tag{rank}"
+
+
+def generate_videos(num_videos, num_tags=1000, max_tags=5, seed=0):
+    """Yields (title, video_id, tags) tuples of a synthetic catalog.
+
+    Titles are 2 to 6 random words. Tag popularity follows a Zipf law,
+    as on real video sites: the tag ranked r is picked about 1/r as often as
+    the most popular one, so a few tags are very common and most are rare.
+
+    Args:
+        num_videos: The number of videos to generate.
+        num_tags: The number of distinct tags.
+        max_tags: The maximum number of tags per video.
+        seed: The random seed, so catalogs can be regenerated identically.
+    """
+    rng = random.Random(seed)
+    tags = [tag_name(rank) for rank in range(1, num_tags + 1)]
+    cum_weights = list(accumulate(1 / rank for rank in range(1, num_tags + 1)))
+    for num in range(num_videos):
+        title = " ".join(rng.choices(_WORDS, k=rng.randint(2, 6))).capitalize()
+        video_tags = dict.fromkeys(rng.choices(
+            tags, cum_weights=cum_weights, k=rng.randint(0, max_tags)))
+        yield title, f"video_{num:08d}", list(video_tags)
+
+
+def write_catalog(path, num_videos, num_tags=1000, max_tags=5, seed=0):
+    """Writes a synthetic catalog in the videos.txt format.
+
+    Args:
+        path: The file to write.
+        num_videos: The number of videos to generate.
+        num_tags: The number of distinct tags.
+        max_tags: The maximum number of tags per video.
+        seed: The random seed.
+    """
+    with open(path, "w") as video_file:
+        for title, video_id, tags in generate_videos(
+                num_videos, num_tags, max_tags, seed):
+            video_file.write(f"{title} | {video_id} | {' , '.join(tags)}\n")
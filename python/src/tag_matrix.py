@@ -0,0 +1,137 @@
+"""A sparse video by tag matrix.
+
+This module needs NumPy and SciPy, which the rest of the player does not:
+
+    pip install numpy scipy
+"""
+
+from .tags import normalize_tag
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+    sparse = None
+
+
+class TagMatrix:
+    """A class used to run batch tag queries over a whole catalog.
+
+    Row i of the matrix is the i-th video of the library and column j the
+    j-th tag in sorted order, holding 1 where the video has the tag. Queries
+    are sparse matrix operations rather than loops over Video objects.
+    """
+
+    def __init__(self, video_library):
+        """Builds the matrix from the videos of a library.
+
+        Args:
+            video_library: A VideoLibrary, or any object offering
+                get_all_videos().
+
+        Raises:
+            ImportError: If NumPy or SciPy is not installed.
+        """
+        if sparse is None:
+            raise ImportError("TagMatrix needs numpy and scipy installed")
+
+        videos = video_library.get_all_videos()
+        self._video_ids = [video.video_id for video in videos]
+        self._rows = {video_id: i for i, video_id in enumerate(self._video_ids)}
+        self._tags = sorted({tag for video in videos for tag in video.tags})
+        self._columns = {tag: j for j, tag in enumerate(self._tags)}
+
+        lengths = np.fromiter((len(video.tags) for video in videos),
+                              dtype=np.int64, count=len(videos))
+        columns = np.fromiter(
+            (self._columns[tag] for video in videos for tag in video.tags),
+            dtype=np.int32, count=int(lengths.sum()))
+        indptr = np.zeros(len(videos) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        matrix = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float32), columns, indptr),
+            shape=(len(videos), len(self._tags)))
+        # A tag listed twice on a video still counts once.
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        self._matrix = matrix
+        self._by_tag = matrix.tocsc()
+
+        # Rows scaled to unit length, for cosine similarities.
+        norms = np.sqrt(np.asarray(matrix.getnnz(axis=1), dtype=np.float32))
+        norms[norms == 0] = 1
+        self._normalized = sparse.diags(1 / norms) @ matrix
+
+    @property
+    def tags(self):
+        """Returns the tags, in column order."""
+        return list(self._tags)
+
+    @property
+    def matrix(self):
+        """Returns the video by tag CSR matrix."""
+        return self._matrix
+
+    def match_any(self, tags):
+        """Returns the video_ids of the videos with any of the tags."""
+        columns = self._tag_columns(tags)
+        if not columns:
+            return []
+        return self._ids(self._by_tag[:, columns].getnnz(axis=1) > 0)
+
+    def match_all(self, tags):
+        """Returns the video_ids of the videos with all of the tags."""
+        columns = self._tag_columns(tags)
+        if not columns or len(columns) < len(set(map(normalize_tag, tags))):
+            return []
+        return self._ids(self._by_tag[:, columns].getnnz(axis=1)
+                         == len(columns))
+
+    def cooccurrence(self):
+        """Returns the tag by tag matrix of the number of videos with both
+        tags, in the column order of tags."""
+        return (self._by_tag.T @ self._by_tag).tocsr()
+
+    def cooccurring_tags(self, tag, count=10):
+        """Returns the (tag, videos) pairs of the tags most often found
+        together with a tag, most frequent first."""
+        column = self._columns.get(normalize_tag(tag))
+        if column is None:
+            return []
+        with_tag = self._by_tag[:, [column]]
+        counts = np.asarray((self._by_tag.T @ with_tag).todense()).ravel()
+        counts[column] = 0
+        best = _top_indexes(counts, count)
+        return [(self._tags[j], int(counts[j])) for j in best if counts[j] > 0]
+
+    def similar(self, video_id, count=10):
+        """Returns the (video_id, cosine similarity) pairs of the videos whose
+        tags are the most similar to those of a video, best first."""
+        row = self._rows.get(video_id)
+        if row is None:
+            return []
+        similarities = np.asarray(
+            (self._normalized @ self._normalized[row].T).todense()).ravel()
+        similarities[row] = 0
+        best = _top_indexes(similarities, count)
+        return [(self._video_ids[i], float(similarities[i]))
+                for i in best if similarities[i] > 0]
+
+    def _tag_columns(self, tags):
+        tags = set(map(normalize_tag, tags))
+        return sorted({self._columns[tag] for tag in tags
+                       if tag in self._columns})
+
+    def _ids(self, mask):
+        return [self._video_ids[i] for i in np.flatnonzero(mask)]
+
+
+def _top_indexes(values, count):
+    """Returns the indexes of the count largest values, largest first, ties
+    broken by index."""
+    if count < len(values):
+        candidates = np.argpartition(-values, count - 1)[:count]
+    else:
+        candidates = np.arange(len(values))
+    return sorted(candidates, key=lambda i: (-values[i], i))
@@ -0,0 +1,55 @@
+"""Tag normalization and interning."""
+
+import threading
+
+
+def normalize_tag(tag):
+    """Returns the canonical form of a tag.
+
+    Tags are lower case, without surrounding whitespace, and start with a
+    single "#", so "#Dog", " dog " and "##DOG" are all "#dog".
+
+    Returns:
+        The canonical tag, or "" if the tag is empty.
+    """
+    name = tag.strip().lstrip("#").strip().lower()
+    return f"#{name}" if name else ""
+
+
+class TagTable:
+    """A class used to intern canonical tags into small integer ids.
+
+    Each distinct tag is stored once, and videos hold the ids of their tags,
+    so matching a tag is an integer comparison.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, tag):
+        """Returns the id of a canonical tag, assigning one if it is new."""
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self._ids.get(tag)
+                if tag_id is None:
+                    tag_id = self._ids[tag] = len(self._names)
+                    self._names.append(tag)
+        return tag_id
+
+    def get_id(self, tag):
+        """Returns the id of a tag in any form, None if it was never seen."""
+        return self._ids.get(normalize_tag(tag))
+
+    def names(self, tag_ids):
+        """Returns the canonical tags of a sequence of ids, as a tuple."""
+        return tuple(map(self._names.__getitem__, tag_ids))
+
+
+# The tags of every video loaded in this process.
+TAGS = TagTable()
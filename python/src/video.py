@@ -1,5 +1,8 @@
 """A video class."""
 
+from .tags import TAGS
+from .tags import normalize_tag
+from array import array
 from typing import Sequence
 
 
@@ -11,9 +14,15 @@ class Video:
         self._title = video_title
         self._video_id = video_id
 
-        # Turn the tags into a tuple here so it's unmodifiable,
-        # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
+        # The tags are normalized, deduplicated and stored as an array of
+        # interned tag ids, which is unmodifiable from outside and compact.
+        self._tag_ids = array("I", (
+            TAGS.intern(tag)
+            for tag in dict.fromkeys(map(normalize_tag, video_tags)) if tag))
+
+        # The display string is built on first use and cached, since the
+        # video never changes once constructed.
+        self._display = None
 
     @property
     def title(self) -> str:
@@ -28,4 +37,22 @@ class Video:
     @property
     def tags(self) -> Sequence[str]:
         """Returns the list of tags of a video."""
-        return self._tags
+        return TAGS.names(self._tag_ids)
+
+    @property
+    def tag_ids(self) -> Sequence[int]:
+        """Returns the interned ids of the tags of a video."""
+        return self._tag_ids
+
+    def has_tag(self, tag: str) -> bool:
+        """Returns whether a video has a tag, ignoring case and the "#"."""
+        tag_id = TAGS.get_id(tag)
+        return tag_id is not None and tag_id in self._tag_ids
+
+    @property
+    def display(self) -> str:
+        """Returns the "title (video_id) [tags]" string of a video."""
+        if self._display is None:
+            self._display = (
+                f"{self._title} ({self._video_id}) [{' '.join(self.tags)}]")
+        return self._display
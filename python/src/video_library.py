@@ -1,32 +1,71 @@
 """A video library class."""
 
+from .ingest import CatalogError
+from .ingest import expand_paths
+from .ingest import load_catalogs
+from .ingest import parse_rows
+from .sorted_index import SortedIndex
+from .tags import TAGS
 from .video import Video
+from heapq import merge
+from operator import attrgetter
 from pathlib import Path
-import csv
+import random
 
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+def parse_videos(lines):
+    """Parses "title | video_id | tags" lines into Video objects.
+
+    Malformed lines are skipped; load_catalog reports them.
+
+    Args:
+        lines: An iterable of catalog lines.
+    """
+    rows, _ = parse_rows(lines)
+    for _, title, video_id, tags in rows:
+        yield Video(title, video_id, tags)
 
 
 class VideoLibrary:
     """A class used to represent a Video Library."""
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
+    DEFAULT_PATH = Path(__file__).parent / "videos.txt"
+
+    def __init__(self, path=None, videos=None, num_workers=None,
+                 conflict="first"):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            path: The catalog file to load, or a list of them. Directories
+                and patterns such as "catalog/*.txt" stand for the files
+                they match. Defaults to the videos.txt file next to this
+                module. Rows that cannot be loaded are skipped and listed in
+                load_errors.
+            videos: Video objects to build the library from instead of
+                loading catalog files.
+            num_workers: The number of processes parsing the catalog files.
+                Defaults to the number of CPUs.
+            conflict: What to do with a video_id found in several catalog
+                files: "first" keeps the video of the earliest file, "last"
+                that of the latest one, and "error" raises a ValueError.
+        """
+        if conflict not in ("first", "last", "error"):
+            raise ValueError(f"Unknown conflict policy {conflict!r}")
         self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+        self.load_errors = []
+        # The videos as a list, to pick random ones from. It is rebuilt on
+        # the first pick after a video is removed.
+        self._random_pool = None
+        if videos is not None:
+            for video in videos:
+                self._videos[video.video_id] = video
+            self._build_indexes([_index_videos(self._videos.values())])
+        else:
+            self._load(expand_paths(path or self.DEFAULT_PATH), num_workers,
+                       conflict)
+
+    def __len__(self):
+        return len(self._videos)
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
@@ -43,3 +82,150 @@ class VideoLibrary:
             does not exist.
         """
         return self._videos.get(video_id, None)
+
+    def get_random_video(self):
+        """Returns a random video, None if the library is empty."""
+        if self._random_pool is None:
+            self._random_pool = list(self._videos.values())
+        if not self._random_pool:
+            return None
+        return random.choice(self._random_pool)
+
+    def get_sorted_videos(self, minimum=None, maximum=None):
+        """Returns the videos ordered by title, optionally within a range.
+
+        Args:
+            minimum: The inclusive lower bound on the title. None for no
+                lower bound.
+            maximum: The exclusive upper bound on the title. None for no
+                upper bound.
+        """
+        return list(self._sorted_videos.irange(minimum, maximum))
+
+    def get_videos_with_prefix(self, prefix):
+        """Returns the videos whose titles start with prefix, by title."""
+        return list(self._sorted_videos.prefix(prefix))
+
+    def search_videos(self, search_term):
+        """Returns the videos whose titles contain the search_term, by title.
+
+        Args:
+            search_term: The query to be used in search, ignoring case.
+        """
+        search_term = search_term.lower()
+        return [video for video in self._sorted_videos
+                if search_term in video.title.lower()]
+
+    def search_videos_tag(self, video_tag):
+        """Returns the videos whose tags contain the video_tag, by title.
+
+        Args:
+            video_tag: The video tag to be used in search, ignoring case and
+                the leading "#".
+        """
+        return sorted((self._videos[video_id]
+                       for video_id in self.get_tag_postings(video_tag)),
+                      key=attrgetter("display"))
+
+    def get_tag_postings(self, video_tag):
+        """Returns the video_ids of the videos with a tag, in no particular
+        order. The returned list must not be modified."""
+        return self._tag_postings.get(TAGS.get_id(video_tag), [])
+
+    def add_video(self, video):
+        """Adds a video to the library, replacing any with the same id."""
+        self.remove_video(video.video_id)
+        self._videos[video.video_id] = video
+        self._sorted_videos.add(video)
+        self._index_tags(video)
+        if self._random_pool is not None:
+            self._random_pool.append(video)
+
+    def remove_video(self, video_id):
+        """Removes a video from the library, if it is present."""
+        video = self._videos.pop(video_id, None)
+        if video is not None:
+            self._sorted_videos.remove(video)
+            self._random_pool = None
+            for tag_id in video.tag_ids:
+                postings = self._tag_postings[tag_id]
+                postings.remove(video_id)
+                if not postings:
+                    del self._tag_postings[tag_id]
+
+    def _load(self, paths, num_workers, conflict):
+        """Loads catalog files, indexing each one and merging the indexes."""
+        sources = load_catalogs(paths, num_workers)
+        # The source and line each video_id is kept from.
+        owners = {}
+        errors = []
+        for source, (videos, line_numbers, source_errors) in enumerate(
+                sources):
+            path = paths[source]
+            errors.extend((source, error._replace(path=str(path)))
+                          for error in source_errors)
+            for video, line_number in zip(videos, line_numbers):
+                video_id = video.video_id
+                owner = owners.get(video_id)
+                if owner is None:
+                    owners[video_id] = (source, line_number)
+                    continue
+                owner_path = paths[owner[0]]
+                if conflict == "error":
+                    raise ValueError(
+                        f"Duplicate video_id {video_id} in {owner_path} line "
+                        f"{owner[1]} and {path} line {line_number}")
+                if conflict == "first":
+                    errors.append((source, CatalogError(
+                        line_number,
+                        f"Duplicate video_id {video_id}, kept from "
+                        f"{owner_path} line {owner[1]}", str(path))))
+                else:
+                    errors.append((owner[0], CatalogError(
+                        owner[1],
+                        f"Duplicate video_id {video_id}, replaced from "
+                        f"{path} line {line_number}", str(owner_path))))
+                    owners[video_id] = (source, line_number)
+        errors.sort(key=lambda item: (item[0], item[1].line_number))
+        self.load_errors = [error for _, error in errors]
+
+        indexes = []
+        for source, (videos, _, _) in enumerate(sources):
+            kept = [video for video in videos
+                    if owners[video.video_id][0] == source]
+            for video in kept:
+                self._videos[video.video_id] = video
+            indexes.append(_index_videos(kept))
+        self._build_indexes(indexes)
+
+    def _build_indexes(self, indexes):
+        """Merges the (sorted videos, tag postings) indexes of sources."""
+        # Videos ordered by display string, i.e. by title, for listings and
+        # title range queries.
+        self._sorted_videos = SortedIndex(
+            merge(*(videos for videos, _ in indexes),
+                  key=attrgetter("display")),
+            key=attrgetter("display"), presorted=True)
+        # The video_ids of the videos with each tag, keyed by tag id. Lists
+        # cost a pointer per entry, and videos are rarely removed.
+        self._tag_postings = {}
+        for _, postings in indexes:
+            for tag_id, video_ids in postings.items():
+                merged = self._tag_postings.get(tag_id)
+                if merged is None:
+                    self._tag_postings[tag_id] = video_ids
+                else:
+                    merged.extend(video_ids)
+
+    def _index_tags(self, video):
+        for tag_id in video.tag_ids:
+            self._tag_postings.setdefault(tag_id, []).append(video.video_id)
+
+
+def _index_videos(videos):
+    """Returns the videos sorted by display string and their tag postings."""
+    postings = {}
+    for video in videos:
+        for tag_id in video.tag_ids:
+            postings.setdefault(tag_id, []).append(video.video_id)
+    return sorted(videos, key=attrgetter("display")), postings
@@ -1,184 +1,691 @@
 """A video player class."""
 
+from .flag_log import FlagLog
+from .flag_store import FlagStore
+from .locks import ReadWriteLock
+from .metrics import Metrics
+from .play_queue import PlayQueue
+from .playback import PAUSED
+from .playback import PLAYING
+from .playback import PlaybackSession
+from .recommender import TagRecommender
 from .video_library import VideoLibrary
-from random import randint
-import re
+from .video_playlist import PlaylistRegistry
+from .watch_stats import WatchStats
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import wraps
+from random import choice
+import threading
+import time
+
+
+# Maps the journaled mutation names to the VideoPlayer methods applying them.
+_MUTATIONS = {
+    "create_playlist": "_create_playlist",
+    "delete_playlist": "_delete_playlist",
+    "add_to_playlist": "_add_to_playlist",
+    "add_many_to_playlist": "_add_many_to_playlist",
+    "remove_from_playlist": "_remove_from_playlist",
+    "remove_many_from_playlist": "_remove_many_from_playlist",
+    "clear_playlist": "_clear_playlist",
+    "flag_video": "_flag_video",
+    "allow_video": "_allow_video",
+    "flag_many_videos": "_flag_many_videos",
+    "allow_many_videos": "_allow_many_videos",
+}
+
+# The mutations changing flags. The others change the playlist named by their
+# first argument.
+_FLAG_MUTATIONS = {
+    "flag_video", "allow_video", "flag_many_videos", "allow_many_videos"}
+
+# How many random videos PLAY_RANDOM draws before it lists the unflagged ones.
+_RANDOM_PICKS = 32
+
+
+def _reads_state(method):
+    """Runs a VideoPlayer method holding the state lock for reading."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock.read():
+            result = method(self, *args, **kwargs)
+        self._compact_journal()
+        return result
+    return wrapper
+
+
+def _writes_state(method):
+    """Runs a VideoPlayer method holding the state lock for writing."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock.write():
+            result = method(self, *args, **kwargs)
+        self._compact_journal()
+        return result
+    return wrapper
+
+
+def _uses_playlist(method):
+    """Runs a VideoPlayer method reading or changing the videos of a playlist.
+
+    The state lock is held for reading, and the lock of the playlist named
+    by the first argument is held too if that playlist exists.
+    """
+    @wraps(method)
+    def wrapper(self, playlist_name, *args, **kwargs):
+        with self._state_lock.read():
+            playlist = self._playlists.get(playlist_name)
+            with playlist.lock if playlist is not None else nullcontext():
+                result = method(self, playlist_name, *args, **kwargs)
+        self._compact_journal()
+        return result
+    return wrapper
+
+
+def _timed(method):
+    """Counts and times calls of a VideoPlayer method in its metrics."""
+    labels = (("method", method.__name__),)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.metrics.time("yt_player_calls", labels):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _controls_playback(method):
+    """Runs a VideoPlayer method holding the playback lock.
+
+    The state lock is held for reading as well, since playback checks the
+    flags, and it is always taken before the playback lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock.read(), self._playback_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _format_flag_event(event):
+    """Returns the display string of a FlagEvent."""
+    when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event.timestamp))
+    if event.action == "flag":
+        return f"{when} FLAGGED {event.video_id} (reason: {event.flag_reason})"
+    return f"{when} ALLOWED {event.video_id}"
+
+
+class _Batch:
+    """The journal records and undo state of a batch of player calls."""
+
+    def __init__(self, flag_log_length):
+        self.records = []
+        # The (name, video_ids) of each playlist before the batch changed
+        # it, or None if it did not exist, keyed by lower case name.
+        self.playlists = {}
+        # The flags before the batch changed any, if it did.
+        self.flags = None
+        self.flag_log_length = flag_log_length
+        self.failed = False
 
 
 class VideoPlayer:
-    """A class used to represent a Video Player."""
+    """A class used to represent a Video Player.
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
-        self.is_playing = False
-        self.currently_playing = None
-        self.is_paused = None
+    The player is safe to call from several threads. The library, the flags
+    and the set of playlists are guarded by a read-write state lock, so
+    listings and searches run concurrently while flagging or creating and
+    deleting playlists is exclusive. The videos of each playlist are guarded
+    by that playlist's own lock, and playback by a separate playback lock.
+    Locks are taken in that order: state, playlist, then playback.
+    """
 
-        self.playlist_dict = {}
-        self.flagged_dict = {}
+    def __init__(self, state_dir=None, video_library=None, related_table=None):
+        """The VideoPlayer class is initialized.
 
-        for vid in self._video_library.get_all_videos():
-            self.flagged_dict[vid.video_id] = None
-
-
-    def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
+        Args:
+            state_dir: Optional directory to persist playlists and flags in.
+                When given, the previous state is recovered from it and every
+                playlist or flag mutation is appended to its journal.
+            video_library: The library to play videos from. Defaults to a
+                VideoLibrary loaded from the default catalog file.
+            related_table: An optional neighbor table precomputed by
+                TagRecommender.precompute() to serve RELATED from.
+        """
+        self._state_lock = ReadWriteLock()
+        self._playback_lock = threading.RLock()
+
+        if video_library is None:
+            video_library = VideoLibrary()
+        self._video_library = video_library
+        self._recommender = TagRecommender(video_library, related_table)
+        self._watch_stats = WatchStats()
+        self._playback = PlaybackSession(listener=self._watch_stats.record)
+        self._queue = None
+        # Resolves the next entries of the play queue in the background.
+        self._queue_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="play-queue")
+
+        self._playlists = PlaylistRegistry()
+        self._flags = FlagStore()
+        self._flag_log = FlagLog()
+        # How many flag log events the journal archived. The later ones are
+        # archived by the next compaction.
+        self._flag_events_archived = 0
+
+        self.metrics = Metrics()
+        self.metrics.gauge("yt_library_videos",
+                           lambda: len(self._video_library))
+        self.metrics.gauge("yt_flagged_videos", lambda: len(self._flags))
+        self.metrics.gauge("yt_playlists", lambda: len(self._playlists))
+
+        # The batch run by run_batch, if one is running.
+        self._batch = None
+
+        self._journal = None
+        if state_dir is not None:
+            from .journal import StateJournal
+            self._journal = StateJournal(state_dir)
+            self._recover()
+
+    @property
+    def currently_playing(self):
+        """Returns the video playing or paused, None if stopped."""
+        return self._playback.video
+
+    @property
+    def is_playing(self):
+        """Returns whether a video is playing and not paused."""
+        return self._playback.state == PLAYING
+
+    @property
+    def is_paused(self):
+        """Returns whether a video is paused."""
+        return self._playback.state == PAUSED
+
+    def close(self):
+        """Flushes and closes the state journal, if there is one, and stops
+        the play queue lookups."""
+        if self._queue is not None:
+            self._queue.close()
+        self._queue_executor.shutdown(wait=False)
+        if self._journal is not None:
+            self._journal.close()
+
+    @_writes_state
+    def run_batch(self, calls):
+        """Runs calls of player methods as one transaction.
+
+        The calls run in order under a single acquisition of the state lock,
+        so other threads see the state from before or after the batch, never
+        in between. Once a call is refused, the later ones are skipped and
+        the playlist and flag changes of the earlier ones are undone;
+        playback is not. Nothing is journaled until the batch succeeds.
 
-    def show_all_videos(self):
-        """Returns all videos."""
-        print("Here's a list of all available videos:")
-        videos = self._video_library.get_all_videos()
-        raw_list = []
+        Args:
+            calls: (method_name, args, kwargs) tuples of public methods.
 
-        for vid in videos:
+        Returns:
+            The index of the refused call, None if the batch was committed.
+        """
+        self._batch = batch = _Batch(len(self._flag_log))
+        try:
+            for index, (name, args, kwargs) in enumerate(calls):
+                getattr(self, name)(*args, **kwargs)
+                if batch.failed:
+                    self._undo(batch)
+                    return index
+        except BaseException:
+            self._undo(batch)
+            raise
+        finally:
+            self._batch = None
+        if self._journal is not None:
+            for op, args in batch.records:
+                self._journal.append(op, *args)
+        return None
+
+    def _refuse(self, message):
+        """Prints why a call cannot be done, failing the running batch."""
+        print(message)
+        if self._batch is not None:
+            self._batch.failed = True
+
+    def _undo(self, batch):
+        """Restores the playlists and flags changed by a batch."""
+        for key, saved in batch.playlists.items():
+            if self._playlists.get(key) is not None:
+                self._playlists.delete(key)
+            if saved is not None:
+                self._playlists.create(*saved)
+        if batch.flags is not None:
+            self._flags = FlagStore(batch.flags)
+        self._flag_log.truncate(batch.flag_log_length)
+
+    def _recover(self):
+        """Restores playlists and flags from the snapshot and journal."""
+        state, records = self._journal.load()
+        if state is not None:
+            for name, video_ids in state["playlists"].items():
+                self._playlists.create(name, video_ids)
+            for video_id, flag_reason in state["flags"].items():
+                if self._video_library.get_video(video_id) is not None:
+                    self._flags.flag(video_id, flag_reason)
+            # Snapshots written before the flag log was archived hold all
+            # of its events.
+            archived = self._journal.archived()
+            self._flag_log = FlagLog([*state.get("flag_log", ()), *archived])
+            self._flag_events_archived = len(archived)
+        for op, args in records:
+            getattr(self, _MUTATIONS[op])(*args)
+        # Like flags, playlist entries of videos no longer in the catalog
+        # are dropped. They are kept until the journal is replayed, since
+        # its records may still remove them.
+        for playlist in self._playlists:
+            playlist.remove_all([
+                video_id for video_id in playlist
+                if self._video_library.get_video(video_id) is None])
+
+    def _snapshot(self):
+        """Returns the playlist and flag state as a JSON serializable dict."""
+        return {
+            "playlists": {playlist.name: playlist.video_ids
+                          for playlist in self._playlists},
+            "flags": dict(self._flags.items()),
+        }
+
+    def _write_snapshot(self):
+        """Compacts the journal into a snapshot of the playlists and flags.
+
+        The flag log only grows, so rather than being copied into every
+        snapshot, the events since the last compaction are archived.
+        """
+        events = self._flag_log.tail(self._flag_events_archived)
+        self._journal.compact(self._snapshot(), events)
+        self._flag_events_archived += len(events)
 
-            tags = ""
+    def _apply(self, op, *args):
+        """Applies a playlist or flag mutation and journals it.
 
-            for tag in vid.tags:
-                tags = tags + tag + " "
-            tags = tags[:-1]
+        Args:
+            op: The mutation name, one of the keys of _MUTATIONS.
+            args: The arguments of the mutation.
+        """
+        batch = self._batch
+        if batch is not None:
+            # Save what the mutation changes the first time the batch
+            # changes it, and hold its journal record until the batch ends.
+            if op in _FLAG_MUTATIONS:
+                if batch.flags is None:
+                    batch.flags = list(self._flags.items())
+            elif args[0].lower() not in batch.playlists:
+                playlist = self._playlists.get(args[0])
+                batch.playlists[args[0].lower()] = (
+                    None if playlist is None
+                    else (playlist.name, playlist.video_ids))
+            getattr(self, _MUTATIONS[op])(*args)
+            batch.records.append((op, args))
+            return
+        getattr(self, _MUTATIONS[op])(*args)
+        if self._journal is not None:
+            self._journal.append(op, *args)
 
-            raw_list += [f"{vid.title} ({vid.video_id}) [{tags}]"]
+    def _compact_journal(self):
+        """Compacts the journal into a snapshot once it grows too long.
 
+        The state lock is taken for writing so that no mutation sits between
+        memory and the journal while the snapshot is taken. Compaction is
+        put off if the calling thread still holds the lock for reading, or
+        while a batch runs, since its changes may still be undone.
+        """
+        if (self._journal is None or not self._journal.needs_compaction()
+                or self._state_lock.holds_read() or self._batch is not None):
+            return
+        with self._state_lock.write():
+            if self._journal.needs_compaction() and self._batch is None:
+                self._write_snapshot()
+
+    def _create_playlist(self, name, video_ids=()):
+        self._playlists.create(name, video_ids)
+
+    def _delete_playlist(self, name):
+        self._playlists.delete(name)
+
+    def _add_to_playlist(self, name, video_id):
+        self._playlists.get(name).add(video_id)
+
+    def _add_many_to_playlist(self, name, video_ids):
+        self._playlists.get(name).extend(video_ids)
+
+    def _remove_from_playlist(self, name, video_id):
+        self._playlists.get(name).remove(video_id)
+
+    def _remove_many_from_playlist(self, name, video_ids):
+        self._playlists.get(name).remove_all(video_ids)
+
+    def _clear_playlist(self, name):
+        self._playlists.get(name).clear()
+
+    # Flag mutations take the time they happened at, so that replaying the
+    # journal rebuilds the same flag log. Journals written before the flag
+    # log existed have no times, and their events are logged at replay time.
+    def _flag_video(self, video_id, flag_reason, timestamp=None):
+        self._flag_many_videos([video_id], flag_reason, timestamp)
+
+    def _allow_video(self, video_id, timestamp=None):
+        self._allow_many_videos([video_id], timestamp)
+
+    def _flag_many_videos(self, video_ids, flag_reason, timestamp=None):
+        if timestamp is None:
+            timestamp = self._flag_log.now()
+        # Flags recovered for videos since dropped from the catalog are
+        # ignored.
+        video_ids = [video_id for video_id in video_ids
+                     if self._video_library.get_video(video_id) is not None]
+        self._flags.flag_all(video_ids, flag_reason)
+        for video_id in video_ids:
+            self._flag_log.append(timestamp, video_id, "flag", flag_reason)
+
+    def _allow_many_videos(self, video_ids, timestamp=None):
+        if timestamp is None:
+            timestamp = self._flag_log.now()
+        video_ids = [video_id for video_id in video_ids
+                     if video_id in self._flags]
+        self._flags.allow_all(video_ids)
+        for video_id in video_ids:
+            self._flag_log.append(timestamp, video_id, "allow")
+
+    @_reads_state
+    def number_of_videos(self):
+        num_videos = len(self._video_library)
+        print(f"{num_videos} videos in the library")
 
-        ordered_list = sorted(raw_list)
+    @_reads_state
+    def show_all_videos(self, minimum=None, maximum=None):
+        """Returns all videos, optionally only those within a title range.
 
+        Args:
+            minimum: The inclusive lower bound on the title.
+            maximum: The exclusive upper bound on the title.
+        """
+        print("Here's a list of all available videos:")
 
-        for x in ordered_list:
-            id = re.findall(r"\(([A-Za-z0-9_]+)\)", x)[0]
+        for vid in self._video_library.get_sorted_videos(minimum, maximum):
+            print(self._format_video(vid))
 
-            if self.flagged_dict[id] != None:
-                print(f"{x} - FLAGGED (reason: {self.flagged_dict[id]})")
+    def _format_video(self, video):
+        """Returns the display string of a video, marked if it is flagged.
 
-            else:
-                print(x)
+        Args:
+            video: The Video object to be displayed.
+        """
+        flag_reason = self._flags.get(video.video_id)
+        if flag_reason != None:
+            return f"{video.display} - FLAGGED (reason: {flag_reason})"
+        return video.display
 
+    @_controls_playback
     def play_video(self, video_id):
         """Plays the respective video.
 
         Args:
             video_id: The video_id to be played.
         """
-        if all(values != None for values in self.flagged_dict.values()):
-            print(f"No videos available")
+        if len(self._flags) == len(self._video_library):
+            self._refuse("No videos available")
             return
 
         video = self._video_library.get_video(video_id)
 
         if video == None:
-            print("Cannot play video: Video does not exist")
+            self._refuse("Cannot play video: Video does not exist")
 
-        elif self.flagged_dict[video_id] != None:
-            print(f"Cannot play video: Video is currently flagged (reason: {self.flagged_dict[video_id]})")
+        elif video_id in self._flags:
+            self._refuse(f"Cannot play video: Video is currently flagged (reason: {self._flags.get(video_id)})")
             return
 
-        elif self.is_playing == True or self.is_paused == True:
-            print(f"Stopping video: {self.currently_playing.title}")
-            self.is_playing = False
+        else:
+            self._start(video)
 
-            print(f"Playing video: {video.title}")
-            self.is_playing = True
-            self.is_paused = False
+    def _start(self, video):
+        """Plays a video that was checked to be playable, stopping the
+        current one."""
+        if self._playback.can("stop"):
+            self.stop_video()
+        print(f"Playing video: {video.title}")
+        self._playback.play(video)
 
-        else:
-            print(f"Playing video: {video.title}")
-            self.is_playing = True
-            self.currently_playing = video
-            self.is_paused = False
+    def _playable(self, video_id):
+        """Returns the Video object of a video_id, None if it does not exist
+        or is flagged."""
+        video = self._video_library.get_video(video_id)
+        if video is None or video_id in self._flags:
+            return None
+        return video
 
+    @_controls_playback
     def stop_video(self):
         """Stops the current video."""
-        if self.is_playing == False and self.is_paused != True:
-            print("Cannot stop video: No video is currently playing")
-
-        elif self.is_playing == False and self.is_paused != True:
-            print(f"Stopping video: {self.currently_playing.title} ")
-            self.is_playing = False
-            self.is_paused = False
+        if not self._playback.can("stop"):
+            self._refuse("Cannot stop video: No video is currently playing")
 
         else:
-            print(f"Stopping video: {self.currently_playing.title} ")
-            self.is_playing = False
+            print(f"Stopping video: {self._playback.video.title}")
+            self._playback.stop()
 
+    @_controls_playback
     def play_random_video(self):
         """Plays a random video from the video library."""
 
-        videos = self._video_library.get_all_videos()
-        x = randint(0,len(videos)-1)
-        id_list = []
-
-        for vid in videos:
-            id_list.append(vid._video_id)
+        if len(self._flags) >= len(self._video_library):
+            self._refuse("No videos available")
+            return
 
-        self.play_video(id_list[x])
+        # Random picks land on an unflagged video after n / (n - flagged)
+        # tries on average; the unflagged videos are only listed when
+        # nearly all of them are flagged.
+        for _ in range(_RANDOM_PICKS):
+            video = self._video_library.get_random_video()
+            if video.video_id not in self._flags:
+                break
+        else:
+            video = choice(self._unflagged(self._video_library.get_all_videos()))
+        self.play_video(video.video_id)
 
 
+    @_controls_playback
     def pause_video(self):
-        if self.is_paused == True:
-            print(f"Video already paused: {self.currently_playing.title}")
+        """Pauses the current video."""
+        if self._playback.state == PAUSED:
+            print(f"Video already paused: {self._playback.video.title}")
 
-        elif self.currently_playing == None:
-            print("Cannot pause video: No video is currently playing")
+        elif not self._playback.can("pause"):
+            self._refuse("Cannot pause video: No video is currently playing")
 
         else:
-            self.is_paused = True
-            self.is_playing = False
-
-            print(f"Pausing video: {self.currently_playing.title}")
-
+            print(f"Pausing video: {self._playback.video.title}")
+            self._playback.pause()
 
+    @_controls_playback
     def continue_video(self):
         """Resumes playing the current video."""
+        if self._playback.can("continue"):
+            print(f"Continuing video: {self._playback.video.title}")
+            self._playback.resume()
 
-        if self.is_paused == True:
-            print(f"Continuing video: {self.currently_playing.title}")
-            self.is_paused = False
+        elif self._playback.state == PLAYING:
+            self._refuse("Cannot continue video: Video is not paused")
 
-        elif self.is_playing == True:
-            print("Cannot continue video: Video is not paused")
-
-        elif self.currently_playing == None:
-            print("Cannot continue video: No video is currently playing")
+        else:
+            self._refuse("Cannot continue video: No video is currently playing")
 
+    @_controls_playback
     def show_playing(self):
         """Displays video currently playing."""
-        tags = []
+        video = self._playback.video
+        if video is None:
+            print("No video is currently playing")
 
-        try:
-            for tag in self.currently_playing.tags:
-                tags.append(tag)
+        elif self._playback.state == PAUSED:
+            print(f"Currently playing: {video.display} - PAUSED")
+
+        else:
+            print(f"Currently playing: {video.display}")
 
-            tag_format = str(" ".join(tags))
+    @_controls_playback
+    def show_watch_stats(self, count=5):
+        """Displays the play counts and watch time of the session, with the
+        most played videos and tags.
 
-            if self.is_playing == True and self.is_paused == False:
-                print(f"Currently playing: {self.currently_playing.title} ({self.currently_playing._video_id}) [{tag_format}]")
+        Watch time is counted when a video is paused or stopped.
 
+        Args:
+            count: How many of the top videos and tags to display.
+        """
+        stats = self._watch_stats
+        print(f"Played {stats.plays} videos for {stats.watch_seconds:.1f} "
+              f"seconds")
+        if not stats.plays:
+            return
 
-            elif self.is_paused == True and self.is_playing == False:
-                print(f"Currently playing: {self.currently_playing.title} ({self.currently_playing._video_id}) [{tag_format}] - PAUSED")
+        print("Top videos:")
+        for num, (video_id, plays) in enumerate(stats.top_videos(count), 1):
+            video = self._video_library.get_video(video_id)
+            print(f"  {num}) {video.display if video else video_id} - "
+                  f"{plays:.0f} plays, "
+                  f"{stats.video_watch_seconds(video_id):.1f} seconds")
 
-        except:
-            print("No video is currently playing")
+        top_tags = stats.top_tags(count)
+        if top_tags:
+            print("Top tags:")
+        for num, (tag, plays) in enumerate(top_tags, 1):
+            print(f"  {num}) {tag} - {plays:.0f} plays, "
+                  f"{stats.tag_watch_seconds(tag):.1f} seconds")
+
+    @_controls_playback
+    def show_recently_played(self, limit=10):
+        """Displays the videos last played in this session, most recent first.
+
+        Args:
+            limit: The maximum number of videos to display.
+        """
+        videos = self._playback.recently_played(limit)
+        if not videos:
+            print("No videos played recently")
+            return
+
+        print("Recently played videos:")
+        for video in videos:
+            print(f"  {video.display}")
+
+
+    @_uses_playlist
+    def play_playlist(self, playlist_name):
+        """Queues the videos of a playlist and plays the first one.
+
+        Videos that do not exist or are flagged are skipped. The queue is a
+        copy of the playlist, so later playlist changes do not affect it.
 
+        Args:
+            playlist_name: The playlist name.
+        """
+        playlist = self._playlists.get(playlist_name)
+        if playlist is None:
+            self._refuse(f"Cannot play playlist {playlist_name}: Playlist does not "
+                         f"exist")
+            return
+
+        with self._playback_lock:
+            queue = PlayQueue(playlist.name, playlist, self._playable,
+                              self._queue_executor)
+            video = self._advance(queue.next)
+            if video is None:
+                queue.close()
+                self._refuse(f"Cannot play playlist {playlist_name}: No videos "
+                             f"available")
+                return
+
+            if self._queue is not None:
+                self._queue.close()
+            self._queue = queue
+            print(f"Playing playlist: {playlist_name}")
+            self._start(video)
+
+    @_controls_playback
+    def next_video(self):
+        """Plays the next video of the play queue."""
+        if self._queue is None:
+            self._refuse("Cannot play next video: No playlist is being played")
+            return
+
+        video = self._advance(self._queue.next)
+        if video is None:
+            self._refuse("Cannot play next video: Reached the end of the playlist")
+        else:
+            self._start(video)
+
+    @_controls_playback
+    def previous_video(self):
+        """Plays the previous video of the play queue."""
+        if self._queue is None:
+            self._refuse("Cannot play previous video: No playlist is being played")
+            return
+
+        video = self._advance(self._queue.previous)
+        if video is None:
+            self._refuse("Cannot play previous video: Reached the start of the "
+                         "playlist")
+        else:
+            self._start(video)
 
+    def _advance(self, move):
+        """Moves through the play queue to a video that is still unflagged.
 
+        Args:
+            move: The next or previous method of the queue. Videos flagged
+                since the queue resolved them are skipped.
+        """
+        video = move()
+        while video is not None and video.video_id in self._flags:
+            video = move()
+        return video
+
+    @_controls_playback
+    def show_queue(self, limit=5):
+        """Displays the position in the play queue and the next videos.
+
+        Args:
+            limit: The maximum number of next videos to display.
+        """
+        if self._queue is None:
+            print("No playlist is being played")
+            return
+
+        queue = self._queue
+        print(f"Playing playlist: {queue.name} (video {queue.position + 1} "
+              f"of {len(queue)})")
+        upcoming = queue.upcoming(limit)
+        if not upcoming:
+            print("  No more videos")
+        for video in upcoming:
+            print(f"  {video.display}")
+
+    @_writes_state
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        playlist = playlist_name.lower()
-
-        if playlist in self.playlist_dict:
-            print("Cannot create playlist: A playlist with the same name already "
-            "exists")
+        if playlist_name in self._playlists:
+            self._refuse("Cannot create playlist: A playlist with the same name already "
+                         "exists")
 
         else:
-            self.playlist_dict[playlist_name] = []
+            self._apply("create_playlist", playlist_name)
             print(f"Successfully created new playlist: {playlist_name}")
 
+    @_uses_playlist
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
 
@@ -186,89 +693,139 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be added.
         """
+        playlist = self._playlists.get(playlist_name)
         video = self._video_library.get_video(video_id)
-        name = playlist_name.lower()
-        playlist_name_lower_dict = {k.lower(): v for (k, v) in self.playlist_dict.items()}
 
-        try:
-            if self.flagged_dict[video_id] != None:
-                print(
-                    f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {self.flagged_dict[video_id]})")
-                return
+        if playlist is None:
+            self._refuse(f"Cannot add video to {playlist_name}: Playlist does not exist")
 
-            elif video_id in playlist_name_lower_dict[name]:
-               print(f"Cannot add video to {playlist_name}: Video already added")
+        elif video is None:
+            self._refuse(f"Cannot add video to {playlist_name}: Video does not exist")
 
-            elif name in playlist_name_lower_dict.keys():
-                    playlist_name_lower_dict[name].append(video_id)
-                    print(f"Added video to {playlist_name}: {video.title}")
+        elif video_id in self._flags:
+            self._refuse(
+                f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {self._flags.get(video_id)})")
 
+        elif video_id in playlist:
+            self._refuse(f"Cannot add video to {playlist_name}: Video already added")
 
+        else:
+            self._apply("add_to_playlist", playlist.name, video_id)
+            print(f"Added video to {playlist_name}: {video.title}")
 
-        except:
-            if name in playlist_name_lower_dict.keys():
-                print(f"Cannot add video to {playlist_name}: Video does not exist")
+    @_uses_playlist
+    def add_many_to_playlist(self, playlist_name, selectors):
+        """Adds many videos to a playlist with a given name in one step.
 
-            else:
-                print(f"Cannot add video to {playlist_name}: Playlist does not exist")
+        The batch is validated as a whole before anything is added, so either
+        all of the videos are added or none of them are.
 
+        Args:
+            playlist_name: The playlist name.
+            selectors: The videos to be added. Each one is either a video_id,
+                "tag:<video_tag>", "search:<search_term>" or "title:<pattern>".
+                Videos matched by a selector other than a video_id are
+                skipped if they are flagged.
+        """
+        playlist = self._playlists.get(playlist_name)
+        if playlist is None:
+            self._refuse(f"Cannot add videos to {playlist_name}: Playlist does not exist")
+            return
 
+        video_ids, missing = self._select_videos(selectors)
+        flagged = [video_id for video_id in video_ids
+                   if video_id in self._flags]
 
+        if missing:
+            self._refuse(f"Cannot add videos to {playlist_name}: Videos do not exist: "
+                         f"{', '.join(missing)}")
 
+        elif flagged:
+            self._refuse(f"Cannot add videos to {playlist_name}: Videos are currently "
+                         f"flagged: {', '.join(flagged)}")
 
-    def show_all_playlists(self):
-        """Display all playlists."""
+        else:
+            new_ids = [video_id for video_id in video_ids
+                       if video_id not in playlist]
+            if new_ids:
+                self._apply("add_many_to_playlist", playlist.name, new_ids)
+            skipped = len(video_ids) - len(new_ids)
+            print(f"Added {len(new_ids)} videos to {playlist_name}"
+                  + (f" ({skipped} already added)" if skipped else ""))
+
+    @_reads_state
+    def show_all_playlists(self, prefix=None):
+        """Display all playlists, optionally only those starting with prefix.
 
-        playlists = self.playlist_dict.keys()
+        Args:
+            prefix: The prefix the playlist names should start with.
+        """
+        playlists = self._playlists.get_sorted_playlists(prefix)
 
-        if len(playlists) == 0:
+        if len(self._playlists) == 0:
             print("No playlists exist yet")
 
+        elif len(playlists) == 0:
+            print(f"No playlists start with {prefix}")
+
         else:
             print("Showing all playlists:")
 
-            for playlist in sorted(playlists):
-                print(playlist)
+            for playlist in playlists:
+                print(playlist.name)
 
-    def show_playlist(self, playlist_name):
+    @_uses_playlist
+    def show_playlist(self, playlist_name, page=None, page_size=20):
         """Display all videos in a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
+            page: Optional 1-based page number. If given, only the page_size
+                videos of that page are displayed.
+            page_size: The number of videos per page.
         """
-        try:
-            name = playlist_name.lower()
-            playlist_name_lower_dict = {k.lower(): v for (k, v) in self.playlist_dict.items()}
-            playlist_name_lower_dict[name]
-
-            print(f"Showing playlist: {playlist_name}")
-
-            if len(playlist_name_lower_dict[name]) == 0 :
-                print("No videos here yet")
+        playlist = self._playlists.get(playlist_name)
 
-            else:
-                id_list = playlist_name_lower_dict[name]
-                for id in id_list:
-                    vid_info = self._video_library.get_video(id)
-
-                    tags = []
+        if playlist is None:
+            self._refuse(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+            return
 
-                    for tag in vid_info.tags:
-                        tags.append(tag)
+        if len(playlist) == 0 :
+            print(f"Showing playlist: {playlist_name}")
+            print("No videos here yet")
 
-                    tag_format = str(" ".join(tags))
+        elif page is None:
+            print(f"Showing playlist: {playlist_name}")
+            for line in self._render_playlist(playlist):
+                print(line)
 
-                    if self.flagged_dict[id] != None:
-                        print(f"{vid_info.title} ({vid_info._video_id}) [{tag_format}] - FLAGGED (reason: {self.flagged_dict[id]})")
-                        return
+        else:
+            num_pages = -(-len(playlist) // page_size)
+            if not 1 <= page <= num_pages:
+                self._refuse(f"Cannot show playlist {playlist_name}: Page {page} does "
+                             f"not exist")
+                return
 
-                    print(f"{vid_info.title} ({vid_info._video_id}) [{tag_format}]")
+            print(f"Showing playlist: {playlist_name} (page {page} of {num_pages})")
+            start = (page - 1) * page_size
+            for line in self._render_playlist(playlist, start, start + page_size):
+                print(line)
 
-        except:
-            print(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+    def _render_playlist(self, playlist, start=0, stop=None):
+        """Lazily yields the display strings of the videos in a playlist.
 
+        Only the videos between start and stop are looked up and rendered.
 
+        Args:
+            playlist: The Playlist object.
+            start: The index of the first video to render.
+            stop: The index after the last video to render. None renders up
+                to the end of the playlist.
+        """
+        for video_id in playlist.slice(start, stop):
+            yield self._format_video(self._video_library.get_video(video_id))
 
+    @_uses_playlist
     def remove_from_playlist(self, playlist_name, video_id):
         """Removes a video to a playlist with a given name.
 
@@ -276,78 +833,235 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be removed.
         """
-        name = playlist_name.lower()
-        playlist_name_lower_dict = {k.lower(): v for (k, v) in self.playlist_dict.items()}
+        playlist = self._playlists.get(playlist_name)
+        video = self._video_library.get_video(video_id)
 
-        try:
-            if not video_id in playlist_name_lower_dict[name] and self._video_library.get_video(video_id)!= None:
-                print(f"Cannot remove video from {playlist_name}: Video is not in playlist")
+        if playlist is None:
+            self._refuse(f"Cannot remove video from {playlist_name}: Playlist does not exist")
 
-            elif self._video_library.get_video(video_id) == None:
-                print(f"Cannot remove video from {playlist_name}: Video does not exist")
+        elif video is None:
+            self._refuse(f"Cannot remove video from {playlist_name}: Video does not exist")
 
-            elif name in playlist_name_lower_dict.keys():
-                info = self._video_library.get_video(video_id)
+        elif video_id not in playlist:
+            self._refuse(f"Cannot remove video from {playlist_name}: Video is not in playlist")
 
-                playlist_name_lower_dict[name].remove(video_id)
-                print(f"Removed video from {playlist_name}: {info.title}")
+        else:
+            self._apply("remove_from_playlist", playlist.name, video_id)
+            print(f"Removed video from {playlist_name}: {video.title}")
 
-        except:
-            print(f"Cannot remove video from {playlist_name}: Playlist does not exist")
+    @_uses_playlist
+    def remove_many_from_playlist(self, playlist_name, selectors):
+        """Removes many videos from a playlist with a given name in one step.
 
+        The batch is validated as a whole before anything is removed, so
+        either all of the videos are removed or none of them are.
 
+        Args:
+            playlist_name: The playlist name.
+            selectors: The videos to be removed. Each one is either a video_id,
+                "tag:<video_tag>", "search:<search_term>" or "title:<pattern>".
+                Videos matched by a selector other than a video_id are
+                skipped if they are not in the playlist.
+        """
+        playlist = self._playlists.get(playlist_name)
+        if playlist is None:
+            self._refuse(f"Cannot remove videos from {playlist_name}: Playlist does not "
+                         f"exist")
+            return
+
+        video_ids, missing = self._select_videos(selectors, playlist)
+        not_in_playlist = [video_id for video_id in video_ids
+                           if video_id not in playlist]
+
+        if missing:
+            self._refuse(f"Cannot remove videos from {playlist_name}: Videos do not "
+                         f"exist: {', '.join(missing)}")
+
+        elif not_in_playlist:
+            self._refuse(f"Cannot remove videos from {playlist_name}: Videos are not in "
+                         f"playlist: {', '.join(not_in_playlist)}")
+
+        else:
+            if video_ids:
+                self._apply("remove_many_from_playlist", playlist.name, video_ids)
+            print(f"Removed {len(video_ids)} videos from {playlist_name}")
+
+    @_uses_playlist
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        name = playlist_name.lower()
-        playlist_name_lower_dict = {k.lower(): v for (k, v) in self.playlist_dict.items()}
-
-        try:
-            playlist_name_lower_dict[name]
-            if name in playlist_name_lower_dict.keys():
-                playlist_name_lower_dict[name].clear()
-                print(f"Successfully removed all videos from {playlist_name}")
-
-        except:
-            print(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+        playlist = self._playlists.get(playlist_name)
 
+        if playlist is None:
+            self._refuse(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
 
+        else:
+            self._apply("clear_playlist", playlist.name)
+            print(f"Successfully removed all videos from {playlist_name}")
 
+    @_writes_state
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        name = playlist_name.lower()
-        playlist_name_lower_dict = {k.lower(): v for (k, v) in self.playlist_dict.items()}
+        playlist = self._playlists.get(playlist_name)
 
-        try:
-            del self.playlist_dict[playlist_name]
+        if playlist is None:
+            self._refuse(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+
+        else:
+            self._apply("delete_playlist", playlist.name)
             print(f"Deleted playlist: {playlist_name}")
-        except:
-            print(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
 
+    @_writes_state
+    def combine_playlists(self, operation, playlist_name, operands):
+        """Creates a playlist from a set operation over other playlists.
 
+        Args:
+            operation: One of "union", "intersection" or "difference".
+            playlist_name: The name of the playlist to be created.
+            operands: Playlist names, "tag:<video_tag>",
+                "search:<search_term>" or "title:<pattern>" selectors.
+                Selectors stand for the unflagged videos they match.
+        """
+        if playlist_name in self._playlists:
+            self._refuse("Cannot create playlist: A playlist with the same name already "
+                         "exists")
+            return
 
-    def search_videos(self, search_term):
-        """Display all the videos whose titles contain the search_term.
+        resolved = []
+        for operand in operands:
+            if operand.startswith(("tag:", "search:", "title:")):
+                resolved.append(self._select_videos([operand])[0])
+            elif operand in self._playlists:
+                resolved.append(operand)
+            else:
+                self._refuse(f"Cannot create playlist: Playlist {operand} does not "
+                             f"exist")
+                return
+
+        video_ids = getattr(self._playlists, operation)(resolved)
+        self._apply("create_playlist", playlist_name, video_ids)
+        print(f"Successfully created new playlist: {playlist_name} "
+              f"({len(video_ids)} videos)")
+
+    def _select_videos(self, selectors, playlist=None, include_flagged=False):
+        """Resolves video selectors into a list of video_ids.
+
+        Args:
+            selectors: A sequence of video_ids, "tag:<video_tag>",
+                "search:<search_term>" and "title:<pattern>" selectors. A
+                title pattern is matched against whole titles, ignoring
+                case, with the * ? and [] wildcards of fnmatch.
+            playlist: If given, tag, search and title selectors only match
+                videos in this playlist. Otherwise they only match unflagged
+                videos, unless include_flagged is set.
+            include_flagged: Whether tag, search and title selectors match
+                flagged videos when no playlist is given.
+
+        Returns:
+            A (video_ids, missing) tuple. video_ids holds the distinct selected
+            video_ids in selector order, missing the video_ids that are not in
+            the library.
+        """
+        video_ids = {}
+        missing = []
+        for selector in selectors:
+            if selector.startswith(("tag:", "search:", "title:")):
+                kind, _, query = selector.partition(":")
+                if kind == "tag":
+                    matches = self._search_tag(query, include_flagged=True)
+                elif kind == "search":
+                    matches = self._search(query, include_flagged=True)
+                else:
+                    from fnmatch import fnmatchcase
+                    query = query.lower()
+                    matches = [
+                        video for video in self._video_library.get_sorted_videos()
+                        if fnmatchcase(video.title.lower(), query)]
+                for video in matches:
+                    if playlist is not None:
+                        if video.video_id not in playlist:
+                            continue
+                    elif not include_flagged and video.video_id in self._flags:
+                        continue
+                    video_ids[video.video_id] = None
+            elif self._video_library.get_video(selector) is None:
+                missing.append(selector)
+            else:
+                video_ids[selector] = None
+        return list(video_ids), missing
+
+    def _search(self, search_term, include_flagged=False):
+        """Returns the videos whose titles contain the search_term, by title.
 
         Args:
             search_term: The query to be used in search.
+            include_flagged: Whether flagged videos are returned as well.
         """
-        videos = self._video_library.get_all_videos()
-        searched = []
-        num = 1
+        return self._unflagged(self._video_library.search_videos(search_term),
+                               include_flagged)
+
+    def _search_tag(self, video_tag, include_flagged=False):
+        """Returns the videos whose tags contain the video_tag, by title.
+
+        Args:
+            video_tag: The video tag to be used in search.
+            include_flagged: Whether flagged videos are returned as well.
+        """
+        return self._unflagged(self._video_library.search_videos_tag(video_tag),
+                               include_flagged)
+
+    def _unflagged(self, videos, include_flagged=False):
+        """Returns the videos that are not flagged.
+
+        The videos are returned as they are if nothing is flagged.
+
+        Args:
+            videos: A list of Video objects.
+            include_flagged: Whether flagged videos are kept as well.
+        """
+        if include_flagged or not self._flags:
+            return videos
+        return [vid for vid in videos if vid.video_id not in self._flags]
 
+    @_reads_state
+    def show_related_videos(self, video_id, count=5):
+        """Displays the unflagged videos sharing the most tags with a video.
 
-        for vid in videos:
-            if search_term.lower() in vid.title.lower() and self.flagged_dict[vid.video_id] == None    :
-                searched.append(vid)
+        Args:
+            video_id: The video_id to find related videos of.
+            count: The maximum number of videos to display.
+        """
+        video = self._video_library.get_video(video_id)
+        if video is None:
+            self._refuse("Cannot show related videos: Video does not exist")
+            return
+
+        related = self._recommender.related(video_id, count,
+                                            exclude=self._flags)
+        if not related:
+            print(f"No related videos for {video.title}")
+            return
 
+        print(f"Videos related to {video.title}:")
+        for num, (other, _) in enumerate(related, 1):
+            print(f"  {num}) {self._video_library.get_video(other).display}")
+
+    def search_videos(self, search_term):
+        """Display all the videos whose titles contain the search_term.
+
+        Args:
+            search_term: The query to be used in search.
+        """
+        with self._state_lock.read():
+            searched = self._search(search_term)
+        num = 1
 
         if len(searched) == 0:
             print(f"No search results for {search_term}")
@@ -357,14 +1071,7 @@ class VideoPlayer:
             print(f"Here are the results for {search_term}:")
 
             for vid in searched:
-                tags = []
-
-                for tag in vid.tags:
-                    tags.append(tag)
-
-                tag_format = str(" ".join(tags))
-
-                print(f"{num}) {vid.title} ({vid.video_id}) [{tag_format}]")
+                print(f"{num}) {vid.display}")
                 num +=1
 
             print("Would you like to play any of the above? If yes, "
@@ -389,14 +1096,10 @@ class VideoPlayer:
         Args:
             video_tag: The video tag to be used in search.
         """
-        videos = self._video_library.get_all_videos()
-        searched = []
+        with self._state_lock.read():
+            searched = self._search_tag(video_tag)
         num = 1
 
-        for vid in videos:
-            if video_tag in vid.tags and self.flagged_dict[vid.video_id] == None:
-                searched.append(vid)
-
         if len(searched) == 0:
             print(f"No search results for {video_tag}")
             return
@@ -405,14 +1108,7 @@ class VideoPlayer:
             print(f"Here are the results for {video_tag}:")
 
             for vid in searched:
-                tags = []
-
-                for tag in vid.tags:
-                    tags.append(tag)
-
-                tag_format = str(" ".join(tags))
-
-                print(f"{num}) {vid.title} ({vid.video_id}) [{tag_format}]")
+                print(f"{num}) {vid.display}")
                 num += 1
 
             print("Would you like to play any of the above? If yes, "
@@ -433,6 +1129,7 @@ class VideoPlayer:
 
 
 
+    @_writes_state
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
 
@@ -440,47 +1137,152 @@ class VideoPlayer:
             video_id: The video_id to be flagged.
             flag_reason: Reason for flagging the video.
         """
+        video = self._video_library.get_video(video_id)
 
         if flag_reason == "":
             flag_reason = "Not supplied"
-            self.flagged_dict[video_id] = flag_reason
-            print(f"Successfully flagged video: {self._video_library.get_video(video_id).title} (reason: {flag_reason})")
-
-
-        elif video_id not in self.flagged_dict.keys():
-            print("Cannot flag video: Video does not exist")
-
-        elif self.flagged_dict[video_id] == flag_reason:
-            print("Cannot flag video: Video is already flagged")
 
-        elif self.currently_playing == self._video_library.get_video(video_id) or (self.is_paused == True and self.currently_playing == self._video_library.get_video(video_id)):
-            self.flagged_dict[video_id] = flag_reason
-            self.stop_video()
-            self.currently_playing = None
-            print(f"Successfully flagged video: {self._video_library.get_video(video_id).title} (reason: {flag_reason})")
+        if video is None:
+            self._refuse("Cannot flag video: Video does not exist")
 
+        elif video_id in self._flags:
+            self._refuse("Cannot flag video: Video is already flagged")
 
         else:
-            self.flagged_dict[video_id] = flag_reason
-            print(f"Successfully flagged video: {self._video_library.get_video(video_id).title} (reason: {flag_reason})")
+            if (self.currently_playing is not None
+                    and self.currently_playing.video_id == video_id):
+                self.stop_video()
+
+            self._apply("flag_video", video_id, flag_reason,
+                        self._flag_log.now())
+            print(f"Successfully flagged video: {video.title} (reason: {flag_reason})")
 
+    @_writes_state
     def allow_video(self, video_id):
         """Removes a flag from a video.
 
         Args:
             video_id: The video_id to be allowed again.
         """
+        video = self._video_library.get_video(video_id)
+
+        if video is None:
+            self._refuse("Cannot remove flag from video: Video does not exist")
+
+        elif video_id not in self._flags:
+            self._refuse("Cannot remove flag from video: Video is not flagged")
+
+        else:
+            self._apply("allow_video", video_id, self._flag_log.now())
+            print(f"Successfully removed flag from video: {video.title}")
+
+    @_writes_state
+    def flag_many_videos(self, selectors, flag_reason=""):
+        """Flags many videos in one step.
+
+        The batch is validated as a whole before anything is flagged, and is
+        then flagged and journaled at once. The current video is stopped if
+        it is part of the batch.
+
+        Args:
+            selectors: The videos to be flagged. Each one is either a
+                video_id, "tag:<video_tag>", "search:<search_term>" or
+                "title:<pattern>".
+            flag_reason: Reason for flagging the videos.
+        """
+        if flag_reason == "":
+            flag_reason = "Not supplied"
+
+        video_ids, missing = self._select_videos(selectors)
+
+        if missing:
+            self._refuse(f"Cannot flag videos: Videos do not exist: "
+                         f"{', '.join(missing)}")
+            return
+
+        new_ids = [video_id for video_id in video_ids
+                   if video_id not in self._flags]
+        if new_ids:
+            if (self.currently_playing is not None
+                    and self.currently_playing.video_id in set(new_ids)):
+                self.stop_video()
+            self._apply("flag_many_videos", new_ids, flag_reason,
+                        self._flag_log.now())
+        skipped = len(video_ids) - len(new_ids)
+        print(f"Successfully flagged {len(new_ids)} videos (reason: "
+              f"{flag_reason})"
+              + (f" ({skipped} already flagged)" if skipped else ""))
+
+    @_writes_state
+    def allow_many_videos(self, selectors):
+        """Removes the flags of many videos in one step.
+
+        Args:
+            selectors: The videos to be allowed again, as in
+                flag_many_videos. Tag, search and title selectors match the
+                flagged videos.
+        """
+        video_ids, missing = self._select_videos(selectors, include_flagged=True)
+
+        if missing:
+            self._refuse(f"Cannot remove flags from videos: Videos do not exist: "
+                         f"{', '.join(missing)}")
+            return
+
+        flagged_ids = [video_id for video_id in video_ids
+                       if video_id in self._flags]
+        if flagged_ids:
+            self._apply("allow_many_videos", flagged_ids, self._flag_log.now())
+        skipped = len(video_ids) - len(flagged_ids)
+        print(f"Successfully removed flags from {len(flagged_ids)} videos"
+              + (f" ({skipped} not flagged)" if skipped else ""))
+
+
+    @_reads_state
+    def show_flag_history(self, video_id):
+        """Displays every flag and allow event of a video, oldest first.
+
+        Args:
+            video_id: The video_id whose history is shown.
+        """
+        video = self._video_library.get_video(video_id)
+        if video is None:
+            self._refuse("Cannot show flag history: Video does not exist")
+            return
+
+        events = self._flag_log.history(video_id)
+        if not events:
+            print(f"No flag history for {video.title}")
+            return
+
+        print(f"Flag history for {video.title}:")
+        for event in events:
+            print(f"  {_format_flag_event(event)}")
+
+    @_reads_state
+    def show_flag_log(self, seconds=None):
+        """Displays the flag and allow events, oldest first.
+
+        Args:
+            seconds: If given, only the events of the last seconds are shown.
+        """
+        if seconds is None:
+            events = list(self._flag_log)
+            period = ""
+        else:
+            events = self._flag_log.recent(seconds)
+            period = f" in the last {seconds:g} seconds"
 
-        if video_id not in self.flagged_dict.keys():
-            print("Cannot remove flag from video: Video does not exist")
+        if not events:
+            print(f"No flag events{period}")
             return
 
-        elif self.flagged_dict[video_id] != None:
-            self.flagged_dict[video_id] = None
-            print(f"Successfully removed flag from video: {self._video_library.get_video(video_id).title}")
+        print(f"Flag events{period}:")
+        for event in events:
+            print(f"  {_format_flag_event(event)}")
 
-        elif self.flagged_dict[video_id] == None:
-            print("Cannot remove flag from video: Video is not flagged")
 
-        elif video_id not in self.flagged_dict.keys():
-            print("Cannot flag video: Video does not exist")
\ No newline at end of file
+# Every public VideoPlayer method is counted and timed in the metrics.
+for _name, _method in list(vars(VideoPlayer).items()):
+    if callable(_method) and not _name.startswith("_") and _name != "close":
+        setattr(VideoPlayer, _name, _timed(_method))
@@ -1,5 +1,231 @@
 """A video playlist class."""
 
+from .sorted_index import SortedIndex
+from operator import attrgetter
+import threading
+
+
+# Marks the place of a removed video in the list of a playlist until the
+# list is compacted.
+_REMOVED = object()
+
 
 class Playlist:
     """A class used to represent a Playlist."""
+
+    def __init__(self, name, video_ids=()):
+        """Playlist constructor.
+
+        Args:
+            name: The playlist name, as it was given when it was created.
+            video_ids: The initial video_ids of the playlist.
+        """
+        self._name = name
+
+        # The video ids in insertion order, and the position of each one in
+        # the list, so membership checks, appends and removals are O(1).
+        # Removed videos leave holes until the list is compacted; a page is
+        # then sliced out of the list without walking the videos before it.
+        self._video_ids = []
+        self._positions = {}
+        self.extend(video_ids)
+
+        # Guards the videos of the playlist when it is shared across threads.
+        self.lock = threading.RLock()
+
+    @property
+    def name(self):
+        """Returns the name of a playlist."""
+        return self._name
+
+    @property
+    def video_ids(self):
+        """Returns the list of video_ids of a playlist, in insertion order."""
+        return list(self)
+
+    def __contains__(self, video_id):
+        return video_id in self._positions
+
+    def __iter__(self):
+        return (video_id for video_id in self._video_ids
+                if video_id is not _REMOVED)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, video_id):
+        """Appends a video to the end of the playlist."""
+        if video_id not in self._positions:
+            self._positions[video_id] = len(self._video_ids)
+            self._video_ids.append(video_id)
+
+    def extend(self, video_ids):
+        """Appends several videos to the end of the playlist."""
+        for video_id in video_ids:
+            self.add(video_id)
+
+    def remove(self, video_id):
+        """Removes a video from the playlist."""
+        self._video_ids[self._positions.pop(video_id)] = _REMOVED
+        self._compact_if_sparse()
+
+    def remove_all(self, video_ids):
+        """Removes several videos from the playlist."""
+        for video_id in video_ids:
+            position = self._positions.pop(video_id, None)
+            if position is not None:
+                self._video_ids[position] = _REMOVED
+        self._compact_if_sparse()
+
+    def clear(self):
+        """Removes all videos from the playlist."""
+        self._video_ids.clear()
+        self._positions.clear()
+
+    def slice(self, start=0, stop=None):
+        """Returns the video_ids between two positions, in insertion order.
+
+        Args:
+            start: The position of the first video.
+            stop: The position after the last video. None for the end of
+                the playlist.
+        """
+        with self.lock:
+            if len(self._video_ids) != len(self._positions):
+                self._compact()
+            return self._video_ids[start:stop]
+
+    def _compact_if_sparse(self):
+        """Compacts the list once most of it is holes, so removals stay
+        O(1) amortized and the list no larger than twice the playlist."""
+        if len(self._video_ids) > 2 * len(self._positions):
+            self._compact()
+
+    def _compact(self):
+        """Drops the holes left by removed videos from the list."""
+        self._video_ids = list(self)
+        self._positions = {video_id: position for position, video_id
+                           in enumerate(self._video_ids)}
+
+
+class PlaylistRegistry:
+    """A class used to hold all playlists, keyed case-insensitively.
+
+    The registry itself is not synchronized: callers creating or deleting
+    playlists concurrently must serialize those calls.
+    """
+
+    def __init__(self):
+        self._playlists = {}
+        self._sorted_playlists = SortedIndex(key=attrgetter("name"))
+        # The same playlists by lower case name, for prefix queries that
+        # ignore case like every other lookup.
+        self._folded_playlists = SortedIndex(key=_folded_name)
+
+    def __contains__(self, playlist_name):
+        return playlist_name.lower() in self._playlists
+
+    def __iter__(self):
+        return iter(self._playlists.values())
+
+    def __len__(self):
+        return len(self._playlists)
+
+    def get(self, playlist_name):
+        """Returns the playlist with a given name, ignoring case.
+
+        Args:
+            playlist_name: The playlist name.
+
+        Returns:
+            The Playlist object. None if the playlist does not exist.
+        """
+        return self._playlists.get(playlist_name.lower())
+
+    def create(self, playlist_name, video_ids=()):
+        """Creates and returns a new playlist.
+
+        Args:
+            playlist_name: The playlist name.
+            video_ids: The initial video_ids of the playlist.
+        """
+        playlist = Playlist(playlist_name, video_ids)
+        self._playlists[playlist_name.lower()] = playlist
+        self._sorted_playlists.add(playlist)
+        self._folded_playlists.add(playlist)
+        return playlist
+
+    def delete(self, playlist_name):
+        """Deletes the playlist with a given name, ignoring case."""
+        playlist = self._playlists.pop(playlist_name.lower())
+        self._sorted_playlists.remove(playlist)
+        self._folded_playlists.remove(playlist)
+
+    def get_sorted_playlists(self, prefix=None):
+        """Returns the playlists ordered by name.
+
+        Args:
+            prefix: If given, only the playlists whose names start with it,
+                ignoring case, are returned.
+        """
+        if prefix is None:
+            return list(self._sorted_playlists)
+        return sorted(self._folded_playlists.prefix(prefix.lower()),
+                      key=attrgetter("name"))
+
+    def union(self, operands):
+        """Returns the video_ids found in any of the operands.
+
+        Args:
+            operands: Playlist names or iterables of video_ids.
+
+        Returns:
+            A list of video_ids, in the order they are first seen.
+        """
+        video_ids = {}
+        for operand in self._resolve(operands):
+            video_ids.update(dict.fromkeys(operand))
+        return list(video_ids)
+
+    def intersection(self, operands):
+        """Returns the video_ids found in all of the operands.
+
+        Args:
+            operands: Playlist names or iterables of video_ids.
+
+        Returns:
+            A list of video_ids, in the order of the first operand.
+        """
+        first, *others = self._resolve(operands)
+        others = [self._as_set(operand) for operand in others]
+        return [video_id for video_id in dict.fromkeys(first)
+                if all(video_id in other for other in others)]
+
+    def difference(self, operands):
+        """Returns the video_ids of the first operand not found in the others.
+
+        Args:
+            operands: Playlist names or iterables of video_ids.
+
+        Returns:
+            A list of video_ids, in the order of the first operand.
+        """
+        first, *others = self._resolve(operands)
+        others = [self._as_set(operand) for operand in others]
+        return [video_id for video_id in dict.fromkeys(first)
+                if not any(video_id in other for other in others)]
+
+    def _resolve(self, operands):
+        """Replaces the playlist names among the operands by the playlists."""
+        return [self._playlists[operand.lower()] if isinstance(operand, str)
+                else operand
+                for operand in operands]
+
+    @staticmethod
+    def _as_set(operand):
+        """Returns an operand supporting O(1) membership checks."""
+        return operand if isinstance(operand, (Playlist, set, dict)) else set(operand)
+
+
+def _folded_name(playlist):
+    return playlist.name.lower()
@@ -0,0 +1,186 @@
+"""Watch statistics classes."""
+
+from array import array
+from collections import Counter
+import random
+
+
+# A Mersenne prime, the modulus of the Count-Min sketch hash functions.
+_PRIME = 2 ** 61 - 1
+
+
+class CountMinSketch:
+    """A class used to estimate per-key totals in fixed memory.
+
+    Each key is added to one counter per row, picked by a row-specific hash.
+    Collisions only ever add, so the smallest of its counters overestimates
+    the total of a key by at most a small fraction of the grand total.
+    """
+
+    def __init__(self, width=2048, depth=4, seed=0):
+        """The CountMinSketch class is initialized.
+
+        Args:
+            width: The number of counters per row.
+            depth: The number of rows.
+            seed: The seed the row hash functions are drawn with.
+        """
+        self._width = width
+        self._rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+        # Each row hashes with its own (a * hash(key) + b) mod _PRIME
+        # function, so collisions in one row are independent of the others.
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME))
+                        for _ in range(depth)]
+
+    def add(self, key, amount=1):
+        """Adds amount to the total of key."""
+        for row, index in zip(self._rows, self._indexes(key)):
+            row[index] += amount
+
+    def estimate(self, key):
+        """Returns an upper bound on the total of key."""
+        return min(row[index]
+                   for row, index in zip(self._rows, self._indexes(key)))
+
+    def _indexes(self, key):
+        key_hash = hash(key)
+        return [(a * key_hash + b) % _PRIME % self._width
+                for a, b in self._hashes]
+
+
+class SpaceSaving:
+    """A class used to track the heaviest keys of a stream in fixed memory.
+
+    At most capacity keys are counted. A new key replaces the smallest one
+    and inherits its count, so the counts of the tracked keys are upper
+    bounds, and any key whose total exceeds the grand total divided by
+    capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=100):
+        self._capacity = capacity
+        self._counts = {}
+
+    def add(self, key, amount=1):
+        """Adds amount to the count of key."""
+        if key in self._counts or len(self._counts) < self._capacity:
+            self._counts[key] = self._counts.get(key, 0) + amount
+        else:
+            smallest = min(self._counts, key=self._counts.get)
+            self._counts[key] = self._counts.pop(smallest) + amount
+
+    def top(self, count):
+        """Returns the count heaviest (key, count) pairs, heaviest first."""
+        return _by_count(self._counts.items())[:count]
+
+
+class WatchStats:
+    """A class used to aggregate play counts and watch time from playback.
+
+    It is fed the PlaybackEvent objects of a playback session. Plays and
+    watch time are kept per video and per tag in Count-Min sketches, and
+    the most played videos and tags in Space-Saving summaries, so memory
+    does not depend on the catalog. Exact per-video and per-tag counters are
+    kept as well unless turned off; they grow with the number of distinct
+    videos played.
+    """
+
+    def __init__(self, top_size=100, sketch_width=2048, sketch_depth=4,
+                 exact=True):
+        """The WatchStats class is initialized.
+
+        Args:
+            top_size: How many videos and tags the heavy hitter summaries
+                track.
+            sketch_width: The number of counters per Count-Min sketch row.
+            sketch_depth: The number of Count-Min sketch rows.
+            exact: Whether exact per-video and per-tag counters are kept.
+        """
+        self.plays = 0
+        self.watch_seconds = 0.0
+        self._play_sketch = CountMinSketch(sketch_width, sketch_depth)
+        self._time_sketch = CountMinSketch(sketch_width, sketch_depth)
+        self._top_videos = SpaceSaving(top_size)
+        self._top_tags = SpaceSaving(top_size)
+        self._exact_plays = Counter() if exact else None
+        self._exact_seconds = Counter() if exact else None
+        # The video being watched and when its current stretch started, or
+        # None while it is paused.
+        self._watching = None
+        self._since = None
+
+    def record(self, event):
+        """Aggregates a PlaybackEvent."""
+        if event.action in ("play", "pause", "stop"):
+            self._end_stretch(event.timestamp)
+        if event.action == "play":
+            video = event.video
+            self.plays += 1
+            self._add(video, self._play_sketch, self._exact_plays, 1)
+            self._top_videos.add(video.video_id)
+            for tag in video.tags:
+                self._top_tags.add(tag)
+            self._watching = video
+            self._since = event.timestamp
+        elif event.action == "continue":
+            self._since = event.timestamp
+        elif event.action == "stop":
+            self._watching = None
+
+    def video_plays(self, video_id):
+        """Returns the number of plays of a video, estimated if the exact
+        counters are off."""
+        return self._get(("video", video_id), self._play_sketch,
+                         self._exact_plays)
+
+    def video_watch_seconds(self, video_id):
+        """Returns the watch time of a video, estimated if the exact
+        counters are off."""
+        return self._get(("video", video_id), self._time_sketch,
+                         self._exact_seconds)
+
+    def tag_plays(self, tag):
+        """Returns the number of plays of the videos with a tag."""
+        return self._get(("tag", tag), self._play_sketch, self._exact_plays)
+
+    def tag_watch_seconds(self, tag):
+        """Returns the watch time of the videos with a tag."""
+        return self._get(("tag", tag), self._time_sketch, self._exact_seconds)
+
+    def top_videos(self, count):
+        """Returns the (video_id, plays) pairs of the most played videos."""
+        return _by_count([(video_id, self.video_plays(video_id))
+                          for video_id, _ in self._top_videos.top(count)])
+
+    def top_tags(self, count):
+        """Returns the (tag, plays) pairs of the most played tags."""
+        return _by_count([(tag, self.tag_plays(tag))
+                          for tag, _ in self._top_tags.top(count)])
+
+    def _end_stretch(self, timestamp):
+        if self._watching is not None and self._since is not None:
+            seconds = timestamp - self._since
+            self.watch_seconds += seconds
+            self._add(self._watching, self._time_sketch, self._exact_seconds,
+                      seconds)
+        self._since = None
+
+    @staticmethod
+    def _add(video, sketch, exact, amount):
+        keys = [("video", video.video_id)]
+        keys.extend(("tag", tag) for tag in video.tags)
+        for key in keys:
+            sketch.add(key, amount)
+            if exact is not None:
+                exact[key] += amount
+
+    @staticmethod
+    def _get(key, sketch, exact):
+        if exact is not None:
+            return exact[key]
+        return sketch.estimate(key)
+
+
+def _by_count(items):
+    return sorted(items, key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,148 @@
+import pytest
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.video_player import VideoPlayer
+
+
+def _run(parser, line):
+    parser.execute_command(line.split())
+
+
+def test_semicolon_batch_commits(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    _run(parser, "CREATE_PLAYLIST mix; ADD_TO_PLAYLIST mix amazing_cats_video_id;"
+                 " FLAG_VIDEO funny_dogs_video_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines == [
+        "Successfully created new playlist: mix",
+        "Added video to mix: Amazing Cats",
+        "Successfully flagged video: Funny Dogs (reason: Not supplied)",
+        "Committed batch of 3 commands"]
+
+
+def test_failed_batch_is_rolled_back(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    _run(parser, "CREATE_PLAYLIST keep")
+    _run(parser, "ADD_TO_PLAYLIST keep amazing_cats_video_id")
+    capfd.readouterr()
+    _run(parser, "CREATE_PLAYLIST mix; CLEAR_PLAYLIST keep; "
+                 "FLAG_VIDEO funny_dogs_video_id; DELETE_PLAYLIST keep; "
+                 "ADD_TO_PLAYLIST nothing amazing_cats_video_id; "
+                 "CREATE_PLAYLIST never")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-2] == ("Cannot add video to nothing: Playlist does not "
+                         "exist")
+    assert lines[-1] == ("Rolled back batch: ADD_TO_PLAYLIST nothing "
+                         "amazing_cats_video_id failed")
+    assert "Successfully created new playlist: never" not in out
+
+    player.show_all_playlists()
+    player.show_playlist("keep")
+    player.flag_video("funny_dogs_video_id")
+    player.show_flag_log()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[:2] == ["Showing all playlists:", "keep"]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines
+    assert "Successfully flagged video: Funny Dogs (reason: Not supplied)" in out
+    assert len([line for line in lines if "FLAGGED" in line]) == 1
+
+
+def test_invalid_batch_runs_nothing(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    with pytest.raises(CommandException):
+        _run(parser, "CREATE_PLAYLIST mix; ADD_TO_PLAYLIST mix")
+    with pytest.raises(CommandException):
+        _run(parser, "CREATE_PLAYLIST mix; HELP")
+    with pytest.raises(CommandException):
+        _run(parser, "CREATE_PLAYLIST mix; SEARCH_VIDEOS cat")
+    with pytest.raises(CommandException):
+        _run(parser, "SEARCH_VIDEOS_WITH_TAG #cat; CREATE_PLAYLIST mix")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    assert "No playlists exist yet" in out
+    assert "Successfully created" not in out
+
+
+def test_begin_commit_and_rollback(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    _run(parser, "BEGIN")
+    _run(parser, "CREATE_PLAYLIST mix")
+    with pytest.raises(CommandException):
+        _run(parser, "PLAY")
+    _run(parser, "ADD_TO_PLAYLIST mix amazing_cats_video_id")
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Started batch, enter COMMIT to run it or ROLLBACK to discard it"]
+    _run(parser, "COMMIT")
+    _run(parser, "BEGIN")
+    _run(parser, "DELETE_PLAYLIST mix")
+    _run(parser, "ROLLBACK")
+    _run(parser, "COMMIT")
+    player.show_playlist("mix")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[:3] == [
+        "Successfully created new playlist: mix",
+        "Added video to mix: Amazing Cats",
+        "Committed batch of 2 commands"]
+    assert "Discarded batch of 1 commands" in lines
+    assert "Cannot commit batch: No batch is started" in lines
+    assert "Showing playlist: mix" in lines
+
+
+def test_batch_is_journaled_on_commit_only(tmp_path, capfd):
+    player = VideoPlayer(state_dir=tmp_path)
+    parser = CommandParser(player)
+    _run(parser, "CREATE_PLAYLIST mix; ADD_TO_PLAYLIST mix amazing_cats_video_id")
+    _run(parser, "CREATE_PLAYLIST lost; PLAY missing_video_id")
+    player.close()
+
+    player = VideoPlayer(state_dir=tmp_path)
+    player.show_all_playlists()
+    player.show_playlist("mix")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "mix" in lines
+    assert "lost" not in lines
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines
+
+
+def test_adding_flagged_video_fails_batch(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    _run(parser, "FLAG_VIDEO amazing_cats_video_id")
+    _run(parser, "CREATE_PLAYLIST x; ADD_TO_PLAYLIST x amazing_cats_video_id")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-2] == ("Rolled back batch: ADD_TO_PLAYLIST x "
+                         "amazing_cats_video_id failed")
+    assert lines[-1] == "No playlists exist yet"
+
+
+def test_no_videos_available_fails_batch(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    for video in player._video_library.get_all_videos():
+        _run(parser, f"FLAG_VIDEO {video.video_id}")
+    _run(parser, "CREATE_PLAYLIST x; PLAY_RANDOM")
+    _run(parser, "CREATE_PLAYLIST y; PLAY amazing_cats_video_id")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-7:] == [
+        "Successfully created new playlist: x",
+        "No videos available",
+        "Rolled back batch: PLAY_RANDOM failed",
+        "Successfully created new playlist: y",
+        "No videos available",
+        "Rolled back batch: PLAY amazing_cats_video_id failed",
+        "No playlists exist yet"]
@@ -0,0 +1,23 @@
+import threading
+
+import pytest
+
+from src.deferred import Deferred
+
+
+def test_get_waits_for_value():
+    release = threading.Event()
+    deferred = Deferred(lambda x: release.wait() and x * 2, 21)
+    assert not deferred.ready()
+    release.set()
+    assert deferred.get() == 42
+    assert deferred.ready()
+
+
+def test_get_raises_build_error():
+    def build():
+        raise ValueError("bad catalog")
+
+    deferred = Deferred(build)
+    with pytest.raises(ValueError, match="bad catalog"):
+        deferred.get()
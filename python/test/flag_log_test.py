@@ -0,0 +1,125 @@
+import pytest
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.flag_log import FlagEvent
+from src.flag_log import FlagLog
+from src.journal import StateJournal
+from src.video_player import VideoPlayer
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_range_queries():
+    clock = FakeClock()
+    log = FlagLog(clock=clock)
+    for second in range(10):
+        log.append(1000.0 + second, f"video_{second % 3}", "flag", "spam")
+    assert [event.timestamp for event in log.events(1003, 1006)] == [
+        1003.0, 1004.0, 1005.0]
+    assert len(log.events(1008)) == 2
+    assert log.events(2000) == []
+    clock.now = 1009.5
+    assert [event.timestamp for event in log.recent(2)] == [1008.0, 1009.0]
+    assert [event.timestamp for event in log.history("video_1")] == [
+        1001.0, 1004.0, 1007.0]
+
+
+def test_timestamps_never_decrease():
+    clock = FakeClock(50.0)
+    log = FlagLog([(100.0, "a", "flag", "spam")], clock=clock)
+    assert log.now() == 100.0
+    log.append(log.now(), "a", "allow")
+    log.append(90.0, "b", "flag", "dull")
+    assert list(log) == [FlagEvent(100.0, "a", "flag", "spam"),
+                         FlagEvent(100.0, "a", "allow", None),
+                         FlagEvent(100.0, "b", "flag", "dull")]
+
+
+def test_player_flag_history(capfd):
+    player = VideoPlayer()
+    player.flag_video("amazing_cats_video_id", "dont_like_cats")
+    player.allow_video("amazing_cats_video_id")
+    player.flag_many_videos(["tag:#cat"])
+    capfd.readouterr()
+    player.show_flag_history("amazing_cats_video_id")
+    player.show_flag_history("funny_dogs_video_id")
+    player.show_flag_history("unknown_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert lines[0] == "Flag history for Amazing Cats:"
+    assert lines[1].endswith(
+        " FLAGGED amazing_cats_video_id (reason: dont_like_cats)")
+    assert lines[2].endswith(" ALLOWED amazing_cats_video_id")
+    assert lines[3].endswith(
+        " FLAGGED amazing_cats_video_id (reason: Not supplied)")
+    assert lines[4] == "No flag history for Funny Dogs"
+    assert lines[5] == "Cannot show flag history: Video does not exist"
+
+
+def test_flag_log_command(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    parser.execute_command(["FLAG_LOG"])
+    player.flag_video("funny_dogs_video_id", "loud")
+    parser.execute_command(["FLAG_LOG", "1h"])
+    with pytest.raises(CommandException, match="Invalid duration: soon"):
+        parser.execute_command(["FLAG_LOG", "soon"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "No flag events"
+    assert lines[2] == "Flag events in the last 3600 seconds:"
+    assert lines[3].endswith(" FLAGGED funny_dogs_video_id (reason: loud)")
+
+
+def test_flag_log_is_recovered(tmp_path, capfd):
+    player = VideoPlayer(state_dir=tmp_path)
+    player.flag_video("funny_dogs_video_id", "loud")
+    player.allow_video("funny_dogs_video_id")
+    player._write_snapshot()
+    player.flag_video("nothing_video_id")
+    events = list(player._flag_log)
+    player.close()
+    player = VideoPlayer(state_dir=tmp_path)
+    assert list(player._flag_log) == events
+    player.close()
+
+
+def test_compaction_archives_new_events_only(tmp_path):
+    player = VideoPlayer(state_dir=tmp_path)
+    player.flag_video("funny_dogs_video_id", "loud")
+    player._write_snapshot()
+    player.allow_video("funny_dogs_video_id")
+    player._write_snapshot()
+    player._write_snapshot()
+    player.flag_video("nothing_video_id")
+    events = list(player._flag_log)
+    player.close()
+
+    assert "flag_log" not in (tmp_path / StateJournal.SNAPSHOT_FILE).read_text()
+    assert len(StateJournal(tmp_path).archived()) == 2
+    player = VideoPlayer(state_dir=tmp_path)
+    assert list(player._flag_log) == events
+    player.close()
+
+
+def test_flag_log_is_recovered_from_older_snapshot(tmp_path):
+    event = FlagEvent(1000.0, "funny_dogs_video_id", "flag", "loud")
+    journal = StateJournal(tmp_path)
+    journal.compact({"playlists": {}, "flags": {"funny_dogs_video_id": "loud"},
+                     "flag_log": [list(event)]})
+    journal.close()
+
+    player = VideoPlayer(state_dir=tmp_path)
+    player._write_snapshot()
+    player.close()
+    player = VideoPlayer(state_dir=tmp_path)
+    assert list(player._flag_log) == [event]
+    player.close()
@@ -0,0 +1,86 @@
+from src.flag_store import FlagStore
+from src.video_player import VideoPlayer
+
+
+def test_flag_store_holds_only_flags():
+    flags = FlagStore()
+    assert len(flags) == 0
+    flags.flag("b", "spam")
+    flags.flag("a", "dull")
+    assert "a" in flags and "c" not in flags
+    assert flags.get("a") == "dull"
+    assert flags.get("c") is None
+    assert list(flags) == ["b", "a"]
+    flags.allow("b")
+    flags.allow("c")
+    assert dict(flags.items()) == {"a": "dull"}
+
+
+def test_player_starts_without_flags(capfd):
+    player = VideoPlayer()
+    assert len(player._flags) == 0
+    player.flag_video("amazing_cats_video_id", "dont_like_cats")
+    player.flag_video("funny_dogs_video_id")
+    assert dict(player._flags.items()) == {
+        "amazing_cats_video_id": "dont_like_cats",
+        "funny_dogs_video_id": "Not supplied",
+    }
+    assert "yt_flagged_videos 2" in player.metrics.export()
+
+
+def test_play_random_skips_flagged_videos(capfd):
+    player = VideoPlayer()
+    for video_id in ("amazing_cats_video_id", "another_cat_video_id",
+                     "funny_dogs_video_id", "life_at_google_video_id"):
+        player.flag_video(video_id)
+    capfd.readouterr()
+    for _ in range(10):
+        player.play_random_video()
+    out, err = capfd.readouterr()
+    assert "Cannot play video" not in out
+    assert "Playing video: Video about nothing" in out
+
+
+def test_flag_many_videos(capfd):
+    player = VideoPlayer()
+    player.play_video("amazing_cats_video_id")
+    player.flag_video("funny_dogs_video_id")
+    player.flag_many_videos(["tag:#cat", "title:*dogs", "nothing_video_id"],
+                            "spam")
+    player.flag_many_videos(["unknown_id", "life_at_google_video_id"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-3] == "Stopping video: Amazing Cats"
+    assert lines[-2] == "Successfully flagged 3 videos (reason: spam)"
+    assert lines[-1] == "Cannot flag videos: Videos do not exist: unknown_id"
+    assert player.currently_playing is None
+    assert player._flags.get("another_cat_video_id") == "spam"
+    assert player._flags.get("funny_dogs_video_id") == "Not supplied"
+    assert "life_at_google_video_id" not in player._flags
+
+    # Selectors only match unflagged videos, video_ids are counted.
+    player.flag_many_videos(["tag:#cat", "amazing_cats_video_id",
+                             "life_at_google_video_id"])
+    out, err = capfd.readouterr()
+    assert out == ("Successfully flagged 1 videos (reason: Not supplied) "
+                   "(1 already flagged)\n")
+
+
+def test_allow_many_videos(capfd):
+    player = VideoPlayer()
+    player.flag_many_videos(["tag:#cat", "tag:#dog"])
+    player.allow_many_videos(["search:cat", "nothing_video_id"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[1] == "Successfully removed flags from 2 videos (1 not flagged)"
+    assert list(player._flags) == ["funny_dogs_video_id"]
+
+
+def test_bulk_flags_are_journaled(tmp_path, capfd):
+    player = VideoPlayer(state_dir=tmp_path)
+    player.flag_many_videos(["tag:#cat"], "cats")
+    player.allow_many_videos(["amazing_cats_video_id"])
+    player.close()
+    player = VideoPlayer(state_dir=tmp_path)
+    assert dict(player._flags.items()) == {"another_cat_video_id": "cats"}
+    player.close()
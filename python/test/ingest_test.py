@@ -0,0 +1,122 @@
+import pytest
+
+from src.ingest import CatalogError
+from src.ingest import expand_paths
+from src.ingest import load_catalog
+from src.ingest import parse_rows
+from src.ingest import read_chunks
+from src.video_library import VideoLibrary
+
+
+def _write_catalog(tmp_path, lines):
+    path = tmp_path / "videos.txt"
+    path.write_text("".join(line + "\n" for line in lines))
+    return path
+
+
+def test_parse_rows_reports_malformed_lines():
+    rows, errors = parse_rows([
+        "Cat | cat_id | #cat, #animal\n",
+        "\n",
+        "No id |  | #dog\n",
+        "Too | many | fields | here\n",
+        "No tags | plain_id |\n",
+    ], first_line=10)
+    assert rows == [(10, "Cat", "cat_id", ["#cat", "#animal"]),
+                    (14, "No tags", "plain_id", [])]
+    assert errors == [
+        CatalogError(12, "Missing video_id"),
+        CatalogError(13, "Expected 3 fields separated by '|', found 4")]
+
+
+def test_chunks_hold_every_line_once(tmp_path):
+    lines = [f"Video {i} | id{i} | #tag{i % 3}" for i in range(200)]
+    path = _write_catalog(tmp_path, lines)
+    for chunk_bytes in (1, 7, 100, 10000):
+        text = b""
+        line = 1
+        for first_line, data in read_chunks(path, chunk_bytes):
+            assert first_line == line
+            line += data.count(b"\n")
+            text += data
+        assert text == path.read_bytes()
+
+
+def test_load_catalog_skips_duplicates(tmp_path):
+    path = _write_catalog(tmp_path, [
+        "Cat | cat_id | #cat",
+        "Dog | dog_id | #dog",
+        "Cat again | cat_id | #cat",
+        "Broken line",
+    ])
+    videos, errors = load_catalog(path)
+    assert [video.video_id for video in videos] == ["cat_id", "dog_id"]
+    assert videos[0].title == "Cat"
+    assert errors == [
+        CatalogError(3, "Duplicate video_id cat_id, first seen on line 1"),
+        CatalogError(4, "Expected 3 fields separated by '|', found 1")]
+
+
+def test_parallel_load_matches_serial(tmp_path):
+    lines = [f"Video {i} | id{i % 900} | #tag{i % 7}, #other"
+             for i in range(1000)]
+    lines[500] = "Broken | line"
+    path = _write_catalog(tmp_path, lines)
+    serial = load_catalog(path, num_workers=1, chunk_bytes=1024)
+    parallel = load_catalog(path, num_workers=3, chunk_bytes=1024)
+    assert ([video.display for video in parallel[0]]
+            == [video.display for video in serial[0]])
+    assert parallel[1] == serial[1]
+    assert len(serial[0]) == 899
+    assert len(serial[1]) == 101
+
+
+def test_library_keeps_load_errors(tmp_path):
+    path = _write_catalog(tmp_path, [
+        "Cat | cat_id | #cat",
+        "|  | ",
+        " | no_title_id | #x",
+    ])
+    library = VideoLibrary(path)
+    assert len(library) == 1
+    assert library.get_video("cat_id").tags == ("#cat",)
+    assert library.load_errors == [
+        CatalogError(3, "Missing title", str(path))]
+    assert VideoLibrary().load_errors == []
+
+
+def test_expand_paths(tmp_path):
+    for name in ("b.txt", "a.txt", "notes.md"):
+        (tmp_path / name).write_text("")
+    assert expand_paths(tmp_path) == [tmp_path / "a.txt", tmp_path / "b.txt"]
+    assert expand_paths([tmp_path / "notes.md", str(tmp_path / "*.txt")]) == [
+        tmp_path / "notes.md", tmp_path / "a.txt", tmp_path / "b.txt"]
+    with pytest.raises(FileNotFoundError):
+        expand_paths(str(tmp_path / "*.csv"))
+
+
+def test_only_newlines_end_lines(tmp_path):
+    title = "Cat\u2028Dog\x0c\x1c\x85Cat"
+    path = _write_catalog(tmp_path, [
+        f"{title} | cat_id | #cat",
+        "Dog | dog_id | #dog",
+        "Bad row",
+    ])
+    videos, errors = load_catalog(path)
+    assert [video.title for video in videos] == [title, "Dog"]
+    assert errors == [
+        CatalogError(3, "Expected 3 fields separated by '|', found 1")]
+
+
+def test_quotes_do_not_span_lines(tmp_path):
+    path = _write_catalog(tmp_path, [
+        '"Quoted title | quoted_id | #a',
+        "Cat | cat_id | #cat",
+        'Dog "the" dog | dog_id | #dog',
+    ])
+    for chunk_bytes in (1 << 22, 16):
+        videos, errors = load_catalog(path, num_workers=1,
+                                      chunk_bytes=chunk_bytes)
+        assert [video.title for video in videos] == [
+            '"Quoted title', "Cat", 'Dog "the" dog']
+        assert errors == []
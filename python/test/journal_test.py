@@ -0,0 +1,95 @@
+from src.journal import StateJournal
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_state_survives_restart(tmp_path, capfd):
+    player = VideoPlayer(state_dir=tmp_path)
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.remove_from_playlist("my_playlist", "amazing_cats_video_id")
+    player.flag_video("nothing_video_id", "dont_like_nothing")
+    player.close()
+
+    player = VideoPlayer(state_dir=tmp_path)
+    player.show_playlist("my_playlist")
+    player.allow_video("nothing_video_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Showing playlist: my_playlist" in lines[-3]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[-2]
+    assert "Successfully removed flag from video: Video about nothing" in lines[-1]
+
+
+def test_journal_is_compacted_into_snapshot(tmp_path):
+    journal = StateJournal(tmp_path, compact_every=3)
+    journal.append("create_playlist", "a")
+    journal.append("create_playlist", "b")
+    assert not journal.needs_compaction()
+    journal.append("delete_playlist", "a")
+    assert journal.needs_compaction()
+    journal.compact({"playlists": {"b": []}, "flags": {}})
+    journal.append("create_playlist", "c")
+    journal.close()
+
+    state, records = StateJournal(tmp_path).load()
+    assert state == {"playlists": {"b": []}, "flags": {}}
+    assert records == [("create_playlist", ["c"])]
+
+
+def test_torn_record_is_ignored(tmp_path):
+    journal = StateJournal(tmp_path)
+    journal.append("create_playlist", "a")
+    journal.close()
+    with open(tmp_path / StateJournal.JOURNAL_FILE, "a") as journal_file:
+        journal_file.write('{"seq": 2, "op": "create_pl')
+
+    state, records = StateJournal(tmp_path).load()
+    assert state is None
+    assert records == [("create_playlist", ["a"])]
+
+    journal = StateJournal(tmp_path)
+    journal.load()
+    journal.append("create_playlist", "b")
+    journal.close()
+    state, records = StateJournal(tmp_path).load()
+    assert records == [("create_playlist", ["a"]), ("create_playlist", ["b"])]
+
+
+def test_recovery_drops_videos_missing_from_catalog(tmp_path, capfd):
+    player = VideoPlayer(state_dir=tmp_path / "state")
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.close()
+
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | funny_dogs_video_id | #dog , #animal\n")
+    player = VideoPlayer(state_dir=tmp_path / "state",
+                         video_library=VideoLibrary(catalog))
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-2:] == ["Showing playlist: my_playlist",
+                          "Funny Dogs (funny_dogs_video_id) [#dog #animal]"]
+
+
+def test_archive_is_cut_to_snapshot(tmp_path):
+    journal = StateJournal(tmp_path)
+    journal.compact({}, [[1, "a"]])
+    journal.append("create_playlist", "a")
+    journal.close()
+    # A crash after the archive was written, before the snapshot was.
+    with open(tmp_path / StateJournal.ARCHIVE_FILE, "a") as archive_file:
+        archive_file.write('[2, "b"]\n[3, "c')
+
+    journal = StateJournal(tmp_path)
+    state, records = journal.load()
+    assert journal.archived() == [[1, "a"]]
+    assert records == [("create_playlist", ["a"])]
+    journal.compact(state, [[2, "b"]])
+    journal.close()
+    journal = StateJournal(tmp_path)
+    journal.load()
+    assert journal.archived() == [[1, "a"], [2, "b"]]
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.locks import ReadWriteLock
+from src.video_player import VideoPlayer
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.read():
+            both_reading.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not both_reading.broken
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def read():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(0.1)
+        events.append("write")
+    reader.join()
+    assert events == ["write", "read"]
+
+
+def test_lock_is_reentrant_but_cannot_be_upgraded():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.read(), lock.write():
+            pass
+    with lock.read():
+        with lock.read():
+            assert lock.holds_read()
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+    assert not lock.holds_read()
+
+
+def test_concurrent_playlist_updates(capfd):
+    player = VideoPlayer()
+    video_ids = ["funny_dogs_video_id", "amazing_cats_video_id",
+                 "another_cat_video_id", "life_at_google_video_id"]
+    for num in range(8):
+        player.create_playlist(f"playlist_{num}")
+
+    def fill(num):
+        for _ in range(20):
+            for video_id in video_ids:
+                player.add_to_playlist(f"playlist_{num}", video_id)
+            player.flag_video("nothing_video_id")
+            player.allow_video("nothing_video_id")
+            player.remove_many_from_playlist(f"playlist_{num}", video_ids[1:])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(fill, range(8)))
+    capfd.readouterr()
+
+    for num in range(8):
+        player.show_playlist(f"playlist_{num}")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 16
+    assert lines[1::2] == ["Funny Dogs (funny_dogs_video_id) [#dog #animal]"] * 8
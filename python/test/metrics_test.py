@@ -0,0 +1,56 @@
+import pytest
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.metrics import Histogram
+from src.video_player import VideoPlayer
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    for ns in range(1, 1001):
+        histogram.observe(ns * 1000)
+    assert histogram.count == 1000
+    assert 0.4e-3 <= histogram.quantile(0.5) <= 0.6e-3
+    assert 0.9e-3 <= histogram.quantile(0.99) <= 1.1e-3
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_commands_are_counted_and_timed(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["play", "funny_dogs_video_id"])
+    parser.execute_command(["NOT_A_COMMAND"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PLAY"])
+    capfd.readouterr()
+
+    metrics = player.metrics
+    assert metrics.get_counter("yt_commands_total", (("command", "PLAY"),)) == 3
+    assert metrics.get_counter(
+        "yt_command_errors_total", (("command", "PLAY"),)) == 1
+    assert metrics.get_counter(
+        "yt_commands_total", (("command", "UNKNOWN"),)) == 1
+    assert metrics.get_counter(
+        "yt_player_calls_total", (("method", "play_video"),)) == 2
+    assert metrics.get_histogram(
+        "yt_commands_latency_seconds", (("command", "PLAY"),)).count == 3
+
+
+def test_stats_command(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    parser.execute_command(["FLAG_VIDEO", "amazing_cats_video_id"])
+    parser.execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "# TYPE yt_commands_total counter" in lines
+    assert 'yt_commands_total{command="FLAG_VIDEO"} 1' in lines
+    assert "# TYPE yt_commands_latency_seconds summary" in lines
+    assert any(line.startswith(
+        'yt_commands_latency_seconds{command="FLAG_VIDEO",quantile="0.99"} ')
+        for line in lines)
+    assert "yt_library_videos 5" in lines
+    assert "yt_flagged_videos 1" in lines
+    assert "yt_playlists 0" in lines
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.play_queue import PlayQueue
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_queue_skips_unplayable_entries():
+    library = VideoLibrary()
+    resolved = []
+
+    def resolve(video_id):
+        resolved.append(video_id)
+        return library.get_video(video_id)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        queue = PlayQueue("mix", ["funny_dogs_video_id", "unknown_id",
+                                  "nothing_video_id", "life_at_google_video_id"],
+                          resolve, executor, prefetch=1)
+        assert queue.position == -1
+        assert queue.next().video_id == "funny_dogs_video_id"
+        assert queue.next().video_id == "nothing_video_id"
+        assert queue.position == 2
+        assert [video.video_id for video in queue.upcoming(5)] == [
+            "life_at_google_video_id"]
+        assert queue.next().video_id == "life_at_google_video_id"
+        assert queue.next() is None
+        assert queue.position == 3
+        assert queue.previous().video_id == "nothing_video_id"
+        assert queue.previous().video_id == "funny_dogs_video_id"
+        assert queue.previous() is None
+        queue.close()
+    # Entries are looked up ahead of time rather than on every move.
+    assert resolved.count("nothing_video_id") == 1
+
+
+def test_play_playlist(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_to_playlist("my_playlist", "nothing_video_id")
+    player.flag_video("funny_dogs_video_id")
+    capfd.readouterr()
+    player.play_playlist("my_playlist")
+    player.show_queue()
+    player.next_video()
+    player.next_video()
+    player.previous_video()
+    player.show_playing()
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Playing playlist: my_playlist",
+        "Playing video: Amazing Cats",
+        "Playing playlist: my_playlist (video 1 of 3)",
+        "  Video about nothing (nothing_video_id) []",
+        "Stopping video: Amazing Cats",
+        "Playing video: Video about nothing",
+        "Cannot play next video: Reached the end of the playlist",
+        "Stopping video: Video about nothing",
+        "Playing video: Amazing Cats",
+        "Currently playing: Amazing Cats (amazing_cats_video_id) "
+        "[#cat #animal]",
+    ]
+    player.close()
+
+
+def test_queue_skips_videos_flagged_after_queueing(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.play_playlist("my_playlist")
+    player.flag_video("funny_dogs_video_id")
+    capfd.readouterr()
+    player.next_video()
+    out, err = capfd.readouterr()
+    assert out == "Cannot play next video: Reached the end of the playlist\n"
+    player.close()
+
+
+def test_play_playlist_errors(capfd):
+    player = VideoPlayer()
+    player.next_video()
+    player.previous_video()
+    player.show_queue()
+    player.play_playlist("missing")
+    player.create_playlist("empty")
+    player.play_playlist("empty")
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Cannot play next video: No playlist is being played",
+        "Cannot play previous video: No playlist is being played",
+        "No playlist is being played",
+        "Cannot play playlist missing: Playlist does not exist",
+        "Successfully created new playlist: empty",
+        "Cannot play playlist empty: No videos available",
+    ]
+    player.close()
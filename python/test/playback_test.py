@@ -0,0 +1,73 @@
+import pytest
+
+from src.playback import PAUSED
+from src.playback import PLAYING
+from src.playback import STOPPED
+from src.playback import PlaybackSession
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_transitions():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    session = PlaybackSession(clock=lambda: 5.0)
+    assert session.state == STOPPED and session.video is None
+    assert not session.can("pause")
+    with pytest.raises(ValueError):
+        session.resume()
+    session.play(cats)
+    session.pause()
+    assert session.state == PAUSED and session.video is cats
+    session.resume()
+    assert session.state == PLAYING
+    session.stop()
+    assert session.state == STOPPED and session.video is None
+    assert [(event.action, event.video) for event in session.events()] == [
+        ("play", cats), ("pause", cats), ("continue", cats), ("stop", cats)]
+    assert session.events()[0].timestamp == 5.0
+
+
+def test_history_is_bounded():
+    videos = VideoLibrary().get_all_videos()
+    session = PlaybackSession(history_size=4)
+    for video in videos * 3:
+        session.play(video)
+    assert len(session.events()) == 4
+    assert session.recently_played() == list(reversed(videos[-4:]))
+    assert session.recently_played(2) == list(reversed(videos[-2:]))
+
+
+def test_switching_videos_updates_current(capfd):
+    player = VideoPlayer()
+    player.play_video("amazing_cats_video_id")
+    player.play_video("funny_dogs_video_id")
+    player.stop_video()
+    player.pause_video()
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Playing video: Amazing Cats",
+        "Stopping video: Amazing Cats",
+        "Playing video: Funny Dogs",
+        "Stopping video: Funny Dogs",
+        "Cannot pause video: No video is currently playing",
+    ]
+
+
+def test_show_recently_played(capfd):
+    player = VideoPlayer()
+    player.show_recently_played()
+    player.play_video("amazing_cats_video_id")
+    player.play_video("funny_dogs_video_id")
+    player.play_video("amazing_cats_video_id")
+    capfd.readouterr()
+    player.show_recently_played()
+    player.show_recently_played(1)
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Recently played videos:",
+        "  Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "  Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "Recently played videos:",
+        "  Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+    ]
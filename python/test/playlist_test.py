@@ -0,0 +1,145 @@
+from src.video_player import VideoPlayer
+from src.video_playlist import Playlist
+
+
+def test_playlist_keeps_insertion_order():
+    playlist = Playlist("my_playlist", ["a", "b"])
+    playlist.add("c")
+    playlist.remove("a")
+    playlist.add("a")
+    assert playlist.video_ids == ["b", "c", "a"]
+    assert "b" in playlist
+    assert len(playlist) == 3
+
+
+def test_playlist_slice_skips_removed_videos():
+    playlist = Playlist("my_playlist", "abcdefgh")
+    playlist.remove("b")
+    playlist.remove_all(["d", "e", "x"])
+    assert playlist.slice(1, 3) == ["c", "f"]
+    playlist.add("b")
+    playlist.remove("a")
+    assert playlist.slice(2) == ["g", "h", "b"]
+    assert playlist.video_ids == ["c", "f", "g", "h", "b"]
+    playlist.remove_all("cfgh")
+    assert playlist.slice() == ["b"]
+    assert len(playlist) == 1
+
+
+def test_add_many_to_playlist(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_many_to_playlist(
+        "my_PLAYLIST", ["life_at_google_video_id", "funny_dogs_video_id",
+                        "tag:#cat"])
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 8
+    assert "Added 3 videos to my_PLAYLIST (1 already added)" in lines[2]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[4]
+    assert "Life at Google (life_at_google_video_id) [#google #career]" in lines[5]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[6]
+    assert "Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[7]
+
+
+def test_add_many_to_playlist_is_atomic(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.flag_video("nothing_video_id")
+    player.add_many_to_playlist(
+        "my_playlist", ["funny_dogs_video_id", "does_not_exist"])
+    player.add_many_to_playlist(
+        "my_playlist", ["funny_dogs_video_id", "nothing_video_id"])
+    player.add_many_to_playlist("my_playlist", ["search:video"])
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert ("Cannot add videos to my_playlist: Videos do not exist: "
+            "does_not_exist") in lines[2]
+    assert ("Cannot add videos to my_playlist: Videos are currently flagged: "
+            "nothing_video_id") in lines[3]
+    assert "Added 1 videos to my_playlist" in lines[4]
+    assert "Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[6]
+
+
+def test_remove_many_from_playlist(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_many_to_playlist("my_playlist", ["tag:#animal"])
+    player.remove_many_from_playlist(
+        "my_playlist", ["funny_dogs_video_id", "life_at_google_video_id"])
+    player.remove_many_from_playlist("my_playlist", ["tag:#cat"])
+    player.remove_many_from_playlist("another_playlist", ["tag:#cat"])
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Added 3 videos to my_playlist" in lines[1]
+    assert ("Cannot remove videos from my_playlist: Videos are not in "
+            "playlist: life_at_google_video_id") in lines[2]
+    assert "Removed 2 videos from my_playlist" in lines[3]
+    assert ("Cannot remove videos from another_playlist: Playlist does not "
+            "exist") in lines[4]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[6]
+
+
+def test_combine_playlists(capfd):
+    player = VideoPlayer()
+    player.create_playlist("pets")
+    player.add_many_to_playlist(
+        "pets", ["funny_dogs_video_id", "amazing_cats_video_id"])
+    player.combine_playlists("union", "union", ["pets", "tag:#cat"])
+    player.combine_playlists("intersection", "cats", ["tag:#cat", "PETS"])
+    player.combine_playlists("difference", "dogs", ["pets", "tag:#cat"])
+    player.combine_playlists("union", "dogs", ["pets"])
+    player.combine_playlists("union", "other", ["pets", "birds"])
+    player.show_playlist("union")
+    player.show_playlist("cats")
+    player.show_playlist("dogs")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 15
+    assert "Successfully created new playlist: union (3 videos)" in lines[2]
+    assert "Successfully created new playlist: cats (1 videos)" in lines[3]
+    assert "Successfully created new playlist: dogs (1 videos)" in lines[4]
+    assert ("Cannot create playlist: A playlist with the same name already "
+            "exists") in lines[5]
+    assert "Cannot create playlist: Playlist birds does not exist" in lines[6]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[8]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[9]
+    assert "Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[10]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[12]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[14]
+
+
+def test_show_playlist_lists_every_flagged_video(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_many_to_playlist("my_playlist", ["tag:#cat"])
+    player.flag_video("amazing_cats_video_id", "dont_like_cats")
+    player.flag_video("another_cat_video_id")
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert ("Amazing Cats (amazing_cats_video_id) [#cat #animal] - FLAGGED "
+            "(reason: dont_like_cats)") in lines[5]
+    assert ("Another Cat Video (another_cat_video_id) [#cat #animal] - FLAGGED "
+            "(reason: Not supplied)") in lines[6]
+
+
+def test_show_playlist_page(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.add_many_to_playlist("my_playlist", ["tag:#animal"])
+    player.show_playlist("my_playlist", page=2, page_size=2)
+    player.show_playlist("my_playlist", page=3, page_size=2)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 5
+    assert "Showing playlist: my_playlist (page 2 of 2)" in lines[2]
+    assert "Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[3]
+    assert "Cannot show playlist my_playlist: Page 3 does not exist" in lines[4]
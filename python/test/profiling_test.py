@@ -0,0 +1,78 @@
+import pstats
+import time
+
+import pytest
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.profiling import CommandProfiler
+from src.video_player import VideoPlayer
+
+
+def test_profile_command_writes_cprofile_stats(tmp_path, capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    parser.execute_command(["PROFILE", "ON"])
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    parser.execute_command(["PROFILE", "OFF"])
+    parser.execute_command(["PROFILE", "DUMP", str(tmp_path)])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PROFILE", "ON", "strace"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Profiling commands with cprofile" in lines
+    assert f"Wrote profile: {tmp_path / 'SHOW_ALL_VIDEOS.prof'}" in lines
+
+    stats = pstats.Stats(str(tmp_path / "SHOW_ALL_VIDEOS.prof"))
+    assert any(function == "show_all_videos"
+               for (_, _, function) in stats.stats)
+
+
+def _slow_command():
+    time.sleep(0.05)
+
+
+def test_sampling_profiler_folds_stacks(tmp_path):
+    profiler = CommandProfiler("sample", interval=0.001)
+    with profiler.profile("SLOW"):
+        _slow_command()
+    profiler.disable()
+
+    folded = profiler.folded_stacks("SLOW").splitlines()
+    assert folded
+    stack, count = folded[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_slow_command (profiling_test.py:" in line for line in folded)
+    assert profiler.dump(tmp_path) == [tmp_path / "SLOW.folded"]
+
+
+def test_unknown_commands_share_one_profile(tmp_path, capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["PROFILE", "ON"])
+    parser.execute_command(["foo/bar"])
+    parser.execute_command(["typo"])
+    parser.execute_command(["PROFILE", "OFF"])
+    parser.execute_command(["PROFILE", "DUMP", str(tmp_path)])
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "UNKNOWN.prof"]
+
+
+def test_dump_sanitizes_file_names(tmp_path):
+    profiler = CommandProfiler("cprofile")
+    with profiler.profile("A/B"):
+        _slow_command()
+    profiler.disable()
+    assert profiler.dump(tmp_path) == [tmp_path / "A_B.prof"]
+
+
+def test_dump_while_profiling(tmp_path, capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["PROFILE", "ON"])
+    parser.execute_command(["NUMBER_OF_VIDEOS"])
+    parser.execute_command(["PROFILE", "DUMP", str(tmp_path)])
+    parser.execute_command(["NUMBER_OF_VIDEOS"])
+    out, err = capfd.readouterr()
+    assert f"Wrote profile: {tmp_path / 'NUMBER_OF_VIDEOS.prof'}" in out
+    stats = pstats.Stats(str(tmp_path / "NUMBER_OF_VIDEOS.prof"))
+    assert any(function == "number_of_videos"
+               for (_, _, function) in stats.stats)
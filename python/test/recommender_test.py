@@ -0,0 +1,106 @@
+import pytest
+import time
+
+from src.recommender import TagRecommender
+from src.recommender import read_table
+from src.recommender import write_table
+from src.shared_catalog import SharedVideoLibrary
+from src.shared_catalog import write_catalog_file
+from src.synthetic_catalog import write_catalog
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _library():
+    return VideoLibrary(videos=[
+        Video("A", "a", ["#common", "#rare", "#mid"]),
+        Video("B", "b", ["#common", "#rare"]),
+        Video("C", "c", ["#common", "#mid"]),
+        Video("D", "d", ["#common"]),
+        Video("E", "e", ["#common", "#mid"]),
+        Video("F", "f", ["#other"]),
+    ])
+
+
+def test_rare_tags_weigh_more():
+    recommender = TagRecommender(_library())
+    related = recommender.related("a", 10)
+    assert [video_id for video_id, _ in related] == ["b", "c", "e", "d"]
+    assert related[0][1] > related[1][1] > related[3][1]
+    assert recommender.related("f") == []
+    assert recommender.related("unknown") == []
+    assert [video_id for video_id, _ in
+            recommender.related("a", 2, exclude={"b"})] == ["c", "e"]
+
+
+def test_long_postings_only_rescore_candidates():
+    library = _library()
+    full = TagRecommender(library).related("a", 10)
+    bounded = TagRecommender(library, max_postings=3).related("a", 10)
+    # #common is too long to scan, so d, sharing only it, is not found.
+    assert bounded == full[:3]
+
+
+def test_precomputed_table(tmp_path):
+    library = _library()
+    recommender = TagRecommender(library)
+    table = recommender.precompute(count=2)
+    assert table["a"] == recommender.related("a", 2)
+    write_table(table, tmp_path / "related.json")
+    from_table = TagRecommender(library, read_table(tmp_path / "related.json"))
+    assert from_table.related("a", 2) == table["a"]
+    # Too few table entries are left, so the videos are scored online.
+    assert from_table.related("a", 2, exclude={"b"}) == recommender.related(
+        "a", 2, exclude={"b"})
+
+
+def test_table_from_older_catalog(capfd):
+    library = _library()
+    table = {"a": [("gone", 9.0), ("b", 2.0), ("c", 1.0)]}
+    recommender = TagRecommender(library, table)
+    assert recommender.related("a", 2) == [("b", 2.0), ("c", 1.0)]
+    # Too few table entries are left, so the videos are scored online.
+    assert recommender.related("a", 3) == TagRecommender(library).related(
+        "a", 3)
+
+    player = VideoPlayer(video_library=library, related_table=table)
+    player.show_related_videos("a", 3)
+    out, err = capfd.readouterr()
+    assert "gone" not in out
+
+
+def test_shared_catalog_postings(tmp_path):
+    library = _library()
+    write_catalog_file(library.get_all_videos(), tmp_path / "catalog.bin")
+    shared = SharedVideoLibrary(path=tmp_path / "catalog.bin")
+    assert sorted(shared.get_tag_postings("#mid")) == ["a", "c", "e"]
+    assert (TagRecommender(shared).related("a", 10)
+            == TagRecommender(library).related("a", 10))
+    shared.close()
+
+
+@pytest.mark.scalability
+def test_related_is_fast_on_large_catalogs(tmp_path):
+    write_catalog(tmp_path / "videos.txt", 50000, num_tags=1000)
+    recommender = TagRecommender(VideoLibrary(tmp_path / "videos.txt"))
+    start = time.perf_counter()
+    for num in range(20):
+        recommender.related(f"video_{num:08d}")
+    assert (time.perf_counter() - start) / 20 < 0.05
+
+
+def test_show_related_videos(capfd):
+    player = VideoPlayer()
+    player.flag_video("another_cat_video_id")
+    capfd.readouterr()
+    player.show_related_videos("amazing_cats_video_id")
+    player.show_related_videos("nothing_video_id")
+    player.show_related_videos("unknown_id")
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Videos related to Amazing Cats:",
+        "  1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "No related videos for Video about nothing",
+        "Cannot show related videos: Video does not exist",
+    ]
@@ -0,0 +1,219 @@
+"""Checks that command costs grow with the catalog as declared.
+
+Each command runs on players over synthetic catalogs of several sizes. Its
+empirical growth exponent, the slope of log(cost) against log(size), must
+stay within the bound declared for it: a constant or logarithmic command
+should cost about the same on every catalog, a linear one at most grow in
+proportion to it.
+"""
+
+from contextlib import redirect_stdout
+from unittest import mock
+import gc
+import math
+import os
+import time
+
+import pytest
+
+from src.shared_catalog import SharedVideoLibrary
+from src.shared_catalog import write_catalog_file
+from src.synthetic_catalog import tag_name
+from src.synthetic_catalog import write_catalog
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+# Timing checks are flaky on shared machines, so they are left out of the
+# default run; select them with -m scalability.
+pytestmark = pytest.mark.scalability
+
+
+SIZES = (1000, 4000, 16000)
+
+# The largest growth exponent allowed for each bound. log(n) grows by a
+# factor of 1.4 over the sizes, i.e. as n**0.12, so it shares the constant
+# bound. The margins absorb timing noise and the cache misses of larger
+# catalogs, while still telling constant from linear and linear from
+# quadratic.
+MAX_EXPONENT = {"constant": 0.4, "logarithmic": 0.4, "linear": 1.6}
+
+# How long each timing sample should take, in seconds.
+SAMPLE_SECONDS = 0.002
+
+
+def _video_id(num):
+    return f"video_{num:08d}"
+
+
+def _prepare(player, size, flagged=0):
+    """Fills the "bench" playlist with the first half of the catalog and
+    flags the first flagged videos."""
+    player.create_playlist("bench")
+    player.add_many_to_playlist(
+        "bench", [_video_id(num) for num in range(size // 2)])
+    for num in range(10):
+        player.create_playlist(f"playlist_{num}")
+    for num in range(flagged):
+        player.flag_video(_video_id(num), "spam")
+    return player
+
+
+@pytest.fixture(scope="module")
+def catalogs(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("catalogs")
+    paths = {}
+    for size in SIZES:
+        paths[size] = directory / f"videos_{size}.txt"
+        write_catalog(paths[size], size, num_tags=100)
+    return paths
+
+
+@pytest.fixture(scope="module")
+def silenced():
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), \
+            mock.patch("builtins.input", lambda *args: "no"):
+        yield
+
+
+@pytest.fixture(scope="module")
+def players(catalogs, silenced):
+    return {size: _prepare(VideoPlayer(video_library=VideoLibrary(path)), size)
+            for size, path in catalogs.items()}
+
+
+@pytest.fixture(scope="module")
+def flagged_players(catalogs, silenced):
+    return {size: _prepare(VideoPlayer(video_library=VideoLibrary(path)), size,
+                           flagged=size // 2)
+            for size, path in catalogs.items()}
+
+
+@pytest.fixture(scope="module")
+def shared_players(catalogs, silenced, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("shared")
+    players = {}
+    for size, path in catalogs.items():
+        catalog_path = directory / f"catalog_{size}.bin"
+        write_catalog_file(VideoLibrary(path).get_all_videos(), catalog_path)
+        players[size] = _prepare(
+            VideoPlayer(video_library=SharedVideoLibrary(path=catalog_path)),
+            size)
+    yield players
+    for player in players.values():
+        player._video_library.close()
+
+
+def _cost(command, player, size):
+    """Returns the least time a call of command took, in seconds."""
+    start = time.perf_counter()
+    command(player, size)
+    batch = max(1, int(SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    best = math.inf
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(batch):
+            command(player, size)
+        best = min(best, (time.perf_counter() - start) / batch)
+    return best
+
+
+def _growth_exponent(command, players):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        costs = [_cost(command, players[size], size) for size in SIZES]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return math.log(costs[-1] / costs[0]) / math.log(SIZES[-1] / SIZES[0])
+
+
+def _check_growth(name, bound, command, players):
+    # A noisy machine can slow one sample down, so only a growth measured
+    # twice fails.
+    for _ in range(2):
+        exponent = _growth_exponent(command, players)
+        if exponent <= MAX_EXPONENT[bound]:
+            return
+    pytest.fail(f"{name} grows as n**{exponent:.2f}, "
+                f"but is declared {bound}")
+
+
+def _flag_and_allow(player, size):
+    player.flag_video(_video_id(size - 1), "spam")
+    player.allow_video(_video_id(size - 1))
+
+
+def _add_and_remove(player, size):
+    player.add_to_playlist("bench", _video_id(size - 1))
+    player.remove_from_playlist("bench", _video_id(size - 1))
+
+
+def _add_and_remove_many(player, size):
+    selectors = [_video_id(size - 1 - num) for num in range(10)]
+    player.add_many_to_playlist("bench", selectors)
+    player.remove_many_from_playlist("bench", selectors)
+
+
+def _create_and_delete(player, size):
+    player.create_playlist("scratch")
+    player.delete_playlist("scratch")
+
+
+# Each command is a (name, bound, function) triple. The function runs the
+# command once on a player, given the catalog size.
+COMMANDS = [
+    ("number_of_videos", "constant",
+     lambda player, size: player.number_of_videos()),
+    ("play_video", "constant",
+     lambda player, size: player.play_video(_video_id(size // 3))),
+    ("play_random_video", "constant",
+     lambda player, size: player.play_random_video()),
+    ("pause_video", "constant", lambda player, size: player.pause_video()),
+    ("continue_video", "constant",
+     lambda player, size: player.continue_video()),
+    ("show_playing", "constant", lambda player, size: player.show_playing()),
+    ("stop_video", "constant", lambda player, size: player.stop_video()),
+    ("flag_and_allow_video", "constant", _flag_and_allow),
+    ("create_and_delete_playlist", "constant", _create_and_delete),
+    ("add_and_remove_from_playlist", "constant", _add_and_remove),
+    ("add_and_remove_many", "constant", _add_and_remove_many),
+    ("show_playlist_page", "constant",
+     lambda player, size: player.show_playlist("bench", 2)),
+    ("show_all_playlists", "constant",
+     lambda player, size: player.show_all_playlists()),
+    ("show_playlist", "linear",
+     lambda player, size: player.show_playlist("bench")),
+    ("show_all_videos", "linear",
+     lambda player, size: player.show_all_videos()),
+    ("search_videos", "linear",
+     lambda player, size: player.search_videos("cats")),
+    ("search_videos_tag", "linear",
+     lambda player, size: player.search_videos_tag(tag_name(3))),
+]
+
+
+@pytest.mark.parametrize("name, bound, command", COMMANDS,
+                         ids=[name for name, _, _ in COMMANDS])
+def test_command_growth(players, name, bound, command):
+    _check_growth(name, bound, command, players)
+
+
+def test_play_video_growth_with_flagged_videos(flagged_players):
+    _check_growth("play_video", "constant",
+                  lambda player, size: player.play_video(_video_id(size - 1)),
+                  flagged_players)
+
+
+def test_play_random_video_growth_with_flagged_videos(flagged_players):
+    _check_growth("play_random_video", "constant",
+                  lambda player, size: player.play_random_video(),
+                  flagged_players)
+
+
+def test_play_video_growth_on_shared_catalog(shared_players):
+    # Videos are looked up by binary search in a shared catalog.
+    _check_growth("play_video", "logarithmic",
+                  lambda player, size: player.play_video(_video_id(size // 3)),
+                  shared_players)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from src.sharded_library import ShardedVideoLibrary
+from src.sharded_library import read_slice
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_slices_hold_every_line_once():
+    path = VideoLibrary.DEFAULT_PATH
+    with open(path) as video_file:
+        lines = video_file.readlines()
+    for count in range(1, 8):
+        sliced = []
+        for index in range(count):
+            sliced.extend(read_slice(path, index, count))
+        assert sliced == lines
+
+
+def _ids(videos):
+    return [video.video_id for video in videos]
+
+
+def test_sharded_search_matches_library():
+    library = VideoLibrary()
+    with ShardedVideoLibrary(num_shards=3) as sharded:
+        assert (_ids(sharded.search_videos("CAT"))
+                == _ids(library.search_videos("CAT")))
+        assert (_ids(sharded.search_videos_tag("#animal"))
+                == _ids(library.search_videos_tag("#animal")))
+        assert sharded.search_videos_tag("#nothing") == []
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_player_on_sharded_library(capfd):
+    with ShardedVideoLibrary(num_shards=2) as sharded:
+        player = VideoPlayer(video_library=sharded)
+        player.flag_video("amazing_cats_video_id")
+        player.search_videos_tag("#cat")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Here are the results for #cat:" in lines[1]
+    assert "1) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[2]
+
+
+def test_sharded_library_over_several_files(tmp_path):
+    (tmp_path / "a.txt").write_text(
+        "Cat A | cat_a | #cat\nDog A | dog_a | #dog\n")
+    (tmp_path / "b.txt").write_text(
+        "Cat B | cat_b | #cat\nDog B | dog_b | #dog")
+    with ShardedVideoLibrary(tmp_path, num_shards=3) as sharded:
+        assert _ids(sharded.search_videos("cat")) == ["cat_a", "cat_b"]
+        assert _ids(sharded.search_videos_tag("#dog")) == ["dog_a", "dog_b"]
+
+
+def test_sharded_search_skips_duplicate_lines(tmp_path):
+    lines = [f"Filler {i} | filler_{i} | #filler" for i in range(60)]
+    lines[0] = "Cat A | cat1 | #cat"
+    lines[51] = "Cat A | cat1 | #cat"
+    lines[30] = "Dog | dog1 | #cat"
+    lines[40] = "Cat copy | dog1 | #cat"
+    path = tmp_path / "videos.txt"
+    path.write_text("\n".join(lines) + "\n")
+    with ShardedVideoLibrary(path, num_shards=4) as sharded:
+        assert _ids(sharded.search_videos_tag("#cat")) == ["cat1", "dog1"]
+        assert _ids(sharded.search_videos("cat")) == ["cat1"]
+
+
+def test_invalid_utf8_is_replaced(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_bytes(b"Caf\xe9 | cafe_id | #cat\nDog | dog_id | #dog\n")
+    assert list(read_slice(path, 0, 1)) == [
+        "Caf� | cafe_id | #cat\n", "Dog | dog_id | #dog\n"]
+    with ShardedVideoLibrary(path, num_shards=2) as sharded:
+        assert _ids(sharded.search_videos("caf")) == ["cafe_id"]
+        assert _ids(sharded.search_videos_tag("#dog")) == ["dog_id"]
@@ -0,0 +1,61 @@
+import multiprocessing
+
+from src.shared_catalog import SharedCatalog
+from src.shared_catalog import SharedVideoLibrary
+from src.shared_catalog import write_catalog_file
+from src.video_library import VideoLibrary
+
+
+def _displays(videos):
+    return [video.display for video in videos]
+
+
+def _check_view(view, library):
+    assert (sorted(_displays(view.get_all_videos()))
+            == sorted(_displays(library.get_all_videos())))
+    assert view.get_video("amazing_cats_video_id").tags == ("#cat", "#animal")
+    assert view.get_video("nothing_video_id").tags == ()
+    assert view.get_video("does_not_exist") is None
+    assert (_displays(view.get_sorted_videos())
+            == _displays(library.get_sorted_videos()))
+    assert (_displays(view.get_sorted_videos("Amazing", "Funny"))
+            == _displays(library.get_sorted_videos("Amazing", "Funny")))
+    assert (_displays(view.get_videos_with_prefix("A"))
+            == _displays(library.get_videos_with_prefix("A")))
+    assert (_displays(view.search_videos("cat"))
+            == _displays(library.search_videos("cat")))
+    assert (_displays(view.search_videos_tag("#animal"))
+            == _displays(library.search_videos_tag("#animal")))
+    assert view.search_videos_tag("#nothing") == []
+
+
+def test_mmapped_catalog_file(tmp_path):
+    library = VideoLibrary()
+    write_catalog_file(library.get_all_videos(), tmp_path / "catalog.bin")
+    view = SharedVideoLibrary(path=tmp_path / "catalog.bin")
+    _check_view(view, library)
+    view.close()
+
+
+def _count_in_worker(name, queue):
+    view = SharedVideoLibrary(name=name)
+    queue.put(len(view.search_videos_tag("#cat")))
+    view.close()
+
+
+def test_shared_memory_catalog_across_processes():
+    library = VideoLibrary()
+    catalog = SharedCatalog(library.get_all_videos())
+    try:
+        view = SharedVideoLibrary(name=catalog.name)
+        _check_view(view, library)
+        view.close()
+
+        queue = multiprocessing.Queue()
+        worker = multiprocessing.Process(
+            target=_count_in_worker, args=(catalog.name, queue))
+        worker.start()
+        assert queue.get(timeout=10) == 2
+        worker.join()
+    finally:
+        catalog.close()
@@ -0,0 +1,69 @@
+import random
+
+from src.sorted_index import SortedIndex
+from src.video_player import VideoPlayer
+
+
+def test_sorted_index_matches_sorted_list():
+    rng = random.Random(0)
+    index = SortedIndex(load=4)
+    expected = []
+    for _ in range(500):
+        value = rng.randrange(100)
+        if expected and rng.random() < 0.4:
+            value = rng.choice(expected)
+            index.remove(value)
+            expected.remove(value)
+        else:
+            index.add(value)
+            expected.append(value)
+        assert list(index) == sorted(expected)
+    assert len(index) == len(expected)
+    assert list(index.irange(20, 40)) == sorted(
+        value for value in expected if 20 <= value < 40)
+
+
+def test_sorted_index_prefix():
+    index = SortedIndex(["mango", "apple", "melon", "banana", "m"],
+                        key=str.lower)
+    assert list(index.prefix("m")) == ["m", "mango", "melon"]
+    assert list(index.prefix("z")) == []
+
+
+def test_show_all_videos_range(capfd):
+    player = VideoPlayer()
+    player.show_all_videos("Amazing", "Funny")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 3
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[2]
+
+
+def test_show_all_playlists_prefix(capfd):
+    player = VideoPlayer()
+    player.create_playlist("my_playlist")
+    player.create_playlist("another_playlist")
+    player.create_playlist("mine")
+    player.delete_playlist("MINE")
+    player.show_all_playlists("m")
+    player.show_all_playlists("z")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Showing all playlists:" in lines[4]
+    assert "my_playlist" in lines[5]
+    assert "No playlists start with z" in lines[6]
+
+
+def test_show_all_playlists_prefix_ignores_case(capfd):
+    player = VideoPlayer()
+    player.create_playlist("My_playlist")
+    player.create_playlist("mine")
+    player.create_playlist("Other")
+    player.show_all_playlists("m")
+    player.show_all_playlists("MY")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[3:] == ["Showing all playlists:", "My_playlist", "mine",
+                         "Showing all playlists:", "My_playlist"]
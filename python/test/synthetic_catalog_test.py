@@ -0,0 +1,22 @@
+from collections import Counter
+
+from src.synthetic_catalog import generate_videos
+from src.synthetic_catalog import tag_name
+from src.synthetic_catalog import write_catalog
+from src.video_library import VideoLibrary
+
+
+def test_generated_catalog_loads(tmp_path):
+    write_catalog(tmp_path / "videos.txt", 200, num_tags=20, seed=1)
+    library = VideoLibrary(tmp_path / "videos.txt")
+    assert len(library.get_all_videos()) == 200
+    video = library.get_video("video_00000007")
+    assert video.title
+    assert all(tag.startswith("#tag") for tag in video.tags)
+
+
+def test_generation_is_deterministic_and_skewed():
+    videos = list(generate_videos(2000, num_tags=100, seed=3))
+    assert videos == list(generate_videos(2000, num_tags=100, seed=3))
+    counts = Counter(tag for _, _, tags in videos for tag in tags)
+    assert counts[tag_name(1)] > 5 * counts[tag_name(50)]
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from src.synthetic_catalog import write_catalog
+from src.tag_matrix import TagMatrix
+from src.video import Video
+from src.video_library import VideoLibrary
+
+
+def _library():
+    return VideoLibrary(videos=[
+        Video("A", "a", ["#x", "#y"]),
+        Video("B", "b", ["#x", "#y", "#y"]),
+        Video("C", "c", ["#x", "#z"]),
+        Video("D", "d", []),
+    ])
+
+
+def test_match_any_and_all():
+    matrix = TagMatrix(_library())
+    assert matrix.tags == ["#x", "#y", "#z"]
+    assert matrix.match_any(["#y", "#z"]) == ["a", "b", "c"]
+    assert matrix.match_all(["#x", "#y"]) == ["a", "b"]
+    assert matrix.match_all(["#x", "#unknown"]) == []
+    assert matrix.match_any(["#unknown"]) == []
+
+
+def test_cooccurrence():
+    matrix = TagMatrix(_library())
+    counts = matrix.cooccurrence().toarray()
+    assert counts.tolist() == [[3, 2, 1], [2, 2, 0], [1, 0, 1]]
+    assert matrix.cooccurring_tags("#x") == [("#y", 2), ("#z", 1)]
+    assert matrix.cooccurring_tags("#unknown") == []
+
+
+def test_similar():
+    matrix = TagMatrix(_library())
+    similar = matrix.similar("a")
+    assert [video_id for video_id, _ in similar] == ["b", "c"]
+    assert similar[0][1] == pytest.approx(1.0)
+    assert similar[1][1] == pytest.approx(0.5)
+    assert matrix.similar("d") == []
+
+
+def test_matches_library_on_synthetic_catalog(tmp_path):
+    write_catalog(tmp_path / "videos.txt", 2000, num_tags=50)
+    library = VideoLibrary(tmp_path / "videos.txt")
+    matrix = TagMatrix(library)
+    expected = {video.video_id for video in library.get_all_videos()
+                if "#tag3" in video.tags and "#tag7" in video.tags}
+    assert set(matrix.match_all(["#tag3", "#tag7"])) == expected
@@ -0,0 +1,55 @@
+from src.shared_catalog import SharedVideoLibrary
+from src.shared_catalog import write_catalog_file
+from src.tags import TAGS
+from src.tags import TagTable
+from src.tags import normalize_tag
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_normalize_tag():
+    assert normalize_tag("#Dog") == "#dog"
+    assert normalize_tag("  dog ") == "#dog"
+    assert normalize_tag("##DOG") == "#dog"
+    assert normalize_tag("# Dog") == "#dog"
+    assert normalize_tag(" # ") == ""
+
+
+def test_tag_table_interns_once():
+    table = TagTable()
+    assert table.intern("#dog") == table.intern("#dog") == 0
+    assert table.intern("#cat") == 1
+    assert len(table) == 2
+    assert table.get_id("CAT") == 1
+    assert table.get_id("#bird") is None
+    assert table.names([1, 0]) == ("#cat", "#dog")
+
+
+def test_video_tags_are_canonical():
+    video = Video("Dogs", "dogs", ["#Dog", "dog", "  #ANIMAL ", "#"])
+    assert video.tags == ("#dog", "#animal")
+    assert list(video.tag_ids) == [TAGS.get_id("#dog"),
+                                   TAGS.get_id("#animal")]
+    assert video.has_tag("DOG")
+    assert not video.has_tag("#cat")
+    assert video.display == "Dogs (dogs) [#dog #animal]"
+
+
+def test_tag_search_ignores_case(tmp_path, capfd):
+    library = VideoLibrary()
+    assert ([video.video_id for video in library.search_videos_tag("#CAT")]
+            == ["amazing_cats_video_id", "another_cat_video_id"])
+    assert library.search_videos_tag("animal") == library.search_videos_tag(
+        "#animal")
+
+    write_catalog_file(library.get_all_videos(), tmp_path / "catalog.bin")
+    shared = SharedVideoLibrary(path=tmp_path / "catalog.bin")
+    assert len(shared.search_videos_tag(" #Dog")) == 1
+    shared.close()
+
+    player = VideoPlayer()
+    player.create_playlist("cats")
+    player.add_many_to_playlist("cats", ["tag:#CAT"])
+    out, err = capfd.readouterr()
+    assert "Added 2 videos to cats" in out
@@ -1,3 +1,5 @@
+import pytest
+
 from src.video_library import VideoLibrary
 
 
@@ -24,3 +26,55 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_video_display_string():
+    library = VideoLibrary()
+    assert (library.get_video("amazing_cats_video_id").display
+            == "Amazing Cats (amazing_cats_video_id) [#cat #animal]")
+    assert (library.get_video("nothing_video_id").display
+            == "Video about nothing (nothing_video_id) []")
+
+
+def test_random_video_after_removal():
+    library = VideoLibrary()
+    assert len(library) == 5
+    library.remove_video("amazing_cats_video_id")
+    assert len(library) == 4
+    for _ in range(20):
+        assert library.get_random_video().video_id != "amazing_cats_video_id"
+
+
+def _write_sources(tmp_path):
+    (tmp_path / "a.txt").write_text(
+        "Zebra | zebra_id | #animal\n"
+        "Cat | cat_id | #animal, #cat\n")
+    (tmp_path / "b.txt").write_text(
+        "Dog | dog_id | #animal\n"
+        "Cat remastered | cat_id | #cat, #hd\n")
+    return tmp_path / "a.txt", tmp_path / "b.txt"
+
+
+def test_library_merges_sources(tmp_path):
+    _, second = _write_sources(tmp_path)
+    library = VideoLibrary(str(tmp_path / "*.txt"))
+    assert [video.title for video in library.get_sorted_videos()] == [
+        "Cat", "Dog", "Zebra"]
+    assert sorted(library.get_tag_postings("#animal")) == [
+        "cat_id", "dog_id", "zebra_id"]
+    assert library.get_tag_postings("#hd") == []
+    assert [(error.path, error.line_number) for error in library.load_errors
+            ] == [(str(second), 2)]
+
+
+def test_library_conflict_policies(tmp_path):
+    first, second = _write_sources(tmp_path)
+    library = VideoLibrary([first, second], conflict="last")
+    assert library.get_video("cat_id").title == "Cat remastered"
+    assert library.get_tag_postings("#hd") == ["cat_id"]
+    assert sorted(library.get_tag_postings("#animal")) == [
+        "dog_id", "zebra_id"]
+    assert [(error.path, error.line_number) for error in library.load_errors
+            ] == [(str(first), 2)]
+    with pytest.raises(ValueError):
+        VideoLibrary([first, second], conflict="error")
@@ -0,0 +1,84 @@
+from collections import Counter
+import random
+
+from src.playback import PlaybackSession
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.watch_stats import CountMinSketch
+from src.watch_stats import SpaceSaving
+from src.watch_stats import WatchStats
+
+
+def _zipf_stream(num_keys, length, seed=0):
+    rng = random.Random(seed)
+    keys = [f"key{rank}" for rank in range(1, num_keys + 1)]
+    weights = [1 / rank for rank in range(1, num_keys + 1)]
+    return rng.choices(keys, weights, k=length)
+
+
+def test_count_min_sketch_overestimates_slightly():
+    stream = _zipf_stream(5000, 20000)
+    sketch = CountMinSketch(width=1024, depth=4)
+    for key in stream:
+        sketch.add(key)
+    for key, count in Counter(stream).items():
+        estimate = sketch.estimate(key)
+        assert count <= estimate <= count + 0.01 * len(stream)
+
+
+def test_space_saving_finds_heavy_hitters():
+    stream = _zipf_stream(5000, 20000)
+    summary = SpaceSaving(capacity=50)
+    for key in stream:
+        summary.add(key)
+    exact = Counter(stream).most_common(5)
+    top = summary.top(5)
+    assert [key for key, _ in top] == [key for key, _ in exact]
+    for (key, count), (_, exact_count) in zip(top, exact):
+        assert count >= exact_count
+
+
+def test_watch_time_from_events():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    dogs = library.get_video("funny_dogs_video_id")
+    clock = iter([0.0, 10.0, 15.0, 20.0, 30.0, 34.0]).__next__
+    for exact in (True, False):
+        stats = WatchStats(exact=exact)
+        session = PlaybackSession(clock=clock, listener=stats.record)
+        session.play(cats)
+        session.pause()
+        session.resume()
+        session.stop()
+        session.play(dogs)
+        session.stop()
+        clock = iter([0.0, 10.0, 15.0, 20.0, 30.0, 34.0]).__next__
+        assert stats.plays == 2
+        assert stats.watch_seconds == 19.0
+        assert stats.video_plays("amazing_cats_video_id") == 1
+        assert stats.video_watch_seconds("amazing_cats_video_id") == 15.0
+        assert stats.tag_plays("#animal") == 2
+        assert stats.tag_watch_seconds("#animal") == 19.0
+        assert stats.top_tags(1) == [("#animal", 2)]
+
+
+def test_show_watch_stats(capfd):
+    player = VideoPlayer()
+    player.show_watch_stats()
+    player.play_video("amazing_cats_video_id")
+    player.play_video("funny_dogs_video_id")
+    player.play_video("amazing_cats_video_id")
+    capfd.readouterr()
+    player.show_watch_stats(2)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[0].startswith("Played 3 videos for ")
+    assert lines[1] == "Top videos:"
+    assert lines[2].startswith(
+        "  1) Amazing Cats (amazing_cats_video_id) [#cat #animal] - 2 plays, ")
+    assert lines[3].startswith(
+        "  2) Funny Dogs (funny_dogs_video_id) [#dog #animal] - 1 plays, ")
+    assert lines[4] == "Top tags:"
+    assert lines[5].startswith("  1) #animal - 3 plays, ")
+    assert lines[6].startswith("  2) #cat - 2 plays, ")
+    assert len(lines) == 7